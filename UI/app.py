@@ -1,54 +1,266 @@
 import os
-import json
 import time
+import asyncio
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Optional, Literal, List, Dict, Any
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, Form, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SELECTED_PATH = os.path.join(BASE_DIR, "selected_cards.json")
+from fast_json import FastJSONResponse, dumps
+from llm_dispatcher import LLMOverloaded, estimate_tokens, get_dispatcher
+
+from response_cache import ResponseCache, candidate_ids, content_key, normalize_question
+from session_store import create_session_store
+from singleflight import SingleFlight, TokenBroadcast
+from telemetry import PROMETHEUS_CONTENT_TYPE, REGISTRY, get_logger, record_cache, record_llm, render_prometheus, stage
 
-from original_rag import FAISSRAGRetriever
-from card_generator import CardGenerator
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SELECTED_PATH = os.path.join(BASE_DIR, "selected_cards.json")  # 이전 형식 (처음 실행 시 DB로 이전)
+SELECTED_DB_PATH = os.getenv("SELECTED_CARDS_DB") or os.path.join(BASE_DIR, "selected_cards.db")
 
 load_dotenv()
-app = FastAPI(title="KB Card Dual RAG")
+app = FastAPI(title="KB Card Dual RAG", default_response_class=FastJSONResponse)
+# 응답 압축 (GZIP_MIN_SIZE 바이트 이상, SSE(text/event-stream)는 Starlette가 압축하지 않아 토큰이 바로 전달됨)
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1000")))
+logger = get_logger("app")
 
 static_dir = os.path.join(BASE_DIR, "static")
 if os.path.isdir(static_dir):
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-last_recommendations: List[Dict[str, Any]] = []
-selected_card: Optional[dict] = None
 retriever = None
-generator = CardGenerator()  # 전역 1회
+engine = None
+generator = None
+async_client = None
+
+# === 지연 로딩 + 백그라운드 워밍업 ===
+# 무거운 모듈(langchain, sentence_transformers 등)과 모델은 import 시점이 아니라
+# 처음 필요할 때(또는 startup 워밍업 스레드에서) 한 번만 로드한다.
+_load_locks = {name: threading.Lock() for name in ("generator", "retriever", "engine", "async_client")}
+readiness: Dict[str, bool] = {"generator": False, "retriever": False, "engine": False}
+ready_event = threading.Event()
+
+def get_generator():
+    global generator
+    if generator is None:
+        with _load_locks["generator"]:
+            if generator is None:
+                from card_generator import CardGenerator
+                generator = CardGenerator()
+                readiness["generator"] = True
+    return generator
 
 def get_retriever():
     global retriever
     if retriever is None:
-        from summary_rag import FAISSCardRetriever
-        retriever = FAISSCardRetriever()
+        with _load_locks["retriever"]:
+            if retriever is None:
+                from summary_rag import FAISSCardRetriever
+                retriever = FAISSCardRetriever()
+                readiness["retriever"] = True
     return retriever
 
-def save_selected_card(entry: dict):
-    entry_to_save = {**entry, "timestamp": int(time.time())}
+def get_engine():
+    global engine
+    if engine is None:
+        with _load_locks["engine"]:
+            if engine is None:
+                from original_rag import FAISSRAGRetriever
+                engine = FAISSRAGRetriever()
+                readiness["engine"] = True
+    return engine
+
+def get_async_client():
+    """비동기 OpenAI 클라이언트 (서버 이벤트 루프에서 재사용)"""
+    global async_client
+    if async_client is None:
+        with _load_locks["async_client"]:
+            if async_client is None:
+                from openai import AsyncOpenAI
+                async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+    return async_client
+
+# 워밍업 단계: 모델/인덱스 로드 + 합성 질의로 각 검색 단계를 한 번씩 실행 (LLM 생성 호출 없음)
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "연회비 없는 교통 할인 카드")
+
+def _warm_summary_query():
+    items, _elapsed = get_retriever().find_similar_cards(WARMUP_QUERY, "all", 3)
+    get_generator().build_comparison_table(items, top_k=3)
+    return {"items": len(items)}
+
+def _warm_stores():
+    get_selection_store()
+    sessions.load("warm-up")
+    return {"selection_store": get_selection_store().count()}
+
+WARMUP_STEPS = (
+    ("generator", get_generator),            # OpenAI 클라이언트 + 응답 캐시(디스크) 로드
+    ("retriever", get_retriever),            # Summary RAG FAISS 인덱스
+    ("summary_query", _warm_summary_query),  # 질문 임베딩 → FAISS → 비교표
+    ("engine", get_engine),                  # bge-m3 / cross-encoder / LangGraph
+    ("original_indexes", lambda: get_engine().warm_up(WARMUP_QUERY)),  # 카테고리 인덱스 + 합성 검색/재랭킹
+    ("stores", _warm_stores),                # 선택 기록/세션 저장소
+)
+warmup_status: Dict[str, Dict[str, Any]] = {
+    name: {"ready": False, "degraded": False, "seconds": None, "error": None, "detail": None} for name, _ in WARMUP_STEPS
+}
+
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+
+def warm_up():
+    """WARMUP_STEPS를 순서대로 실행하고 단계별 소요 시간/오류를 warmup_status에 기록.
+    실패한 단계는 WARMUP_RETRY_SECONDS 간격으로 다시 시도한다 (0이면 재시도 안 함)."""
+    started = time.perf_counter()
+    while True:
+        for name, step in WARMUP_STEPS:
+            if warmup_status[name]["ready"]:
+                continue
+            step_start = time.perf_counter()
+            try:
+                detail = step()
+                detail = detail if isinstance(detail, dict) else None
+                # 일부만 로드된 경우(예: 한 카테고리 인덱스 없음)는 ready이되 degraded로 표시
+                warmup_status[name].update(ready=True, error=None, detail=detail,
+                                           degraded=bool(detail and detail.get("missing")))
+            except Exception as e:
+                warmup_status[name].update(ready=False, error=str(e))
+                logger.error("warm-up 실패", extra={"component": name, "error": str(e)})
+            warmup_status[name]["seconds"] = round(time.perf_counter() - step_start, 3)
+        if all(s["ready"] for s in warmup_status.values()):
+            ready_event.set()
+            break
+        if WARMUP_RETRY_SECONDS <= 0:
+            break
+        time.sleep(WARMUP_RETRY_SECONDS)
+    logger.info("warm-up 완료", extra={"seconds": round(time.perf_counter() - started, 1),
+                                       "ready": ready_event.is_set()})
+
+@app.on_event("startup")
+def start_warm_up():
+    if os.getenv("WARMUP_ON_STARTUP", "1") != "0":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        # 워밍업을 끄면 첫 요청이 로드 비용을 치르는 것을 감수한 것으로 보고 바로 ready
+        ready_event.set()
+
+# === 블로킹 작업 전용 스레드 풀 ===
+# FAISS/BM25 검색, cross-encoder 재랭킹, 모델 로딩 등 CPU/블로킹 작업은 이벤트 루프가 아니라
+# 크기를 조절할 수 있는 전용 풀(WORK_THREADS)에서 실행한다. OpenAI 호출은 AsyncOpenAI로,
+# Original RAG 생성은 LangChain ainvoke/astream으로 이벤트 루프에서 처리해 스트리밍 중에 이 풀을 점유하지 않는다.
+WORK_THREADS = int(os.getenv("WORK_THREADS", "8"))
+work_executor = ThreadPoolExecutor(max_workers=WORK_THREADS, thread_name_prefix="work")
+_work_lock = threading.Lock()
+work_stats = {"queued": 0, "running": 0, "completed": 0}
+
+def _run_counted(fn):
+    with _work_lock:
+        work_stats["queued"] -= 1
+        work_stats["running"] += 1
+    try:
+        return fn()
+    finally:
+        with _work_lock:
+            work_stats["running"] -= 1
+            work_stats["completed"] += 1
+
+async def run_blocking(fn, *args, **kwargs):
+    """블로킹 함수를 work_executor에서 실행하고 결과를 await"""
+    with _work_lock:
+        work_stats["queued"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(work_executor, _run_counted, partial(fn, *args, **kwargs))
+
+def queue_depth() -> Dict[str, int]:
+    with _work_lock:
+        return {**work_stats, "max_workers": WORK_THREADS}
+
+# === 세션별 상태 (추천 목록/선택 카드) ===
+# 쿠키(SESSION_COOKIE)로 세션을 구분한다. SESSION_STORE_DB를 지정하면 여러 워커/프로세스가
+# 같은 SQLite 파일을 공유하고, 없으면 워커 메모리에 TTL/LRU로 보관한다.
+SESSION_COOKIE = "kb_session"
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+
+sessions = create_session_store(
+    os.getenv("SESSION_STORE_DB") or None,
+    ttl_seconds=SESSION_TTL,
+    max_sessions=int(os.getenv("SESSION_MAX", "10000")),
+)
+
+# === 메트릭 (/metrics, Prometheus 텍스트 형식) ===
+HTTP_SECONDS = REGISTRY.histogram(
+    "kbcard_http_request_seconds", "HTTP 요청 처리 시간(초, 스트리밍은 응답 헤더까지)", ("method", "route", "status"))
+WORK_QUEUE = REGISTRY.gauge("kbcard_work_queue", "블로킹 작업 스레드 풀 상태", ("state",))
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
     try:
-        if os.path.exists(SELECTED_PATH):
-            with open(SELECTED_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
-            data = []
-    except Exception:
-        data = []
-    data.append(entry_to_save)
-    with open(SELECTED_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # 경로 변수(job_id 등)로 라벨이 늘어나지 않도록 라우트 템플릿을 사용
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                             route=getattr(route, "path", "unmatched"), status=status)
+
+@app.get("/metrics")
+async def metrics():
+    for state, value in queue_depth().items():
+        WORK_QUEUE.set(value, state=state)
+    WORK_QUEUE.set(flights.inflight(), state="coalesced_inflight")
+    get_dispatcher().stats()  # kbcard_llm_dispatch 게이지 갱신
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.middleware("http")
+async def session_middleware(request: Request, call_next):
+    session_id = request.cookies.get(SESSION_COOKIE)
+    is_new = not session_id
+    request.state.session_id = session_id or uuid.uuid4().hex
+    response = await call_next(request)
+    if is_new:
+        response.set_cookie(SESSION_COOKIE, request.state.session_id, max_age=int(SESSION_TTL),
+                            httponly=True, samesite="lax")
+    return response
+
+async def load_session(request: Request) -> dict:
+    return await run_blocking(sessions.load, request.state.session_id)
+
+async def save_session(request: Request, state: dict):
+    await run_blocking(sessions.save, request.state.session_id, state)
+
+# === Server-Sent Events ===
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+_selection_store = None
+_selection_lock = threading.Lock()
+
+def get_selection_store():
+    global _selection_store
+    if _selection_store is None:
+        with _selection_lock:
+            if _selection_store is None:
+                from selection_store import SelectionStore
+                _selection_store = SelectionStore(SELECTED_DB_PATH, legacy_json=SELECTED_PATH)
+    return _selection_store
+
+def save_selected_card(entry: dict):  # work_executor에서 호출
+    # append-only INSERT (WAL) → 동시 요청에서도 기록이 유실되지 않음
+    get_selection_store().append({**entry, "timestamp": int(time.time())})
 
 @app.get("/")
-def home():
+async def home():
     filepath = os.path.join(BASE_DIR, "example.html")
     return FileResponse(
         filepath,
@@ -60,95 +272,509 @@ def home():
     )
 
 @app.get("/healthz")
-def healthz():
-    return {"ok": True}
+async def healthz():
+    """liveness: 프로세스가 응답하면 항상 200"""
+    return {"ok": True, "ready": ready_event.is_set(), "components": readiness, "queue": queue_depth(),
+            "llm": get_dispatcher().stats(), "pid": os.getpid()}  # 멀티 프로세스 모드(serve.py)에서 응답한 워커 구분
+
+@app.get("/readyz")
+async def readyz():
+    """readiness: 워밍업(인덱스/모델 로드 + 합성 질의)이 모두 끝나야 200, 그 전에는 503.
+    로드밸런서는 이 엔드포인트로 트래픽 투입 시점을 정한다."""
+    body = {"ready": ready_event.is_set(), "degraded": any(s["degraded"] for s in warmup_status.values()),
+            "components": warmup_status,
+            "warmup_seconds": round(sum(s["seconds"] or 0 for s in warmup_status.values()), 3)}
+    return FastJSONResponse(body, status_code=200 if body["ready"] else 503)
+
+# === 동일 요청 합치기 (single-flight) ===
+# 캠페인 등으로 같은 질문이 몰리면 진행 중인 검색/생성 1건의 결과를 함께 받는다.
+# 키는 정규화한 요청 파라미터, COALESCE_TIMEOUT은 요청별 대기 한도 (초과 시 504, 공유 계산은 계속 진행)
+flights = SingleFlight("app")
+COALESCE_TIMEOUT = float(os.getenv("COALESCE_TIMEOUT", "90"))
+COALESCED = REGISTRY.counter("kbcard_coalesced_requests_total", "single-flight 요청 수 (leader=계산 수행, follower=합류)",
+                             ("endpoint", "role"))
+TIMEOUT_MESSAGE = "요청 처리 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+
+# === LLM 입장 제어 (llm_dispatcher.py) ===
+# CardGenerator/Original RAG/간단화의 OpenAI 호출은 모델별 동시 실행 수·대기열·분당 토큰 예산을 공유한다.
+# 대기열이 가득 차면 기다리게 하지 않고 바로 503(대기열)/429(토큰 예산) + Retry-After로 거절한다.
+SIMPLIFY_MODEL = "gpt-4o"
+
+def overloaded_response(e: LLMOverloaded) -> FastJSONResponse:
+    return FastJSONResponse({"message": str(e), "retry_after": e.retry_after}, status_code=e.status,
+                            headers={"Retry-After": str(e.retry_after)})
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, e: LLMOverloaded):
+    return overloaded_response(e)
+
+async def coalesce(endpoint: str, key: tuple, fn, timeout: Optional[float] = COALESCE_TIMEOUT):
+    flight_key = (endpoint, *key)
+    COALESCED.inc(endpoint=endpoint, role="follower" if flights.is_inflight(flight_key) else "leader")
+    return await flights.do(flight_key, fn, timeout=timeout)
 
-# === 추천 + 비교(비교 개수는 top_k와 동일) ===
+async def find_cards(user_input: str, card_type: str, top_k: int) -> List[Dict[str, Any]]:
+    """Summary RAG 추천 검색 (질문 임베딩 + FAISS), 동일 요청은 1회만 실행"""
+    items, _elapsed = await coalesce(
+        "recommend", (normalize_question(user_input), card_type, top_k),
+        lambda: run_blocking(lambda: get_retriever().find_similar_cards(user_input, card_type, top_k)),
+    )
+    return items or []
+
+# === 응답 필드 선택 (느린 회선/모바일용) ===
+# fields=card_name,keyword,score처럼 필요한 항목 필드만 받고, 긴 card_text/attributes는 GET /cards/{id}로 필요할 때 조회
+ITEM_FIELD_ALIASES = {"score": "similarity_score", "type": "card_type", "text": "card_text"}
+
+def card_id(item: Dict[str, Any]) -> str:
+    """추천 항목 ID = 응답 캐시와 같은 후보 카드 ID (카드 유형:카드명)"""
+    return candidate_ids([item])[0]
+
+def select_fields(items: List[Dict[str, Any]], fields: str = "") -> List[Dict[str, Any]]:
+    """항목마다 id + 요청한 필드만 (fields가 비어 있으면 전체 필드)"""
+    wanted = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not wanted:
+        return [{"id": card_id(x), **x} for x in items]
+    return [
+        {"id": card_id(x), **{f: x[ITEM_FIELD_ALIASES.get(f, f)] for f in wanted if ITEM_FIELD_ALIASES.get(f, f) in x}}
+        for x in items
+    ]
+
+# === LLM 추천 답변/서술형 비교 분석 (선택, 백그라운드 작업) ===
+comparison_jobs: Dict[str, asyncio.Task] = {}
+MAX_COMPARISON_JOBS = 256
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+def submit_comparison_job(question: str, items: List[Dict[str, Any]], card_type: str, top_k: int,
+                          parts: tuple) -> str:
+    """선택된 LLM 생성(response/comparison)을 이벤트 루프에서 동시에 실행하는 작업 등록"""
+    job_id = uuid.uuid4().hex
+    # 같은 질문/후보/요청 항목의 생성이 진행 중이면 그 결과를 공유 (호출별 타임아웃은 LLM_TIMEOUT)
+    key = (normalize_question(question), card_type, top_k, parts, tuple(candidate_ids(items)))
+    comparison_jobs[job_id] = asyncio.create_task(coalesce("generate", key, lambda: get_generator().agenerate_all(
+        question, items, card_type, top_k, LLM_TIMEOUT, parts, client=get_async_client()
+    ), timeout=None))
+    # 오래된 완료 작업부터 정리
+    for old_id in [k for k, f in comparison_jobs.items() if f.done()][: max(0, len(comparison_jobs) - MAX_COMPARISON_JOBS)]:
+        comparison_jobs.pop(old_id, None)
+    return job_id
+
+# === 추천 + 비교표(비교 개수는 top_k와 동일) ===
 @app.post("/recommend")
-def recommend(
+async def recommend(
+    request: Request,
     user_input: str = Form(...),
     card_type: Literal["all", "credit", "check"] = Form("all"),
     top_k: int = Form(5),
+    narrative: bool = Form(False),
+    answer: bool = Form(False),
+    fields: str = Form(""),
+    comparison_format: Literal["both", "markdown", "table", "none"] = Form("both"),
 ):
-    global last_recommendations
-    r = get_retriever()
-    items, _elapsed = r.find_similar_cards(user_input, card_type, top_k)
-    last_recommendations = items or []
+    try:
+        last_recommendations = await find_cards(user_input, card_type, top_k)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
+    state = await load_session(request)
+    state["last_recommendations"] = last_recommendations
+    await save_session(request, state)
 
     # ⛔ 요약 말풍선 제거: summary_text 제공하지 않음(또는 빈 문자열)
     # summary_text = ""  # 필요하면 이렇게 명시적으로 빈 값
 
-    # 비교는 항상 top_k 개수만큼
-    comparison = generator.generate_comparison(last_recommendations, top_k=top_k)
+    # 비교는 항상 top_k 개수만큼: LLM 없이 카드 속성으로 만든 비교표를 바로 반환 (comparison_format으로 형식 선택)
+    table = None
+    if comparison_format != "none":
+        table = (await run_blocking(get_generator)).build_comparison_table(last_recommendations, top_k=top_k)
+    # 서술형 비교 분석(narrative)/추천 답변(answer)은 요청 시에만 백그라운드에서 동시에 생성
+    # (GET /recommend/comparison/{job_id})
+    parts = tuple(p for p, on in (("response", answer), ("comparison", narrative and len(last_recommendations) >= 2)) if on)
+    job_id = submit_comparison_job(user_input, last_recommendations, card_type, top_k, parts) if parts else None
 
-    print(f"[SRV]/recommend items={len(last_recommendations)} top_k={top_k} "
-          f"comparison_len={len(comparison or '')} head={(comparison or '')[:80]!r}")
+    logger.info("/recommend", extra={"items": len(last_recommendations), "top_k": top_k, "job": job_id})
 
-    return JSONResponse({
-        "items": last_recommendations,
+    body = {
+        "items": select_fields(last_recommendations, fields),
         "summary_text": "",   # ← 프론트가 무시하도록 빈 문자열 전달
-        "comparison": comparison
-    })
+        "comparison_job": job_id,
+    }
+    if comparison_format in ("both", "markdown"):
+        body["comparison"] = table["markdown"]
+    if comparison_format in ("both", "table"):
+        body["comparison_table"] = table
+    return FastJSONResponse(body)
+
+@app.get("/cards/{card_id:path}")
+async def card_detail(card_id: str, fields: str = ""):
+    """추천 항목 id(카드 유형:카드명)로 카드 상세(card_text/attributes 등)를 조회 (fields로 필드 선택)"""
+    search_type, _, card_name = card_id.partition(":")
+    card = await run_blocking(lambda: get_retriever().get_card(search_type, card_name))
+    if card is None:
+        return FastJSONResponse({"message": "카드를 찾을 수 없습니다."}, status_code=404)
+    return FastJSONResponse(select_fields([card], fields)[0])
+
+@app.get("/recommend/comparison/{job_id}")
+async def recommend_comparison(job_id: str):
+    """추천 답변/서술형 비교 분석 작업 상태/결과 ({"response", "comparison", "errors", "elapsed"})"""
+    future = comparison_jobs.get(job_id)
+    if future is None:
+        return FastJSONResponse({"message": "비교 분석 작업을 찾을 수 없습니다."}, status_code=404)
+    if not future.done():
+        return FastJSONResponse({"status": "pending"}, status_code=202)
+    try:
+        return FastJSONResponse({"status": "done", **future.result()})
+    except Exception as e:
+        return FastJSONResponse({"status": "error", "message": f"비교 분석 오류: {e}"}, status_code=500)
+
+async def comparison_events(items: List[Dict[str, Any]], top_k: int):
+    """서술형 비교 분석 토큰 SSE (AsyncOpenAI 스트리밍)"""
+    try:
+        gen = await run_blocking(get_generator)
+        parts = []
+        async for token in gen.agenerate_comparison_stream(items, top_k=top_k, client=get_async_client()):
+            parts.append(token)
+            yield sse("token", token)
+        yield sse("done", {"comparison": "".join(parts).strip()})
+    except Exception as e:
+        yield sse("error", f"비교 분석 오류: {e}")
+
+@app.post("/recommend/comparison/stream")
+async def recommend_comparison_stream(request: Request, top_k: int = Form(5)):
+    """이 세션의 마지막 추천 목록에 대한 서술형 비교 분석을 스트리밍 (SSE)"""
+    items = (await load_session(request))["last_recommendations"]
+    return StreamingResponse(comparison_events(items, top_k), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/recommend/stream")
+async def recommend_stream(
+    request: Request,
+    user_input: str = Form(...),
+    card_type: Literal["all", "credit", "check"] = Form("all"),
+    top_k: int = Form(5),
+    narrative: bool = Form(False),
+    fields: str = Form(""),
+):
+    """추천 목록 → 비교표를 바로 보내고, narrative=true면 서술형 비교 분석을 토큰 단위로 스트리밍 (SSE)"""
+    try:
+        items = await find_cards(user_input, card_type, top_k)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
+    state = await load_session(request)
+    state["last_recommendations"] = items
+    await save_session(request, state)
+    gen = await run_blocking(get_generator)
+
+    async def events():
+        yield sse("items", select_fields(items, fields))
+        yield sse("table", gen.build_comparison_table(items, top_k=top_k))
+        if not narrative:
+            yield sse("done", {})
+            return
+        async for ev in comparison_events(items, top_k):
+            yield ev
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @app.post("/select")
-def select(
+async def select(
+    request: Request,
     card_name: str = Form(...),
     card_type: Literal["credit", "check"] = Form("credit"),
     keyword: str = Form(""),
 ):
-    global selected_card
-    picked = next((x for x in last_recommendations if x.get("card_name") == card_name), None)
-    selected_card = {
+    state = await load_session(request)
+    picked = next((x for x in state["last_recommendations"] if x.get("card_name") == card_name), None)
+    selected_card = state["selected_card"] = {
         "card_name": card_name,
         "card_type": card_type,
         "keyword": keyword,
         "card_text": picked.get("card_text", "") if picked else "",
     }
-    save_selected_card({"card_name": card_name, "card_type": card_type, "keyword": keyword, "from": "SummaryRAG"})
-    return JSONResponse({"ok": True, "selected": selected_card})
+    await save_session(request, state)
+    await run_blocking(save_selected_card, {"card_name": card_name, "card_type": card_type, "keyword": keyword, "from": "SummaryRAG"})
+    return FastJSONResponse({"ok": True, "selected": selected_card})
 
 @app.post("/rag")
-def rag(
+async def rag(
+    request: Request,
     question: str = Form(...),
     mode: Literal["detailed", "simple"] = Form("detailed"),
 ):
-    if not selected_card:
-        return JSONResponse({"message": "먼저 추천 목록에서 카드를 선택해 주세요."}, status_code=400)
+    card = (await load_session(request))["selected_card"]
+    if not card:
+        return FastJSONResponse({"message": "먼저 추천 목록에서 카드를 선택해 주세요."}, status_code=400)
     try:
-        engine = FAISSRAGRetriever()
         explain_easy = mode == "simple"
-        resp = engine.query(
-            card_name=selected_card["card_name"],
-            card_text=selected_card.get("card_text", ""),
-            question=question,
-            explain_easy=explain_easy,
-        )
+        eng = await run_blocking(get_engine)
+        # 검색/재랭킹은 작업 스레드 풀(run_blocking)에서, 답변 생성은 이벤트 루프에서
+        resp = await coalesce("rag", (card["card_name"], normalize_question(question), mode),
+                              lambda: eng.aquery(
+                                  card_name=card["card_name"],
+                                  card_text=card.get("card_text", ""),
+                                  question=question,
+                                  explain_easy=explain_easy,
+                                  offload=run_blocking,
+                              ))
         if isinstance(resp, str):
-            return JSONResponse({"card_name": selected_card["card_name"], "answer": resp, "sources": []})
-        return JSONResponse({
-            "card_name": selected_card["card_name"],
+            return FastJSONResponse({"card_name": card["card_name"], "answer": resp, "sources": []})
+        return FastJSONResponse({
+            "card_name": card["card_name"],
             "answer": resp.get("answer", ""),
             "sources": resp.get("sources", []),
         })
+    except LLMOverloaded as e:
+        return overloaded_response(e)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
     except Exception as e:
-        return JSONResponse({"message": f"오류: {e}"}, status_code=500)
+        return FastJSONResponse({"message": f"오류: {e}"}, status_code=500)
 
-from openai import OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+@app.post("/rag/stream")
+async def rag_stream(
+    request: Request,
+    question: str = Form(...),
+    mode: Literal["detailed", "simple"] = Form("detailed"),
+):
+    """/rag의 스트리밍 버전 (SSE): sources → token... → done"""
+    card = (await load_session(request))["selected_card"]
+    if not card:
+        return FastJSONResponse({"message": "먼저 추천 목록에서 카드를 선택해 주세요."}, status_code=400)
+
+    async def events():
+        try:
+            eng = await run_blocking(get_engine)
+            async for ev in eng.aquery_stream(
+                card_name=card["card_name"],
+                card_text=card.get("card_text", ""),
+                question=question,
+                explain_easy=mode == "simple",
+                offload=run_blocking,
+            ):
+                yield sse(ev["event"], ev["data"])
+        except Exception as e:
+            yield sse("error", f"오류: {e}")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def compare_targets(request: Request, card_names: List[str]) -> List[str]:
+    """비교 대상 카드: 요청에 없으면 이 세션의 마지막 추천 목록 상위 3개"""
+    names = [n for n in card_names if n and n.strip()]
+    if not names:
+        names = [x.get("card_name", "") for x in (await load_session(request))["last_recommendations"][:3]]
+    return names
+
+@app.post("/rag/compare")
+async def rag_compare(
+    request: Request,
+    question: str = Form(...),
+    card_names: List[str] = Form([]),
+    mode: Literal["detailed", "simple"] = Form("detailed"),
+):
+    """여러 카드 비교 질의 (카드별 검색은 병렬, 생성은 1회)"""
+    names = await compare_targets(request, card_names)
+    if len(names) < 2:
+        return FastJSONResponse({"message": "비교할 카드를 2개 이상 선택해 주세요."}, status_code=400)
+    try:
+        eng = await run_blocking(get_engine)
+        resp = await coalesce("rag_compare", (tuple(names), normalize_question(question), mode),
+                              lambda: eng.aquery_multi(names, question, explain_easy=mode == "simple",
+                                                       offload=run_blocking))
+        if isinstance(resp, str):
+            return FastJSONResponse({"card_names": names, "answer": resp, "sources": {}})
+        return FastJSONResponse(resp)
+    except LLMOverloaded as e:
+        return overloaded_response(e)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
+    except Exception as e:
+        return FastJSONResponse({"message": f"오류: {e}"}, status_code=500)
+
+@app.post("/rag/compare/stream")
+async def rag_compare_stream(
+    request: Request,
+    question: str = Form(...),
+    card_names: List[str] = Form([]),
+    mode: Literal["detailed", "simple"] = Form("detailed"),
+):
+    """/rag/compare의 스트리밍 버전 (SSE): sources → token... → done"""
+    names = await compare_targets(request, card_names)
+    if len(names) < 2:
+        return FastJSONResponse({"message": "비교할 카드를 2개 이상 선택해 주세요."}, status_code=400)
+
+    async def events():
+        try:
+            eng = await run_blocking(get_engine)
+            async for ev in eng.aquery_multi_stream(names, question, explain_easy=mode == "simple",
+                                                    offload=run_blocking):
+                yield sse(ev["event"], ev["data"])
+        except Exception as e:
+            yield sse("error", f"오류: {e}")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/search/clauses")
+async def search_clauses(
+    question: str = Form(...),
+    card_type: Literal["all", "credit", "check"] = Form("all"),
+    fields: List[str] = Form([]),
+    keywords: List[str] = Form([]),
+    card_names: List[str] = Form([]),
+    top_n: int = Form(3),
+    max_cards: int = Form(10),
+):
+    """카테고리 전체 카드 약관 검색 (예: "해외이용 수수료 없는 체크카드 있어?") → 카드별 상위 청크"""
+    try:
+        key = (normalize_question(question), card_type, tuple(fields), tuple(keywords), tuple(card_names), top_n, max_cards)
+        result = await coalesce("search_clauses", key, lambda: run_blocking(lambda: get_engine().search_catalog(
+            question,
+            card_type=card_type,
+            fields=fields or None,
+            keywords=keywords or None,
+            card_names=card_names or None,
+            top_n_per_card=top_n,
+            max_cards=max_cards,
+        )))
+        return FastJSONResponse(result)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
+    except Exception as e:
+        return FastJSONResponse({"message": f"검색 오류: {e}"}, status_code=500)
+
+def simplify_messages(text: str) -> list:
+    return [
+        {"role": "system", "content": "아래 글을 사용자가 정확하고 쉽게 이해할 수 있도록 재작성해."},
+        {"role": "user", "content": text},
+    ]
+
+# === 간단화 결과 캐시 ===
+# 키는 본문 내용 해시(+모델/프롬프트 버전). 원본 답변이 Original RAG 답변 캐시에 있으면 간단화 결과를
+# 그 항목 옆에 변형으로 저장해 원본과 함께 만료/무효화되고, 그 밖의 글은 TTL/LRU 캐시(선택적 JSONL 저장)에 둔다.
+SIMPLIFY_PROMPT_VERSION = "v1"
+SIMPLIFY_VARIANT = f"simplified:{SIMPLIFY_MODEL}:{SIMPLIFY_PROMPT_VERSION}"
+simplify_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("SIMPLIFY_CACHE_TTL", str(24 * 3600))),
+    max_entries=int(os.getenv("SIMPLIFY_CACHE_MAX", "2048")),
+    path=os.getenv("SIMPLIFY_CACHE_PATH") or None,
+    name="simplify",
+)
+
+def simplify_key(text: str) -> str:
+    return content_key("simplify", SIMPLIFY_MODEL, SIMPLIFY_PROMPT_VERSION, text)
+
+def cached_simplification(text: str, key: str) -> Optional[str]:
+    """원본 답변 옆 변형(답변 캐시) → 간단화 캐시 순으로 조회 (엔진을 새로 로드하지는 않음)"""
+    if engine is not None:
+        simplified = engine.answer_cache.get_variant(text, SIMPLIFY_VARIANT)
+        record_cache("simplify_variant", simplified is not None)
+        if simplified is not None:
+            return simplified
+    simplified = simplify_cache.get(key)
+    if simplified is not None and engine is not None:
+        engine.answer_cache.put_variant(text, SIMPLIFY_VARIANT, simplified)
+    return simplified
+
+def store_simplification(text: str, key: str, simplified: str):
+    if not simplified:
+        return
+    simplify_cache.put(key, simplified)
+    if engine is not None:
+        engine.answer_cache.put_variant(text, SIMPLIFY_VARIANT, simplified)
+
+async def simplify_once(text: str, key: str) -> str:
+    """캐시 미스일 때 LLM 간단화 1회 (single-flight 리더가 실행)"""
+    messages = simplify_messages(text)
+    async with get_dispatcher().aslot(SIMPLIFY_MODEL, estimate_tokens(messages, 600), "simplify") as ticket:
+        with stage("simplify", "llm"):
+            res = await get_async_client().chat.completions.create(
+                model=SIMPLIFY_MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=600
+            )
+        ticket.record(res.usage)
+    record_llm("simplify", SIMPLIFY_MODEL, res.usage)
+    simplified = res.choices[0].message.content.strip()
+    store_simplification(text, key, simplified)
+    return simplified
 
 @app.post("/simplify")
-def simplify(text: str = Form(...)):
+async def simplify(text: str = Form(...)):
     try:
-        msg = [
-            {"role": "system", "content": "아래 글을 사용자가 정확하고 쉽게 이해할 수 있도록 재작성해."},
-            {"role": "user", "content": text},
-        ]
-        res = client.chat.completions.create(
-            model="gpt-4o",
-            messages=msg,
-            temperature=0.3,
-            max_tokens=600
-        )
-        return {"simplified": res.choices[0].message.content.strip()}
+        key = simplify_key(text)
+        simplified = cached_simplification(text, key)
+        if simplified is None:
+            simplified = await coalesce("simplify", (key,), lambda: simplify_once(text, key))
+        return {"simplified": simplified}
+    except LLMOverloaded as e:
+        return overloaded_response(e)
+    except asyncio.TimeoutError:
+        return FastJSONResponse({"message": TIMEOUT_MESSAGE}, status_code=504)
     except Exception as e:
-        return JSONResponse({"message": f"간단화 오류: {e}"}, status_code=500)
+        return FastJSONResponse({"message": f"간단화 오류: {e}"}, status_code=500)
+
+simplify_streams: Dict[str, TokenBroadcast] = {}  # 진행 중인 스트리밍 간단화 (content key -> 토큰 방송)
+
+async def simplify_streamed(text: str, key: str, broadcast: TokenBroadcast) -> str:
+    """스트리밍 간단화 1회 (single-flight 리더). 토큰은 broadcast로 합류한 SSE 요청 모두에 전달된다."""
+    try:
+        messages = simplify_messages(text)
+        usage = None
+        async with get_dispatcher().aslot(SIMPLIFY_MODEL, estimate_tokens(messages, 600), "simplify") as ticket:
+            stream = await get_async_client().chat.completions.create(
+                model=SIMPLIFY_MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=600,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                usage = chunk.usage or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    broadcast.push(chunk.choices[0].delta.content)
+            ticket.record(usage)
+        record_llm("simplify", SIMPLIFY_MODEL, usage)
+        simplified = "".join(broadcast.parts).strip()
+        store_simplification(text, key, simplified)
+        return simplified
+    finally:
+        broadcast.close()
+        if simplify_streams.get(key) is broadcast:
+            del simplify_streams[key]
+
+@app.post("/simplify/stream")
+async def simplify_stream(text: str = Form(...)):
+    """/simplify의 스트리밍 버전 (SSE).
+    같은 글의 간단화가 진행 중이면 /simplify·/simplify/stream 구분 없이 그 1건에 합류한다
+    (스트리밍 중이면 지금까지의 토큰부터 이어 받고, /simplify가 진행 중이면 결과를 한 번에 받음)."""
+    async def events():
+        try:
+            key = simplify_key(text)
+            simplified = cached_simplification(text, key)
+            if simplified is not None:
+                yield sse("token", simplified)
+                yield sse("done", {"simplified": simplified})
+                return
+            flight_key = ("simplify", key)
+            leader = not flights.is_inflight(flight_key)
+            COALESCED.inc(endpoint="simplify", role="leader" if leader else "follower")
+            if leader:
+                broadcast = simplify_streams[key] = TokenBroadcast()
+                # 요청(SSE 연결)과 분리된 task라 리더가 연결을 끊어도 합류한 요청은 계속 받는다
+                task = flights.start(flight_key, lambda: simplify_streamed(text, key, broadcast))
+            else:
+                task = flights.start(flight_key, lambda: simplify_once(text, key))
+                broadcast = simplify_streams.get(key)  # /simplify가 진행 중이면 None
+            # 거절(LLMOverloaded)되면 아래 error 이벤트로 Retry-After 안내 문구가 전달된다
+            if broadcast is not None:
+                async for token in broadcast.tokens():
+                    yield sse("token", token)
+                simplified = await asyncio.shield(task)
+            else:
+                simplified = await asyncio.wait_for(asyncio.shield(task), COALESCE_TIMEOUT)
+                yield sse("token", simplified)
+            yield sse("done", {"simplified": simplified})
+        except asyncio.TimeoutError:
+            yield sse("error", TIMEOUT_MESSAGE)
+        except Exception as e:
+            yield sse("error", f"간단화 오류: {e}")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
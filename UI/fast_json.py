@@ -0,0 +1,35 @@
+# fast_json.py
+"""numpy 값을 그대로 직렬화하는 빠른 JSON 응답.
+
+FAISS 검색 결과에는 np.float32 점수 등이 섞여 있어 표준 json은 실패하거나 default 변환이 필요하다.
+orjson이 있으면 OPT_SERIALIZE_NUMPY로 바로 직렬화하고, 없으면 표준 json + numpy 변환으로 대신한다.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+
+def _default(obj: Any):
+    """numpy 스칼라/배열 등 orjson/json이 모르는 값"""
+    if hasattr(obj, "tolist"):  # np.ndarray, np.float32, np.int64 ...
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"JSON으로 직렬화할 수 없는 값: {type(obj).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
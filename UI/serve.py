@@ -0,0 +1,45 @@
+# serve.py
+"""멀티 프로세스 서빙 모드: python serve.py --workers 4 (UI 폴더에서)
+
+uvicorn이 워커 프로세스 N개를 띄우고 각 워커가 app.py를 따로 import한다 (spawn이라 fork 이후
+스레드/SQLite 커넥션을 물려받는 문제가 없다).
+- SHARED_ARTIFACTS_DIR : summaryRAG/shared_artifacts.py로 내보낸 읽기 전용 인덱스 디렉터리.
+  FAISS 인덱스/문서/BM25를 mmap으로 열기 때문에 N개 워커가 OS 페이지 캐시의 한 벌을 공유한다.
+  (지정하지 않으면 워커마다 pickle을 각자 로드한다)
+- SESSION_STORE_DB     : 요청이 어느 워커로 가도 같은 세션을 보도록 기본값으로 SQLite 파일을 지정한다.
+- WORK_THREADS / OMP_NUM_THREADS : 워커 수만큼 CPU를 나눠 스레드가 과하게 겹치지 않게 한다 (지정값 우선).
+워커마다 따로 남는 것: bge-m3/cross-encoder 모델, 응답/답변 캐시, /metrics 카운터,
+/recommend/comparison/{job_id} 작업 (다른 워커에서 조회하면 404 → 세션 기반 /recommend/comparison/stream 사용).
+"""
+import os
+import argparse
+
+import uvicorn
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KB Card Dual RAG 멀티 프로세스 서버")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "2")))
+    args = parser.parse_args()
+
+    # 워커 프로세스는 이 환경 변수를 물려받는다
+    cpus = os.cpu_count() or 1
+    os.environ.setdefault("SESSION_STORE_DB", os.path.join(BASE_DIR, "sessions.db"))
+    os.environ.setdefault("WORK_THREADS", str(max(2, 8 // args.workers)))
+    os.environ.setdefault("OMP_NUM_THREADS", str(max(1, cpus // args.workers)))
+    if not os.getenv("SHARED_ARTIFACTS_DIR"):
+        print("⚠️  SHARED_ARTIFACTS_DIR가 없어 워커마다 인덱스를 따로 로드합니다 "
+              "(python ../summaryRAG/shared_artifacts.py로 내보낸 뒤 지정하세요).")
+
+    print(f"🚀 워커 {args.workers}개: http://{args.host}:{args.port} "
+          f"(SHARED_ARTIFACTS_DIR={os.getenv('SHARED_ARTIFACTS_DIR')}, SESSION_STORE_DB={os.environ['SESSION_STORE_DB']})")
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers, app_dir=BASE_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# session_store.py
+"""웹 앱 세션별 상태 저장소.
+
+세션 ID(쿠키)마다 추천 목록(last_recommendations)과 선택 카드(selected_card)를 따로 보관한다.
+- MemorySessionStore : 프로세스 내부 dict, TTL + LRU 제거 (워커 1개)
+- SQLiteSessionStore : 여러 워커/프로세스가 공유하는 SQLite(WAL) 파일 (SESSION_STORE_DB)
+상태는 JSON으로 직렬화할 수 있는 dict이며, 값을 바꾼 뒤에는 save()로 다시 저장한다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def empty_state() -> dict:
+    return {"last_recommendations": [], "selected_card": None}
+
+
+class MemorySessionStore:
+    """스레드 안전 TTL/LRU 세션 저장소"""
+
+    def __init__(self, ttl_seconds: float = 3600, max_sessions: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> dict:
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None or time.time() - item[0] > self.ttl_seconds:
+                self._sessions.pop(session_id, None)
+                return empty_state()
+            self._sessions.move_to_end(session_id)
+            return dict(item[1])
+
+    def save(self, session_id: str, state: dict):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (time.time(), dict(state))
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """여러 프로세스가 공유하는 세션 저장소 (만료 세션은 저장 시 주기적으로 삭제)"""
+
+    PURGE_EVERY = 200  # save() 호출 N번마다 만료 세션 정리
+
+    def __init__(self, path: str, ttl_seconds: float = 3600, max_sessions: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._local = threading.local()
+        self._saves = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> dict:
+        row = self._conn().execute(
+            "SELECT state FROM sessions WHERE id = ? AND updated_at >= ?",
+            (session_id, time.time() - self.ttl_seconds),
+        ).fetchone()
+        return json.loads(row[0]) if row else empty_state()
+
+    def save(self, session_id: str, state: dict):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (id, state, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (session_id, json.dumps(state, ensure_ascii=False, default=float), time.time()),
+            )
+        self._saves += 1
+        if self._saves % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self):
+        """TTL이 지난 세션 삭제 + 최대 개수를 넘으면 오래된 세션부터 삭제"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM sessions WHERE id IN ("
+                " SELECT id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(path: Optional[str] = None, ttl_seconds: float = 3600, max_sessions: int = 10000):
+    """path가 있으면 SQLite 공유 저장소, 없으면 프로세스 메모리 저장소"""
+    if path:
+        return SQLiteSessionStore(path, ttl_seconds=ttl_seconds, max_sessions=max_sessions)
+    return MemorySessionStore(ttl_seconds=ttl_seconds, max_sessions=max_sessions)
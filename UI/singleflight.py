@@ -0,0 +1,81 @@
+# singleflight.py
+"""동일 요청 합치기 (single-flight, asyncio).
+
+같은 키의 계산이 이미 진행 중이면 새로 시작하지 않고 그 결과를 함께 기다린다.
+- 결과/예외는 기다리던 모든 요청에 그대로 전달된다.
+- timeout은 요청(대기자)별로 적용된다. 한 요청이 시간 초과로 빠져도 공유 계산은 취소하지 않으므로
+  나머지 대기자와 이후 같은 키의 요청은 계속 그 결과를 받을 수 있다.
+- 계산이 끝나면 키를 지우므로 결과를 캐시하지는 않는다 (캐시는 ResponseCache/SemanticAnswerCache 담당).
+- 스트리밍 계산은 TokenBroadcast로 토큰을 합류한 요청들에 나눠 주고, 최종 결과는 task 결과로 받는다.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional
+
+
+class SingleFlight:
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "followers": 0, "errors": 0, "timeouts": 0}
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """key의 진행 중 계산 task를 반환하거나, 없으면 fn()으로 시작해 바로 등록 (await가 없어 등록 전에 끼어드는 요청이 없음)"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats["followers"] += 1
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """key의 진행 중 계산에 합류하거나, 없으면 fn()으로 새로 시작해 결과를 반환"""
+        task = self.start(key, fn)
+        try:
+            # shield: 대기자 쪽 취소/시간 초과가 공유 계산을 취소하지 않도록
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+
+    def is_inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+class TokenBroadcast:
+    """진행 중인 스트리밍 계산의 토큰을 여러 요청에 나눠 준다 (늦게 합류한 요청도 처음 토큰부터 받음)"""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def push(self, token: str):
+        self.parts.append(token)
+        self._changed.set()
+
+    def close(self):
+        self.closed = True
+        self._changed.set()
+
+    async def tokens(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            while i < len(self.parts):
+                yield self.parts[i]
+                i += 1
+            if self.closed:
+                return
+            self._changed.clear()  # 같은 이벤트 루프 안이라 clear와 wait 사이에 push가 끼어들 수 없음
+            await self._changed.wait()
@@ -0,0 +1,68 @@
+# bench_easy_mode.py
+"""쉬운 설명(explain_easy) 모드 지연시간 비교
+
+- detailed           : 상세 답변 (기준선, LLM 1회)
+- easy / rewrite     : 상세 답변 생성 후 재작성 (LLM 2회, 기존 방식)
+- easy / single_pass : 생성 프롬프트에 쉬운 설명 스타일 적용 (LLM 1회)
+- easy / cached      : 같은 카드·질문의 상세 답변이 캐시에 있을 때 재작성만 수행
+
+사용법 (OPENAI_API_KEY와 original_embeddings 필요):
+    python benchmarks/bench_easy_mode.py --card "K-패스카드" --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "originalRAG"))
+
+from original_rag import FAISSRAGRetriever  # noqa: E402
+
+QUESTIONS = [
+    "이 카드의 연회비는 얼마인가요?",
+    "해외 이용 시 수수료는 어떻게 되나요?",
+    "전월 실적 조건과 할인 한도를 알려주세요.",
+]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--card", default="K-패스카드")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rag = FAISSRAGRetriever()
+    # 카드 번들/모델 워밍업 (측정에서 제외)
+    rag.query(card_name=args.card, card_text="", question=QUESTIONS[0])
+
+    def reset_answers():
+        rag.answer_cache.clear()
+
+    results: dict[str, list[float]] = {"detailed": [], "easy/rewrite": [], "easy/single_pass": [], "easy/cached": []}
+    for _ in range(args.repeat):
+        for q in QUESTIONS:
+            reset_answers()
+            results["easy/rewrite"].append(timed(lambda: rag.query(args.card, "", q, explain_easy=True, easy_mode="rewrite")))
+            reset_answers()
+            results["easy/single_pass"].append(timed(lambda: rag.query(args.card, "", q, explain_easy=True, easy_mode="single_pass")))
+            reset_answers()
+            results["detailed"].append(timed(lambda: rag.query(args.card, "", q)))
+            results["easy/cached"].append(timed(lambda: rag.query(args.card, "", q, explain_easy=True)))
+
+    print("\n" + "=" * 60)
+    print(f"{'mode':<20}{'n':>4}{'mean(s)':>10}{'p50(s)':>10}{'max(s)':>10}")
+    print("-" * 60)
+    for name, xs in results.items():
+        print(f"{name:<20}{len(xs):>4}{statistics.mean(xs):>10.2f}{statistics.median(xs):>10.2f}{max(xs):>10.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
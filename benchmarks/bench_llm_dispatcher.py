@@ -0,0 +1,99 @@
+# bench_llm_dispatcher.py
+"""LLM 입장 제어 시뮬레이션: 제한 없는 동시 호출 vs LLMDispatcher
+
+OpenAI 대신 동시 호출 수가 capacity를 넘으면 모든 호출이 함께 느려지는 가짜 upstream을 쓴다
+(지연 = base × max(1, 진행 중 호출 수 / capacity)). 도착률 rate(req/s)로 duration초 동안 요청을 보내고
+성공한 요청의 p50/p95/p99 지연과 거절(429/503) 수를 비교한다. OpenAI 호출 없음.
+
+사용법:
+    python benchmarks/bench_llm_dispatcher.py --rate 40 --duration 5 --capacity 8 --base 0.5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "summaryRAG"))
+
+from llm_dispatcher import LLMDispatcher, LLMOverloaded  # noqa: E402
+
+
+class FakeUpstream:
+    def __init__(self, capacity: int, base: float):
+        self.capacity = capacity
+        self.base = base
+        self.inflight = 0
+
+    async def call(self):
+        self.inflight += 1
+        try:
+            # 과부하일수록 느려진다 (진행 중 호출 수를 주기적으로 다시 반영)
+            remaining = 1.0
+            while remaining > 0:
+                step = 0.05
+                remaining -= step / max(1.0, self.inflight / self.capacity)
+                await asyncio.sleep(step * self.base)
+        finally:
+            self.inflight -= 1
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def run(args: argparse.Namespace, dispatcher) -> dict:
+    upstream = FakeUpstream(args.capacity, args.base)
+    latencies, rejected = [], {}
+
+    async def request():
+        start = time.perf_counter()
+        try:
+            if dispatcher is None:
+                await upstream.call()
+            else:
+                async with dispatcher.aslot("gpt-4o", 1000, "simplify"):
+                    await upstream.call()
+            latencies.append(time.perf_counter() - start)
+        except LLMOverloaded as e:
+            rejected[e.status] = rejected.get(e.status, 0) + 1
+
+    tasks = []
+    for _ in range(int(args.rate * args.duration)):
+        tasks.append(asyncio.create_task(request()))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    return {
+        "ok": len(latencies),
+        "rejected": rejected,
+        **{f"p{p}_s": round(percentile(latencies, p), 3) for p in (50, 95, 99)},
+        "mean_s": round(statistics.mean(latencies), 3) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=40)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--base", type=float, default=0.5, help="과부하가 없을 때 호출 1회 지연(초)")
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=2.0)
+    args = parser.parse_args()
+
+    dispatcher = LLMDispatcher(concurrency=args.capacity, max_queue=args.max_queue, max_wait=args.max_wait)
+    report = {
+        "unbounded": asyncio.run(run(args, None)),
+        "dispatcher": asyncio.run(run(args, dispatcher)),
+    }
+    print(json.dumps({"rate": args.rate, "capacity": args.capacity, "base_s": args.base, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
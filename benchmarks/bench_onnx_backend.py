@@ -0,0 +1,105 @@
+# bench_onnx_backend.py
+"""PyTorch(float32) vs ONNX Runtime(int8) 추론 백엔드 비교
+
+- 지연시간  : 질문 1개 임베딩(embed_query), 후보 60개 재랭킹(predict)
+- 처리량    : 카드 문서 청크 일괄 임베딩(embed_documents) docs/s
+- 검색 일치 : 같은 FAISS/BM25 인덱스에서
+    * 질문 벡터 코사인 유사도 (torch vs onnx)
+    * dense 상위 10개 겹침 비율
+    * 최종 재랭킹 상위 top_k 겹침 비율
+
+사용법 (original_embeddings와 optimum[onnxruntime] 필요, OpenAI 호출 없음):
+    python benchmarks/bench_onnx_backend.py --card "K-패스카드" --repeat 5 --threads 4
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "originalRAG"))
+
+from original_rag import FAISSRAGRetriever  # noqa: E402
+
+QUESTIONS = [
+    "이 카드의 연회비는 얼마인가요?",
+    "해외 이용 시 수수료는 어떻게 되나요?",
+    "전월 실적 조건과 할인 한도를 알려주세요.",
+    "대중교통 할인은 어떻게 받나요?",
+    "통신요금 자동이체 혜택이 있나요?",
+]
+
+
+def timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def overlap(a: list[int], b: list[int]) -> float:
+    return len(set(a) & set(b)) / max(1, len(set(a) | set(b)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--card", default="K-패스카드")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    engines = {
+        "torch": FAISSRAGRetriever(inference_backend="torch"),
+        "onnx": FAISSRAGRetriever(inference_backend="onnx", onnx_threads=args.threads),
+    }
+    if engines["onnx"].inference_backend != "onnx":
+        raise SystemExit("❌ ONNX 백엔드를 로드하지 못했습니다 (optimum[onnxruntime] 설치 확인)")
+
+    # 두 백엔드 모두 torch로 만든 같은 인덱스를 사용해 검색 결과를 비교
+    bundle = engines["torch"]._prepare_card_data(args.card)
+    texts = [bundle["documents"][i].page_content for i in bundle["doc_ids"]]
+    candidates = [int(i) for i in bundle["doc_ids"][:60]]
+
+    latency = {name: {"embed_query": [], "rerank": []} for name in engines}
+    throughput = {}
+    for name, rag in engines.items():
+        rag.embedding_model.embed_query(QUESTIONS[0])  # 워밍업
+        for _ in range(args.repeat):
+            for q in QUESTIONS:
+                latency[name]["embed_query"].append(timed(lambda: rag.embedding_model.embed_query(q))[0])
+                latency[name]["rerank"].append(timed(lambda: rag._rerank(bundle, q, candidates, args.top_k))[0])
+        elapsed, _ = timed(lambda: rag.embedding_model.embed_documents(texts))
+        throughput[name] = len(texts) / elapsed
+
+    cosines, dense_overlap, final_overlap = [], [], []
+    for q in QUESTIONS:
+        qv = {name: rag._embed_query(q) for name, rag in engines.items()}
+        cosines.append(float(np.dot(qv["torch"][0], qv["onnx"][0])
+                             / (np.linalg.norm(qv["torch"][0]) * np.linalg.norm(qv["onnx"][0]))))
+        dense = {name: engines["torch"]._dense_search(bundle, v, k=10) for name, v in qv.items()}
+        dense_overlap.append(overlap(dense["torch"], dense["onnx"]))
+        final = {name: [i for i, _ in rag._retrieve(bundle, q, args.top_k, query_vector=qv[name])]
+                 for name, rag in engines.items()}
+        final_overlap.append(overlap(final["torch"], final["onnx"]))
+
+    print("\n" + "=" * 60)
+    print(f"{'backend':<10}{'metric':<16}{'mean(ms)':>12}{'p50(ms)':>12}{'max(ms)':>10}")
+    print("-" * 60)
+    for name, metrics in latency.items():
+        for metric, xs in metrics.items():
+            print(f"{name:<10}{metric:<16}{statistics.mean(xs) * 1000:>12.1f}"
+                  f"{statistics.median(xs) * 1000:>12.1f}{max(xs) * 1000:>10.1f}")
+    print("-" * 60)
+    for name, dps in throughput.items():
+        print(f"{name:<10}embed_documents  {dps:>10.1f} docs/s  (n={len(texts)})")
+    print("-" * 60)
+    print(f"질문 벡터 코사인 유사도 평균 : {statistics.mean(cosines):.4f} (min {min(cosines):.4f})")
+    print(f"dense top-10 겹침 비율       : {statistics.mean(dense_overlap):.3f}")
+    print(f"재랭킹 top-{args.top_k} 겹침 비율      : {statistics.mean(final_overlap):.3f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench_recommend_payload.py
+"""/recommend 응답 크기와 직렬화 시간: 전체 필드 vs fields 선택, 표준 json vs fast_json(orjson), gzip 전후
+
+저장소의 Summary 임베딩(pickle)에서 실제 카드 top_k개를 골라 /recommend와 같은 모양의 응답을 만든다.
+(질문 임베딩 대신 임의 벡터로 검색하므로 OpenAI 호출 없음, 비교표는 CardGenerator.build_comparison_table)
+
+사용법:
+    python benchmarks/bench_recommend_payload.py --top-k 5 --repeat 2000
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import pickle
+import argparse
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "UI"))
+sys.path.insert(0, os.path.join(ROOT, "summaryRAG"))
+
+from fast_json import dumps  # noqa: E402
+from card_generator import CardGenerator  # noqa: E402
+
+
+def sample_items(top_k: int) -> list[dict]:
+    """find_similar_cards와 같은 필드의 검색 결과 (np.float32 점수 포함)"""
+    path = os.path.join(ROOT, "embeddings", "sep_embeddings", "신용카드_cards_embedding_data.pkl")
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    index = data["faiss_index"]
+    query = np.random.default_rng(0).random((1, index.d), dtype=np.float32)
+    query /= np.linalg.norm(query)
+    scores, ids = index.search(query, top_k)
+    items = []
+    for rank, (score, idx) in enumerate(zip(scores[0], ids[0]), 1):
+        meta = data["metadata"][idx]
+        items.append({
+            "id": f"신용카드:{meta['card_name']}", "rank": rank, "card_name": meta["card_name"],
+            "card_type": meta["card_type"], "keyword": meta["keyword"],
+            "similarity_score": round(score, 4), "distance": round(1 - score, 4),
+            "card_text": data["texts"][idx], "attributes": meta.get("attributes"), "search_type": "신용카드",
+        })
+    return items
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = sample_items(args.top_k)
+    # 비교표는 LLM 클라이언트 없이 카드 속성만 사용하므로 초기화(OpenAI/선택 기록 DB)를 건너뛴다
+    generator = CardGenerator.__new__(CardGenerator)
+    generator._attribute_cache = {}
+    table = generator.build_comparison_table(items, top_k=args.top_k)
+    full = {"items": items, "summary_text": "", "comparison": table["markdown"], "comparison_table": table,
+            "comparison_job": None}
+    slim = {"items": [{"id": x["id"], "card_name": x["card_name"], "keyword": x["keyword"], "score": x["similarity_score"]}
+                      for x in items], "summary_text": "", "comparison_job": None}
+
+    def std(body):  # 기존 방식: 표준 json (np.float32는 default=float로 변환)
+        return json.dumps(body, ensure_ascii=False, default=float).encode("utf-8")
+
+    rows = {}
+    for name, body in (("full", full), ("fields=card_name,keyword,score&comparison_format=none", slim)):
+        raw = dumps(body)
+        rows[name] = {
+            "bytes": len(raw),
+            "gzip_bytes": len(gzip.compress(raw)),
+            "json_us": round(timed(lambda: std(body), args.repeat), 1),
+            "fast_json_us": round(timed(lambda: dumps(body), args.repeat), 1),
+        }
+    print(json.dumps({"top_k": args.top_k, **rows}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
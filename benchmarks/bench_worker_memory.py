@@ -0,0 +1,124 @@
+# bench_worker_memory.py
+"""워커 프로세스별 인덱스 메모리: pickle 로드(기존) vs 공유 아티팩트 mmap (SHARED_ARTIFACTS_DIR)
+
+N개 프로세스를 동시에 띄워 각자 인덱스를 로드하고 전부 한 번씩 읽은 뒤(FAISS 검색 + 모든 문서/메타데이터 접근)
+/proc/<pid>/smaps_rollup으로 로드 전후 증가량을 잰다. Linux 전용.
+- RSS     : 프로세스가 매핑한 상주 페이지 (공유 페이지도 프로세스마다 전부 셈)
+- PSS     : 공유 페이지를 공유한 프로세스 수로 나눈 값 → 워커 1개가 실제로 차지하는 몫
+- Private : 그 프로세스만 가진 페이지 (pickle은 여기에 쌓이고 mmap은 거의 0)
+모델(bge-m3/cross-encoder)은 재지 않는다 (두 방식 모두 워커마다 한 벌).
+
+사용법 (먼저 python summaryRAG/shared_artifacts.py --out shared_artifacts 로 내보내기):
+    python benchmarks/bench_worker_memory.py --workers 4 --shared-dir shared_artifacts
+"""
+import os
+import sys
+import json
+import pickle
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "summaryRAG"))
+
+from shared_artifacts import SUMMARY_FILES, CATEGORIES, SharedDocumentStore, has_corpus, read_index  # noqa: E402
+
+
+def memory_kb() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {"rss": values["Rss"], "pss": values["Pss"],
+            "private": values["Private_Clean"] + values["Private_Dirty"]}
+
+
+def load_pickle(summary_dir: str, original_dir: str) -> list:
+    """기존 방식: pickle → (FAISS 인덱스, 본문 목록, 메타데이터 목록)"""
+    import faiss
+
+    corpora = []
+    for filename in SUMMARY_FILES.values():
+        path = os.path.join(summary_dir, filename)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            corpora.append((data["faiss_index"], data["texts"], data["metadata"]))
+    for category in CATEGORIES:
+        base = os.path.join(original_dir, f"{category}_card")
+        if os.path.exists(f"{base}_embedding_data.pkl"):
+            with open(f"{base}_embedding_data.pkl", "rb") as f:
+                documents = pickle.load(f)["documents"]  # langchain 필요
+            corpora.append((faiss.read_index(f"{base}_embeddings.faiss"),
+                            [d.page_content for d in documents], [d.metadata for d in documents]))
+    return corpora
+
+
+def load_shared(shared_dir: str) -> list:
+    corpora = []
+    for name in [f"summary_{c}" for c in CATEGORIES] + [f"original_{c}" for c in CATEGORIES]:
+        if has_corpus(shared_dir, name):
+            store = SharedDocumentStore(shared_dir, name)
+            corpora.append((read_index(os.path.join(shared_dir, f"{name}.faiss")), store.texts, store.metadatas))
+    return corpora
+
+
+def touch(corpora: list) -> int:
+    """모든 페이지가 한 번씩 읽히도록 전체 검색 + 모든 문서 접근"""
+    total = 0
+    for index, texts, metadatas in corpora:
+        query = np.random.default_rng(0).random((4, index.d), dtype=np.float32)
+        index.search(query, 10)
+        total += sum(len(texts[i]) + len(metadatas[i]) for i in range(len(texts)))
+    return total
+
+
+def worker(mode: str, args: argparse.Namespace, barrier, results):
+    import faiss  # noqa: F401  (라이브러리 자체 메모리는 기준선에 포함)
+
+    before = memory_kb()
+    corpora = load_shared(args.shared_dir) if mode == "shared" else load_pickle(args.summary_dir, args.original_dir)
+    touch(corpora)
+    barrier.wait()  # 모든 워커가 로드를 마친 상태에서 측정해야 PSS가 공유를 반영한다
+    after = memory_kb()
+    results.put({k: after[k] - before[k] for k in after} | {"corpora": len(corpora)})
+    barrier.wait()
+
+
+def run(mode: str, args: argparse.Namespace) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, args, barrier, results)) for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shared-dir", default=os.getenv("SHARED_ARTIFACTS_DIR") or os.path.join(ROOT, "shared_artifacts"))
+    parser.add_argument("--summary-dir", default=os.path.join(ROOT, "embeddings", "sep_embeddings"))
+    parser.add_argument("--original-dir", default=os.path.join(ROOT, "originalRAG", "original_embeddings"))
+    args = parser.parse_args()
+
+    report = {}
+    for mode in ("pickle", "shared"):
+        rows = run(mode, args)
+        report[mode] = {
+            "corpora": rows[0]["corpora"],
+            **{f"{k}_mb_per_worker": round(sum(r[k] for r in rows) / len(rows) / 1024, 1) for k in ("rss", "pss", "private")},
+            "pss_mb_total": round(sum(r["pss"] for r in rows) / 1024, 1),
+        }
+    print(json.dumps({"workers": args.workers, **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
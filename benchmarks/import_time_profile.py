@@ -0,0 +1,85 @@
+# import_time_profile.py
+"""UI/app.py import 시간 회귀 벤치마크 (python -X importtime)
+
+app을 import하는 데 걸리는 누적 시간을 모듈별로 집계해 상위 N개를 출력하고,
+- 전체 import 시간이 --budget-ms를 넘거나
+- 부팅 시점에 무거운 모듈(torch, sentence_transformers, langchain 등)이 import되면
+종료 코드 1을 반환한다 (CI 회귀 체크용).
+
+사용법:
+    python benchmarks/import_time_profile.py --budget-ms 1500 --top 15
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SEARCH_DIRS = ("UI", "originalRAG", "summaryRAG")
+
+# 부팅 시 import되면 안 되는 모듈 (지연 로딩 대상)
+FORBIDDEN = ("torch", "sentence_transformers", "transformers", "langchain",
+             "langchain_community", "langchain_openai", "langgraph")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(target: str) -> list[tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) 목록"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.abspath(os.path.join(ROOT, d)) for d in SEARCH_DIRS] + [env.get("PYTHONPATH", "")]
+    )
+    env["WARMUP_ON_STARTUP"] = "0"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=os.path.join(ROOT, "UI"), env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit(f"❌ '{target}' import 실패")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default="app")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = profile(args.target)
+    # 최상위(depth 0) 모듈의 누적 시간 합 = 전체 import 시간
+    total_ms = sum(cum for _, _, cum, depth in rows if depth == 0) / 1000
+    loaded = {name for name, *_ in rows}
+    heavy = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN)
+
+    print("=" * 60)
+    print(f"{'module':<40}{'self(ms)':>10}{'cum(ms)':>10}")
+    print("-" * 60)
+    for name, self_us, cum_us, _ in sorted(rows, key=lambda r: -r[2])[: args.top]:
+        print(f"{name:<40}{self_us / 1000:>10.1f}{cum_us / 1000:>10.1f}")
+    print("=" * 60)
+    print(f"⏱️  import {args.target}: {total_ms:.0f}ms (budget {args.budget_ms:.0f}ms)")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print("❌ import 시간이 예산을 초과했습니다.")
+        failed = True
+    if heavy:
+        print(f"❌ 부팅 시점에 무거운 모듈이 import됨: {', '.join(heavy[:10])}")
+        failed = True
+    if not failed:
+        print("✅ 통과")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import json
 import os
+import sys
 import numpy as np
 from openai import OpenAI
 import pickle
 import faiss
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "summaryRAG"))
+from card_attributes import extract_card_attributes  # noqa: E402
+
 def json_to_text(card_data):
     """카드 JSON을 텍스트로 변환"""
     text_parts = []
@@ -86,7 +90,9 @@ def process_cards_by_type(cards_data, card_type, client, output_dir):
                 'card_name': card.get('card_name', 'N/A'),
                 'card_type': card.get('card_type', 'N/A'),
                 'keyword': card.get('keyword', 'N/A'),
-                'index': i-1
+                'index': i-1,
+                # 비교표/정렬용 속성 (연회비·혜택·할인율·월 한도·전월 실적) - 요청 시에는 조회만 함
+                'attributes': extract_card_attributes(card_text)
             }
             card_metadata.append(metadata)
             
@@ -145,6 +151,23 @@ def process_cards_by_type(cards_data, card_type, client, output_dir):
     print(f"🔢 FAISS 인덱스 크기: {index.ntotal}개 벡터")
     print(f"📏 벡터 차원: {index.d}")
 
+def add_attributes_to_sidecar(output_dir):
+    """이미 만든 임베딩 결과에 attributes만 추가 (재임베딩 없이 메타데이터 json/pkl 갱신)"""
+    for pkl_filename in sorted(f for f in os.listdir(output_dir) if f.endswith("_cards_embedding_data.pkl")):
+        card_type = pkl_filename[: -len("_cards_embedding_data.pkl")]
+        pkl_path = os.path.join(output_dir, pkl_filename)
+        with open(pkl_path, 'rb') as f:
+            all_data = pickle.load(f)
+        
+        for metadata, text in zip(all_data['metadata'], all_data['texts']):
+            metadata['attributes'] = extract_card_attributes(text)
+        
+        with open(os.path.join(output_dir, f"{card_type}_card_metadata.json"), 'w', encoding='utf-8') as f:
+            json.dump(all_data['metadata'], f, ensure_ascii=False, indent=2)
+        with open(pkl_path, 'wb') as f:
+            pickle.dump(all_data, f)
+        print(f"✅ {card_type}: {len(all_data['metadata'])}개 카드 속성 추가 ({pkl_filename})")
+
 def process_cards_to_embeddings_separated(input_file, output_dir):
     """카드 JSON을 카드 타입별로 나누어 텍스트로 변환하고 벡터화"""
     
@@ -187,6 +210,12 @@ def main():
     input_file = "cards_summary_with_intro.json"
     output_dir = "embeddings"
     
+    # python embed_cards_separated.py --attributes-only [output_dir]
+    if "--attributes-only" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--attributes-only"]
+        add_attributes_to_sidecar(args[0] if args else output_dir)
+        return
+    
     if not os.path.exists(input_file):
         print(f"❌ 입력 파일을 찾을 수 없습니다: {input_file}")
         print("cards_summary_with_intro.json 파일이 현재 디렉토리에 있는지 확인해주세요.")
@@ -0,0 +1,176 @@
+# answer_cache.py
+"""Original RAG 답변 캐시.
+
+카드명 + 모드(detailed/simple) 단위로 답변을 저장하고,
+1) 정규화한 질문 문자열이 같거나 2) 질문 임베딩 코사인 유사도가 임계값 이상이면 재사용한다.
+TTL/LRU로 제거하며, 카드 원본 JSON/인덱스 버전이 바뀌면 해당 항목은 무효화된다.
+답변 본문의 해시로 항목을 다시 찾을 수 있어, 같은 답변의 변형(예: /simplify 간단화)을 원본 답변 옆에 저장한다
+(원본이 제거/무효화되면 변형도 함께 사라짐). 답변 해시로 찾을 때는 질문 키가 없으므로
+version_of(카드명)로 현재 버전을 구해 같은 방식으로 검사한다.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+# 질문 정규화는 summaryRAG 응답 캐시/API 합치기 키와 같은 규칙을 쓴다
+from response_cache import normalize_question
+
+
+def content_hash(text: str) -> str:
+    """답변 본문 해시 (공백 차이는 무시)"""
+    return hashlib.sha1(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+
+class SemanticAnswerCache:
+    """(카드명, 모드) 범위의 정확 일치 + 의미 유사도 답변 캐시 (스레드 안전)"""
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: float = 3600.0, max_entries: int = 1024,
+                 version_of: Optional[Callable[[str], Optional[str]]] = None):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_of = version_of  # 카드명 -> 현재 버전 (답변 해시 조회용, None이면 TTL만 검사)
+        self._entries: "OrderedDict[tuple[str, str, str], dict]" = OrderedDict()
+        self._scopes: dict[tuple[str, str], set] = {}
+        self._by_answer: dict[str, tuple[str, str, str]] = {}  # 답변 본문 해시 -> 항목 키
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "variant_hits": 0}
+
+    # ----------------- 내부 -----------------
+    def _valid(self, entry: dict, version: Optional[str]) -> bool:
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            return False
+        return version is None or entry["version"] == version
+
+    def _drop(self, key: tuple[str, str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._by_answer.get(entry["answer_hash"]) == key:
+            del self._by_answer[entry["answer_hash"]]
+        scope = self._scopes.get(key[:2])
+        if scope is not None:
+            scope.discard(key)
+            if not scope:
+                del self._scopes[key[:2]]
+
+    def _hit(self, key: tuple[str, str, str], entry: dict, kind: str, similarity: float = 1.0) -> dict:
+        self._entries.move_to_end(key)
+        self.stats[f"{kind}_hits"] += 1
+        return {
+            **entry["value"],
+            "cache": kind,
+            "cache_key": key,
+            "similarity": round(similarity, 4),
+            "question_vector": entry["vector"],
+        }
+
+    # ----------------- 조회/저장 -----------------
+    def get(self, card_name: str, mode: str, question: str, query_vector=None,
+            version: Optional[str] = None) -> Optional[dict]:
+        """정확 일치 → (query_vector가 있으면) 유사도 일치 순으로 조회. 없으면 None."""
+        key = (card_name, mode, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._valid(entry, version):
+                    return self._hit(key, entry, "exact")
+                self._drop(key)
+
+            if query_vector is None:
+                return None
+
+            qv = _unit(query_vector)
+            best_key, best_sim = None, -1.0
+            for other in list(self._scopes.get(key[:2], ())):
+                cand = self._entries[other]
+                if not self._valid(cand, version):
+                    self._drop(other)
+                    continue
+                if cand["vector"] is None:
+                    continue
+                sim = float(np.dot(qv, cand["vector"]))
+                if sim > best_sim:
+                    best_key, best_sim = other, sim
+
+            if best_key is not None and best_sim >= self.similarity_threshold:
+                return self._hit(best_key, self._entries[best_key], "semantic", best_sim)
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, card_name: str, mode: str, question: str, value: dict, query_vector=None,
+            version: Optional[str] = None) -> tuple[str, str, str]:
+        key = (card_name, mode, normalize_question(question))
+        with self._lock:
+            self._drop(key)
+            answer_hash = content_hash(value.get("answer", "")) if isinstance(value.get("answer"), str) else None
+            self._entries[key] = {
+                "value": value,
+                "vector": _unit(query_vector) if query_vector is not None else None,
+                "version": version,
+                "created_at": time.time(),
+                "answer_hash": answer_hash,
+                "variants": {},  # 변형 이름 -> 텍스트
+            }
+            self._scopes.setdefault(key[:2], set()).add(key)
+            if answer_hash:
+                self._by_answer[answer_hash] = key
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats["evictions"] += 1
+        return key
+
+    # ----------------- 답변 변형 -----------------
+    def _entry_by_answer(self, answer: str, version: Optional[str] = None) -> Optional[dict]:
+        key = self._by_answer.get(content_hash(answer))
+        if key is None:
+            return None
+        entry = self._entries[key]
+        if version is None and self.version_of is not None:
+            version = self.version_of(key[0])
+        if not self._valid(entry, version):
+            self._drop(key)
+            return None
+        return entry
+
+    def get_variant(self, answer: str, variant: str, version: Optional[str] = None) -> Optional[str]:
+        """캐시된 답변 본문(answer)의 변형. 원본 답변이 없거나(버전이 바뀐 경우 포함) 변형이 없으면 None."""
+        with self._lock:
+            entry = self._entry_by_answer(answer, version)
+            text = entry["variants"].get(variant) if entry is not None else None
+            if text is not None:
+                self.stats["variant_hits"] += 1
+            return text
+
+    def put_variant(self, answer: str, variant: str, text: str, version: Optional[str] = None) -> bool:
+        """원본 답변이 캐시에 있으면 그 옆에 변형 저장 (저장했으면 True)"""
+        with self._lock:
+            entry = self._entry_by_answer(answer, version)
+            if entry is None:
+                return False
+            entry["variants"][variant] = text
+            return True
+
+    def invalidate(self, card_name: Optional[str] = None, mode: Optional[str] = None) -> int:
+        """카드(및 모드) 단위 무효화. card_name이 없으면 전체 삭제. 삭제한 항목 수 반환."""
+        with self._lock:
+            keys = [k for k in self._entries
+                    if (card_name is None or k[0] == card_name) and (mode is None or k[1] == mode)]
+            for k in keys:
+                self._drop(k)
+            return len(keys)
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,109 @@
+# context_packer.py
+"""Original RAG 프롬프트용 컨텍스트 패커.
+
+재랭킹 순서대로 청크를 채우되
+- 청크마다 반복되는 [카드명]/제목/필드 헤더는 제목(heading) 단위로 한 번만 쓰고
+- benefit/benefits, condition/conditions처럼 겹치는 필드의 중복 문장은 한 번만 넣으며
+- 설정한 토큰 예산을 넘지 않도록 문장 단위로 채운다.
+"""
+import re
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+_SENTENCE_SPLIT = re.compile(r"\n+|(?<=[.!?])\s+")
+_DEDUP_STRIP = re.compile(r"[\s\-•→·*]+")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """gpt-4o 토크나이저(tiktoken) 기준 토큰 수. tiktoken을 쓸 수 없으면 대략치(2글자≈1토큰)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.encoding_for_model("gpt-4o")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 2) if text else 0
+
+
+def chunk_body(page_content: str) -> str:
+    """'[카드명]\\n제목 - 소제목\\n<필드>\\n본문' 형식에서 본문만 추출"""
+    parts = page_content.split("\n", 3)
+    if len(parts) == 4 and parts[0].startswith("[") and parts[2].startswith("<"):
+        return parts[3]
+    return page_content
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+
+def pack_context(documents: list, doc_ids: list[int], budget_tokens: int = 3000,
+                 count: Optional[Callable[[str], int]] = None) -> dict:
+    """재랭킹 순서(doc_ids)대로 토큰 예산 안에서 컨텍스트를 구성.
+
+    반환: {"text", "tokens_used", "budget", "doc_ids"(포함된 문서), "duplicate_sentences", "truncated"}
+    """
+    count = count or count_tokens
+    groups: "OrderedDict[str, OrderedDict[str, list[str]]]" = OrderedDict()
+    seen: set[str] = set()
+    used_ids: list[int] = []
+    duplicates = 0
+    used = 0
+    truncated = False
+
+    for doc_id in doc_ids:
+        meta = documents[doc_id].metadata
+        title = " - ".join(x for x in (meta.get("heading", ""), meta.get("subheading", "")) if x) or "기타"
+        field = meta.get("field", "etc")
+
+        added = False
+        for sentence in split_sentences(chunk_body(documents[doc_id].page_content)):
+            key = _DEDUP_STRIP.sub("", sentence)
+            if not key or key in seen:
+                duplicates += 1
+                continue
+
+            # 새 제목/필드가 열리면 헤더 비용도 포함
+            cost = count(sentence) + 1
+            if title not in groups:
+                cost += count(f"## {title}") + 2
+            if field not in groups.get(title, {}):
+                cost += count(f"<{field}>") + 1
+            if used + cost > budget_tokens:
+                truncated = True
+                break
+
+            seen.add(key)
+            groups.setdefault(title, OrderedDict()).setdefault(field, []).append(sentence)
+            used += cost
+            added = True
+
+        if added:
+            used_ids.append(doc_id)
+        if truncated:
+            break
+
+    blocks = []
+    for title, fields in groups.items():
+        lines = [f"## {title}"]
+        for field, sentences in fields.items():
+            lines.append(f"<{field}>")
+            lines.extend(sentences)
+        blocks.append("\n".join(lines))
+    text = "\n\n".join(blocks)
+
+    return {
+        "text": text,
+        "tokens_used": count(text) if text else 0,
+        "budget": budget_tokens,
+        "doc_ids": used_ids,
+        "duplicate_sentences": duplicates,
+        "truncated": truncated,
+    }
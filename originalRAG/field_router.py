@@ -0,0 +1,68 @@
+# field_router.py
+"""Original RAG 질의 필드 라우터.
+
+load_documents_field_level이 붙이는 field 메타데이터(fee, benefit, overseas_usage, agreement, ...)
+중 질문과 관련된 필드를 키워드 규칙표로 예측한다.
+확신도가 낮으면 fields=None을 돌려주며, 이때 호출 측은 카드 전체 필드를 검색한다.
+"""
+import re
+from typing import Optional, TypedDict
+
+
+# 라우트 → 검색할 문서 field 목록 (benefit/benefits, condition/conditions는 같은 의미의 두 표기)
+ROUTE_FIELDS: dict[str, tuple[str, ...]] = {
+    "fee": ("fee",),
+    "benefit": ("benefit", "benefits", "condition", "conditions"),
+    "condition": ("condition", "conditions", "benefit", "benefits"),
+    "overseas": ("overseas_usage", "fee"),
+    "agreement": ("agreement", "etc"),
+}
+
+# (라우트, 패턴, 가중치) — 질문에 패턴이 등장하면 해당 라우트 점수에 가중치를 더한다
+_RULES: list[tuple[str, re.Pattern, float]] = [
+    (route, re.compile(pattern), weight)
+    for route, pattern, weight in [
+        ("fee", r"연회비|연 회비|회비", 3.0),
+        ("fee", r"수수료|이자|금리|할부|리볼빙|현금서비스|카드론", 2.0),
+        ("fee", r"얼마|비용|요금", 0.5),
+        ("overseas", r"해외|외화|국외|환전|환율|달러|visa|master|비자|마스터|직구|여행", 3.0),
+        ("benefit", r"혜택|할인|적립|캐시백|포인트|마일리지|라운지|쿠폰|무료", 2.0),
+        ("benefit", r"교통|통신|주유|편의점|커피|카페|쇼핑|배달|영화|ott|구독|마트", 1.0),
+        ("condition", r"실적|전월|조건|한도|제외|대상\s*가맹점|이용금액", 2.5),
+        ("agreement", r"약관|해지|탈회|연체|분실|도난|개인정보|동의|철회|민원|재발급|유효기간", 3.0),
+    ]
+]
+
+
+class FieldRoute(TypedDict):
+    routes: list[str]                 # 선택된 라우트 (점수 내림차순)
+    fields: Optional[list[str]]       # 검색을 제한할 field 목록 (None이면 전체 검색)
+    confidence: float                 # 0~1
+    scores: dict[str, float]
+
+
+def route_question(question: str, min_confidence: float = 0.6, min_score: float = 2.0) -> FieldRoute:
+    """질문 → 관련 field 예측.
+
+    confidence = (선택 라우트 점수 합 / 전체 점수 합) × min(1, 최고 점수 / min_score)
+    상위 라우트와 점수가 비슷한(절반 이상) 라우트는 함께 선택한다.
+    """
+    text = (question or "").lower()
+    scores: dict[str, float] = {}
+    for route, pattern, weight in _RULES:
+        if pattern.search(text):
+            scores[route] = scores.get(route, 0.0) + weight
+
+    if not scores:
+        return {"routes": [], "fields": None, "confidence": 0.0, "scores": scores}
+
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    top = ranked[0][1]
+    routes = [route for route, score in ranked if score >= top / 2]
+    total = sum(scores.values())
+    confidence = sum(scores[r] for r in routes) / total * min(1.0, top / min_score)
+
+    fields: Optional[list[str]] = None
+    if confidence >= min_confidence:
+        fields = list(dict.fromkeys(f for r in routes for f in ROUTE_FIELDS[r]))
+    return {"routes": routes, "fields": fields, "confidence": round(confidence, 3), "scores": scores}
@@ -0,0 +1,153 @@
+# korean_bm25.py
+"""Original RAG용 한국어 BM25 인덱스.
+
+- 한글은 문자 bigram, 영문/숫자는 단어 단위로 토큰화 (조사가 붙어도 어간 bigram이 일치)
+- 빌드 시점에 용어 통계와 BM25 가중치(postings)를 미리 계산해 FAISS 산출물 옆에 저장
+- 로드는 np.load(mmap_mode="r")로 하므로 질의 시에는 가중치 합산만 수행
+"""
+import os
+import re
+import json
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+
+_TOKEN = re.compile(r"[가-힣]+|[0-9][0-9,.]*[0-9]|[0-9]|[a-z]+")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize_korean(text: str) -> list[str]:
+    """한글 구간은 문자 bigram, 숫자/영문은 토큰 그대로 (숫자의 콤마는 제거: 9,000 -> 9000)."""
+    tokens: list[str] = []
+    for run in _TOKEN.findall((text or "").lower()):
+        if _HANGUL.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.replace(",", ""))
+    return tokens
+
+
+class KoreanBM25Index:
+    """CSR 형태(postings)로 저장되는 BM25 인덱스. 문서 ID는 입력 텍스트 순서(0..N-1)."""
+
+    VERSION = 1
+    FILES = ("indptr", "doc_ids", "weights")
+
+    def __init__(self, vocab: dict[str, int], indptr: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, n_docs: int, meta: Optional[dict] = None):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+        self.meta = meta or {}
+
+    # ----------------- 빌드/저장/로드 -----------------
+    @classmethod
+    def build(cls, texts: list[str], k1: float = 1.5, b: float = 0.75) -> "KoreanBM25Index":
+        n_docs = len(texts)
+        term_freqs = [Counter(tokenize_korean(t)) for t in texts]
+        doc_lens = np.array([sum(tf.values()) for tf in term_freqs], dtype=np.float32)
+        avgdl = float(doc_lens.mean()) if n_docs and doc_lens.sum() > 0 else 1.0
+
+        # term -> [(doc_id, tf), ...]
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, tf in enumerate(term_freqs):
+            for term, cnt in tf.items():
+                postings.setdefault(term, []).append((doc_id, cnt))
+
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids_parts, weight_parts = [], []
+        for term, tid in vocab.items():
+            plist = postings[term]
+            ids = np.fromiter((d for d, _ in plist), dtype=np.int32, count=len(plist))
+            tfs = np.fromiter((c for _, c in plist), dtype=np.float32, count=len(plist))
+            df = len(plist)
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * doc_lens[ids] / avgdl)
+            doc_ids_parts.append(ids)
+            weight_parts.append((idf * tfs * (k1 + 1.0) / (tfs + norm)).astype(np.float32))
+            indptr[tid + 1] = indptr[tid] + df
+
+        doc_ids = np.concatenate(doc_ids_parts) if doc_ids_parts else np.zeros(0, dtype=np.int32)
+        weights = np.concatenate(weight_parts) if weight_parts else np.zeros(0, dtype=np.float32)
+        meta = {"version": cls.VERSION, "tokenizer": "char_bigram", "k1": k1, "b": b,
+                "avgdl": avgdl, "n_docs": n_docs, "n_terms": len(vocab)}
+        return cls(vocab, indptr, doc_ids, weights, n_docs, meta)
+
+    @staticmethod
+    def _paths(directory: str, prefix: str) -> dict[str, str]:
+        paths = {name: os.path.join(directory, f"{prefix}_bm25_{name}.npy") for name in KoreanBM25Index.FILES}
+        paths["meta"] = os.path.join(directory, f"{prefix}_bm25_meta.json")
+        return paths
+
+    @classmethod
+    def exists(cls, directory: str, prefix: str) -> bool:
+        paths = cls._paths(directory, prefix)
+        if not all(os.path.exists(p) for p in paths.values()):
+            return False
+        try:
+            with open(paths["meta"], "r", encoding="utf-8") as f:
+                return json.load(f).get("version") == cls.VERSION
+        except Exception:
+            return False
+
+    def save(self, directory: str, prefix: str) -> None:
+        paths = self._paths(directory, prefix)
+        np.save(paths["indptr"], self.indptr)
+        np.save(paths["doc_ids"], self.doc_ids)
+        np.save(paths["weights"], self.weights)
+        with open(paths["meta"], "w", encoding="utf-8") as f:
+            json.dump({**self.meta, "vocab": self.vocab}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, prefix: str, mmap: bool = True) -> "KoreanBM25Index":
+        paths = cls._paths(directory, prefix)
+        mode = "r" if mmap else None
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        vocab = meta.pop("vocab")
+        return cls(
+            vocab=vocab,
+            indptr=np.load(paths["indptr"], mmap_mode=mode),
+            doc_ids=np.load(paths["doc_ids"], mmap_mode=mode),
+            weights=np.load(paths["weights"], mmap_mode=mode),
+            n_docs=int(meta["n_docs"]),
+            meta=meta,
+        )
+
+    # ----------------- 검색 -----------------
+    def get_scores(self, query: str) -> np.ndarray:
+        """전체 문서에 대한 BM25 점수 (미리 계산된 가중치 합산)."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term, qtf in Counter(tokenize_korean(query)).items():
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            start, end = int(self.indptr[tid]), int(self.indptr[tid + 1])
+            np.add.at(scores, self.doc_ids[start:end], self.weights[start:end] * qtf)
+        return scores
+
+    def search(self, query: str, k: int = 60, doc_ids: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """상위 k개 (doc_id, score). doc_ids를 주면 해당 문서 집합 안에서만 검색 (재빌드 없음)."""
+        scores = self.get_scores(query)
+        if doc_ids is not None:
+            candidates = np.asarray(doc_ids, dtype=np.int64)
+            cand_scores = scores[candidates]
+        else:
+            candidates = np.arange(self.n_docs)
+            cand_scores = scores
+        hit = cand_scores > 0
+        candidates, cand_scores = candidates[hit], cand_scores[hit]
+        if len(candidates) > k:
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+            candidates, cand_scores = candidates[top], cand_scores[top]
+        order = np.argsort(-cand_scores, kind="stable")
+        return [(int(candidates[i]), float(cand_scores[i])) for i in order]
+
@@ -0,0 +1,115 @@
+# onnx_backend.py
+"""Original RAG용 ONNX Runtime + int8 동적 양자화 추론 백엔드 (CPU 전용 노드용).
+
+- bge-m3 임베딩: CLS 풀링 + L2 정규화 (sentence-transformers 설정과 동일)
+- ms-marco cross-encoder: 로짓에 sigmoid 적용 (CrossEncoder.predict 기본값과 동일)
+- 최초 1회 optimum으로 ONNX export → dynamic int8 양자화 후 cache_dir에 저장, 이후에는 로드만 수행
+
+optimum[onnxruntime]이 필요하며, import는 이 모듈을 불러올 때만 일어난다.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def _quantized_model_dir(model_name: str, cache_dir: str, task: str) -> str:
+    """ONNX export + dynamic int8 양자화 결과 경로 (없으면 생성)."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    slug = model_name.replace("/", "__")
+    out_dir = os.path.join(cache_dir, f"{slug}-int8")
+    if os.path.exists(os.path.join(out_dir, "model_quantized.onnx")):
+        return out_dir
+
+    print(f"⚙️ ONNX export + int8 양자화: {model_name} → {out_dir}")
+    model_cls = ORTModelForFeatureExtraction if task == "feature-extraction" else ORTModelForSequenceClassification
+    fp32_dir = os.path.join(cache_dir, f"{slug}-fp32")
+    model_cls.from_pretrained(model_name, export=True).save_pretrained(fp32_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(fp32_dir)
+
+    # avx512_vnni 미지원 CPU에서도 동작하도록 avx2 설정 사용 (가중치 int8, 활성값은 런타임 양자화)
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+    AutoTokenizer.from_pretrained(fp32_dir).save_pretrained(out_dir)
+    return out_dir
+
+
+def _session_options(num_threads: Optional[int]):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    return options
+
+
+class OnnxEmbeddings(Embeddings):
+    """HuggingFaceEmbeddings("BAAI/bge-m3") 대체 (langchain Embeddings 인터페이스)"""
+
+    def __init__(self, model_name: str = "BAAI/bge-m3", cache_dir: str = "onnx_models", max_length: int = 512,
+                 batch_size: int = 16, num_threads: Optional[int] = None):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        model_dir = _quantized_model_dir(model_name, cache_dir, "feature-extraction")
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name="model_quantized.onnx", session_options=_session_options(num_threads),
+        )
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start : start + self.batch_size], padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np",
+            )
+            hidden = self.model(**batch).last_hidden_state
+            cls = np.asarray(hidden[:, 0], dtype=np.float32)
+            outputs.append(cls / np.clip(np.linalg.norm(cls, axis=1, keepdims=True), 1e-12, None))
+        return np.concatenate(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._encode([text])[0].tolist()
+
+
+class OnnxCrossEncoder:
+    """sentence_transformers.CrossEncoder.predict 호환 재랭커"""
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", cache_dir: str = "onnx_models",
+                 max_length: int = 512, batch_size: int = 32, num_threads: Optional[int] = None):
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+
+        model_dir = _quantized_model_dir(model_name, cache_dir, "text-classification")
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForSequenceClassification.from_pretrained(
+            model_dir, file_name="model_quantized.onnx", session_options=_session_options(num_threads),
+        )
+
+    def predict(self, pairs: list[tuple[str, str]]) -> np.ndarray:
+        scores = []
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start : start + self.batch_size]
+            features = self.tokenizer(
+                [q for q, _ in batch], [d for _, d in batch], padding=True, truncation="longest_first",
+                max_length=self.max_length, return_tensors="np",
+            )
+            logits = np.asarray(self.model(**features).logits, dtype=np.float32).reshape(len(batch), -1)[:, 0]
+            scores.append(1.0 / (1.0 + np.exp(-logits)))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
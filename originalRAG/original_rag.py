@@ -1,25 +1,44 @@
 # original_rag.py  (혹은 사용 중인 파일명)
+from __future__ import annotations
+
 import os
 import re
+import sys
 import json
+import time
 import hashlib
 import pickle
-from tqdm import tqdm
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from collections import defaultdict
-from typing import TypedDict, Optional
+from typing import TYPE_CHECKING, TypedDict, Optional, Union, Iterator, AsyncIterator, Awaitable, Callable
 
 import numpy as np
 from dotenv import load_dotenv
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.retrievers import BM25Retriever
-from langchain.docstore.document import Document
-from sentence_transformers import CrossEncoder
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
+# langchain / langgraph / sentence_transformers / tqdm 는 import 비용이 커서
+# 실제로 사용하는 함수 안에서 지연 import 한다 (서버 부팅/오토스케일링 시간 단축)
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+    from langchain_community.vectorstores import FAISS
+    from langgraph.graph import StateGraph
+
+from korean_bm25 import KoreanBM25Index
+from context_packer import chunk_body, pack_context
+from field_router import FieldRoute, route_question
+
+try:
+    from telemetry import atimed_stream, get_logger, record_cache, record_llm, stage, timed_stream
+except ImportError:  # originalRAG 폴더에서 직접 실행할 때 (플랫 배포가 아닌 경우)
+    sys.path.append(str(Path(__file__).resolve().parent.parent / "summaryRAG"))
+    from telemetry import atimed_stream, get_logger, record_cache, record_llm, stage, timed_stream
+from answer_cache import SemanticAnswerCache
+from llm_dispatcher import LLMOverloaded, estimate_tokens, get_dispatcher
+from shared_artifacts import SharedDocumentStore, has_corpus, read_index, shared_dir
+
+logger = get_logger("original_rag")
 
 
 
@@ -38,20 +57,77 @@ def _normalize_name(s: str) -> str:
     return _PUNCT.sub("", s).lower()
 
 
+# 쉬운 설명 스타일 규칙 (단일 생성 프롬프트와 재작성 프롬프트가 공유)
+EASY_STYLE_RULES = """
+1. **전문 용어**(예: 리볼빙, 위법계약해지권 등)는 간단한 예시나 쉬운 말로 풀어서 설명하세요.
+2. **문장이 길고 복잡한 경우**, **핵심을 유지**하면서 문장을 분리해 **명확하게 정리**하세요.
+3. **필수 정보**(예: 금액, 조건, 책임, 유의사항 등)는 **절대 빠뜨리지 말고 반영**하세요.
+4. 요약하지 말고, 말을 지어내지 말고, 법적 표현을 삭제하지 말고 **문맥 그대로 쉽게 풀어** 쓰세요.
+5. 전체적으로 **고객 상담원이 친절하게 설명해주는 말투**로 바꾸세요.
+""".strip()
+
+
+class CardBundle(TypedDict):
+    """카드별 검색 번들: documents의 정수 ID(doc_ids)만으로 FAISS/BM25/RRF/재랭킹을 수행"""
+    card_name: str
+    documents: list                 # 카테고리 전체(또는 개별 카드) Document 목록, ID = 리스트 인덱스
+    doc_ids: np.ndarray             # 이 카드에 해당하는 문서 ID
+    index: object                   # faiss raw index (ID = documents 인덱스)
+    selector: object                # doc_ids로 제한하는 faiss IDSelector (전체 검색이면 None)
+    field_ids: dict[str, np.ndarray]  # field -> doc_ids 중 해당 field 문서 ID (질의 라우팅용)
+    bm25: KoreanBM25Index
+    version_paths: list[str]        # 원본 JSON/인덱스 파일 (답변 캐시 무효화 기준)
+
+
 class GeneratorState(TypedDict):
     card_name: str
     user_question: str
-    context_chunks: list[str]
+    documents: list                 # LangGraph가 타입을 해석하므로 Document 대신 list
+    context_ids: list[int]
+    context_tokens: int             # 패킹된 컨텍스트 토큰 수
     prompt: str
     answer: str
     simplified_answer: str
     explain_easy: bool
+    easy_mode: str                  # "single_pass": 생성 프롬프트에 쉬운 설명 적용 / "rewrite": 2차 재작성
 
 
 class FAISSRAGRetriever:
     """Original RAG 시스템 - 카드별 상세 정보 검색 및 질의응답"""
 
-    def __init__(self):
+    EASY_MODES = ("single_pass", "rewrite")
+    INFERENCE_BACKENDS = ("torch", "onnx")
+
+    def __init__(self, easy_mode: str = "single_pass", prefetch_easy: bool = False, rewrite_model: str = "gpt-4",
+                 cache_similarity_threshold: float = 0.92, cache_ttl_seconds: float = 3600.0, cache_max_entries: int = 1024,
+                 context_token_budget: int = 3000, inference_backend: Optional[str] = None,
+                 onnx_threads: Optional[int] = None, route_fields: bool = True,
+                 route_min_confidence: float = 0.6, route_min_docs: int = 3, multi_card_workers: int = 4):
+        """
+        easy_mode: 쉬운 설명 생성 방식 ("single_pass" 한 번의 생성 / "rewrite" 상세 답변 후 재작성)
+        prefetch_easy: 상세 답변 직후 쉬운 설명 재작성을 백그라운드로 미리 실행
+        rewrite_model: 재작성에 사용할 모델 (인스턴스는 1회만 생성)
+        cache_*: 답변 캐시 설정 (질문 임베딩 유사도 임계값, TTL, 최대 항목 수)
+        context_token_budget: 프롬프트 [문서 내용]에 넣을 최대 토큰 수
+        inference_backend: 임베딩/재랭커 추론 백엔드 ("torch" PyTorch float32 / "onnx" ONNX Runtime int8).
+                           None이면 환경변수 RAG_INFERENCE_BACKEND (기본 "torch")
+        onnx_threads: ONNX Runtime intra-op 스레드 수 (None이면 런타임 기본값)
+        route_fields: 질문으로 관련 field(fee/benefit/...)를 예측해 검색·재랭킹 범위를 제한
+        route_min_confidence / route_min_docs: 라우팅 확신도가 낮거나 제한된 문서 수가 적으면 전체 검색
+        multi_card_workers: 여러 카드 비교 질의(query_multi)에서 카드별 준비/검색을 병렬로 돌릴 스레드 수
+        """
+        if easy_mode not in self.EASY_MODES:
+            raise ValueError(f"easy_mode는 {self.EASY_MODES} 중 하나여야 합니다: {easy_mode}")
+        inference_backend = (inference_backend or os.getenv("RAG_INFERENCE_BACKEND", "torch")).lower()
+        if inference_backend not in self.INFERENCE_BACKENDS:
+            raise ValueError(f"inference_backend는 {self.INFERENCE_BACKENDS} 중 하나여야 합니다: {inference_backend}")
+        self.easy_mode = easy_mode
+        self.prefetch_easy = prefetch_easy
+        self.context_token_budget = context_token_budget
+        self.route_fields = route_fields
+        self.route_min_confidence = route_min_confidence
+        self.route_min_docs = route_min_docs
+
         os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
         load_dotenv()
 
@@ -92,46 +168,99 @@ class FAISSRAGRetriever:
         if not self.data_dirs:
             raise FileNotFoundError("신용카드/체크카드 데이터 디렉토리를 찾지 못했습니다.")
 
-        # selected_cards.json 위치
+        # 선택 기록 위치: SQLite 저장소(SELECTED_CARDS_DB, UI와 공유 가능) + 이전 형식 selected_cards.json
         self.selected_cards_path = os.path.join(self.current_file_dir, "selected_cards.json")
+        self.selected_cards_db = os.getenv("SELECTED_CARDS_DB") or os.path.join(self.current_file_dir, "selected_cards.db")
+        self._selection_store = None
 
         # 임베딩 저장 디렉토리
         self.embeddings_dir = os.path.join(self.current_file_dir, "original_embeddings")
         os.makedirs(self.embeddings_dir, exist_ok=True)
         print(f"📁 임베딩 저장 디렉토리: {self.embeddings_dir}")
+        # 여러 워커 프로세스가 인덱스/문서를 mmap으로 공유하는 읽기 전용 아티팩트 (shared_artifacts.py로 내보냄)
+        self.shared_artifacts_dir = shared_dir()
 
         # 모델들
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-m3",
-            model_kwargs={"device": "cpu"},
-        )
-        self.reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+        from langchain_openai import ChatOpenAI
+
+        # stream_usage: 스트리밍 응답에도 토큰 사용량(usage_metadata)을 받아 /metrics에 기록
+        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.3, streaming=True, stream_usage=True)
+        self.rewrite_llm = ChatOpenAI(model=rewrite_model, temperature=0.3, streaming=True, stream_usage=True)
+        self.inference_backend = inference_backend
+        self.embedding_model, self.reranker = self._load_inference_models(inference_backend, onnx_threads)
 
-        # LangGraph
+        # LangGraph (동기: query/query_stream, 비동기: 웹 앱의 aquery/aquery_stream — 생성이 이벤트 루프에서 진행)
         self.graph = self._build_langgraph()
+        self.agraph = self._build_langgraph(asynchronous=True)
 
         # 캐시
-        self._document_cache: dict[str, list[Document]] = {}
-        self._faiss_cache: dict[str, FAISS] = {}
-        self._bm25_cache: dict[str, BM25Retriever] = {}
+        self._bundle_cache: dict[str, CardBundle] = {}
+        self._category_cache: dict[str, tuple[list[Document], FAISS, KoreanBM25Index]] = {}
+        # 카드/모드별 답변 캐시 (정확 일치 + bge-m3 질문 임베딩 유사도)
+        self.answer_cache = SemanticAnswerCache(
+            similarity_threshold=cache_similarity_threshold,
+            ttl_seconds=cache_ttl_seconds,
+            max_entries=cache_max_entries,
+            version_of=self._current_card_version,
+        )
+        # 상세 답변 캐시 키 -> 진행 중인 쉬운 설명 재작성
+        self._easy_rewrites: dict[tuple[str, str, str], Future] = {}
+        self._rewrite_lock = threading.Lock()
+        self._rewrite_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="easy-rewrite")
+        # 여러 카드 비교 질의: 카드별 번들 준비 + 검색/재랭킹 병렬 실행
+        self._multi_executor = ThreadPoolExecutor(max_workers=multi_card_workers, thread_name_prefix="multi-card")
+        # 같은 카테고리 인덱스를 여러 스레드가 동시에 로드하지 않도록 카테고리별 잠금
+        self._category_locks: dict[str, threading.Lock] = {}
+        # 카탈로그 검색용 카테고리별 메타데이터 배열 (card_name/field/keyword)
+        self._catalog_meta: dict[str, dict[str, np.ndarray]] = {}
 
         print("🎉 FAISSRAGRetriever 초기화 완료!")
 
+    # ----------------- 추론 모델 -----------------
+    def _load_inference_models(self, backend: str, onnx_threads: Optional[int] = None):
+        """(임베딩 모델, 재랭커). ONNX 백엔드 로드에 실패하면 PyTorch로 대체."""
+        if backend == "onnx":
+            try:
+                from onnx_backend import OnnxEmbeddings, OnnxCrossEncoder
+
+                cache_dir = os.path.join(self.embeddings_dir, "onnx")
+                print(f"🧮 ONNX Runtime(int8) 추론 백엔드 로드 중... ({cache_dir})")
+                return (
+                    OnnxEmbeddings("BAAI/bge-m3", cache_dir=cache_dir, num_threads=onnx_threads),
+                    OnnxCrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2", cache_dir=cache_dir,
+                                     num_threads=onnx_threads),
+                )
+            except Exception as e:
+                print(f"⚠️ ONNX 백엔드 로드 실패, PyTorch로 대체합니다: {e}")
+                self.inference_backend = "torch"
+
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        from sentence_transformers import CrossEncoder
+
+        return (
+            HuggingFaceEmbeddings(model_name="BAAI/bge-m3", model_kwargs={"device": "cpu"}),
+            CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2"),
+        )
+
     # ----------------- 유틸/로딩 -----------------
+    def get_selection_store(self):
+        """선택 기록 저장소 (summaryRAG/selection_store.py, 플랫 배포에서는 같은 폴더)"""
+        if self._selection_store is None:
+            try:
+                from selection_store import SelectionStore
+            except ImportError:
+                sys.path.append(os.path.join(os.path.dirname(self.current_file_dir), "summaryRAG"))
+                from selection_store import SelectionStore
+            self._selection_store = SelectionStore(self.selected_cards_db, legacy_json=self.selected_cards_path)
+        return self._selection_store
+
     def get_latest_card_from_selected_cards(self) -> Optional[str]:
         try:
-            if not os.path.exists(self.selected_cards_path):
-                print(f"❌ selected_cards.json 파일을 찾을 수 없습니다: {self.selected_cards_path}")
-                return None
-
-            with open(self.selected_cards_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not data:
-                print("❌ selected_cards.json이 비어있습니다")
+            last_card = self.get_selection_store().latest()
+            if not last_card:
+                print(f"❌ 선택된 카드 기록이 없습니다: {self.selected_cards_db}")
                 return None
 
-            last_card = data[-1]
             card_name = last_card.get("card_name")
             print("🎯 마지막 카드 정보:")
             print(f"   - Card Name: {card_name}")
@@ -141,10 +270,13 @@ class FAISSRAGRetriever:
             print(f"   - Keyword: {last_card.get('keyword', 'N/A')}")
             return card_name
         except Exception as e:
-            print(f"❌ selected_cards.json 읽기 중 오류: {e}")
+            print(f"❌ 선택 기록 읽기 중 오류: {e}")
             return None
 
     def load_documents_field_level(self, json_paths: list[str]) -> list[Document]:
+        from langchain.docstore.document import Document
+        from tqdm import tqdm
+
         print(f"📋 문서 로딩 시작... (총 {len(json_paths)}개 파일)")
         documents: list[Document] = []
 
@@ -153,6 +285,8 @@ class FAISSRAGRetriever:
                 with open(json_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
                 card_name = data.get("card_name", "UnknownCard")
+                card_type = self._get_card_category_from_path(json_path)
+                keyword = Path(json_path).parent.name  # 신용json/통신/xxx.json → "통신"
 
                 for section in data.get("sections", []):
                     heading = section.get("heading", "")
@@ -182,6 +316,8 @@ class FAISSRAGRetriever:
                                 page_content=full_text,
                                 metadata={
                                     "card_name": card_name,
+                                    "card_type": card_type,
+                                    "keyword": keyword,
                                     "field": key,
                                     "heading": heading,
                                     "subheading": subheading,
@@ -235,6 +371,7 @@ class FAISSRAGRetriever:
             print(f"      - 임베딩 데이터: {pkl_path}")
             print(f"      - 메타데이터: {metadata_path}")
             print(f"      - 텍스트: {texts_path}")
+            print(f"      - BM25 인덱스: {base_filename}_bm25_*")
 
             # 1) faiss raw index 저장
             if hasattr(faiss_index, "index"):
@@ -264,10 +401,15 @@ class FAISSRAGRetriever:
                 "cards": list({doc.metadata.get("card_name", "Unknown") for doc in documents}),
                 "created_at": str(datetime.datetime.now().isoformat()),
                 "embedding_model": "BAAI/bge-m3",
+                "inference_backend": self.inference_backend,
+                "bm25_tokenizer": "char_bigram",
             }
             with open(metadata_path, "w", encoding="utf-8") as f:
                 json.dump(metadata_summary, f, ensure_ascii=False, indent=2)
 
+            # 3) 한국어 BM25 인덱스 (용어 통계/postings 사전 계산)
+            KoreanBM25Index.build(embedding_data["texts"]).save(self.embeddings_dir, base_filename)
+
             with open(texts_path, "w", encoding="utf-8") as f:
                 f.write(f"=== {category.upper()} 카드 문서 텍스트 ===\n")
                 f.write(f"총 문서 수: {len(documents)}\n")
@@ -292,15 +434,23 @@ class FAISSRAGRetriever:
             traceback.print_exc()
             return False
 
-    def _load_category_embeddings(self, category: str) -> tuple[Optional[list[Document]], Optional[FAISS], Optional[BM25Retriever]]:
+    def _load_category_embeddings(self, category: str) -> tuple[Optional[list[Document]], Optional[FAISS], Optional[KoreanBM25Index]]:
+        if category in self._category_cache:
+            return self._category_cache[category]
+
+        if has_corpus(self.shared_artifacts_dir, f"original_{category}"):
+            return self._load_shared_category(category)
+
         base_filename = f"{category}_card"
         faiss_path = os.path.join(self.embeddings_dir, f"{base_filename}_embeddings.faiss")
         pkl_path = os.path.join(self.embeddings_dir, f"{base_filename}_embedding_data.pkl")
 
         if not os.path.exists(pkl_path):
-            print(f"⚠️ {category.upper()} 카드 임베딩 파일이 없습니다: {pkl_path}")
+            logger.warning("⚠️ 카테고리 임베딩 파일이 없습니다", extra={"category": category, "path": pkl_path})
             return None, None, None
 
+        from langchain_community.vectorstores import FAISS
+
         try:
             with open(pkl_path, "rb") as f:
                 embedding_data = pickle.load(f)
@@ -316,23 +466,79 @@ class FAISSRAGRetriever:
                     docstore={i: doc for i, doc in enumerate(documents)},
                     index_to_docstore_id={i: i for i in range(len(documents))},
                 )
-                print("   🔍 FAISS 인덱스 로드 완료")
+                logger.debug("🔍 FAISS 인덱스 로드 완료", extra={"category": category})
             else:
-                print("   ⚠️ FAISS 파일이 없어 재생성합니다...")
+                logger.warning("⚠️ FAISS 파일이 없어 재생성합니다", extra={"category": category})
                 faiss_index = FAISS.from_documents(documents, self.embedding_model)
 
-            bm25 = BM25Retriever.from_documents(documents)
-            bm25.k = 60
+            if KoreanBM25Index.exists(self.embeddings_dir, base_filename):
+                bm25 = KoreanBM25Index.load(self.embeddings_dir, base_filename, mmap=True)
+                logger.debug("🔤 BM25 인덱스 로드 완료 (mmap)", extra={"category": category})
+            else:
+                logger.warning("⚠️ BM25 인덱스가 없어 생성 후 저장합니다", extra={"category": category})
+                bm25 = KoreanBM25Index.build([doc.page_content for doc in documents])
+                bm25.save(self.embeddings_dir, base_filename)
+
+            if documents and "keyword" not in documents[0].metadata:
+                self._backfill_catalog_metadata(category, documents)
 
-            print(f"✅ {category.upper()} 카드 임베딩 로드 성공!")
+            logger.info("✅ 카테고리 임베딩 로드 성공", extra={"category": category, "documents": len(documents)})
+            self._category_cache[category] = (documents, faiss_index, bm25)
             return documents, faiss_index, bm25
         except Exception as e:
-            print(f"❌ {category.upper()} 카드 임베딩 로드 실패: {e}")
-            import traceback
+            logger.exception("❌ 카테고리 임베딩 로드 실패", extra={"category": category, "error": str(e)})
+            return None, None, None
 
-            traceback.print_exc()
+    def _load_shared_category(self, category: str) -> tuple[Optional[SharedDocumentStore], Optional[FAISS], Optional[KoreanBM25Index]]:
+        """공유 아티팩트에서 로드: FAISS 인덱스는 읽기 전용 mmap, 문서는 접근할 때 만드는 SharedDocumentStore.
+        pickle Document 목록을 워커마다 복사하지 않으므로 N개 워커가 인덱스 데이터 한 벌을 나눠 쓴다."""
+        from langchain_community.vectorstores import FAISS
+
+        name = f"original_{category}"
+        try:
+            documents = SharedDocumentStore(self.shared_artifacts_dir, name)
+            index = read_index(os.path.join(self.shared_artifacts_dir, f"{name}.faiss"))
+            # 래퍼는 .index만 사용하므로 docstore를 채우지 않는다 (문서는 documents[i]로 조회)
+            faiss_index = FAISS(embedding_function=self.embedding_model, index=index,
+                                docstore={}, index_to_docstore_id={})
+            if not KoreanBM25Index.exists(self.shared_artifacts_dir, name):
+                raise FileNotFoundError(f"{name}_bm25_* 파일이 없습니다. shared_artifacts.py로 다시 내보내세요.")
+            bm25 = KoreanBM25Index.load(self.shared_artifacts_dir, name, mmap=True)
+            if not any(documents.column("keyword")):
+                logger.warning("⚠️ 공유 아티팩트에 keyword 메타데이터가 없습니다 (읽기 전용이라 보완하지 않음)",
+                               extra={"category": category})
+            logger.info("✅ 공유 아티팩트 로드 (mmap)", extra={"category": category, "documents": len(documents)})
+            self._category_cache[category] = (documents, faiss_index, bm25)
+            return documents, faiss_index, bm25
+        except Exception as e:
+            logger.exception("❌ 공유 아티팩트 로드 실패", extra={"category": category, "error": str(e)})
             return None, None, None
 
+    def _category_version_paths(self, category: str) -> list[str]:
+        """답변 캐시 버전 계산에 쓰는 카테고리 인덱스 파일 (공유 아티팩트를 쓰면 그 파일)"""
+        name = f"original_{category}"
+        if has_corpus(self.shared_artifacts_dir, name):
+            base = os.path.join(self.shared_artifacts_dir, name)
+            return [f"{base}_docs.bin", f"{base}.faiss", f"{base}_bm25_meta.json"]
+        base = os.path.join(self.embeddings_dir, f"{category}_card")
+        return [f"{base}_embedding_data.pkl", f"{base}_embeddings.faiss", f"{base}_bm25_meta.json"]
+
+    def _backfill_catalog_metadata(self, category: str, documents: list[Document]):
+        """card_type/keyword 메타데이터가 없는 이전 임베딩 파일용: 원본 JSON 폴더에서 채운다."""
+        root_dir = self.credit_dir if category == "credit" else self.check_dir if category == "check" else None
+        folders: dict[str, str] = {}
+        if root_dir and os.path.exists(root_dir):
+            for p in Path(root_dir).rglob("*.json"):
+                try:
+                    with open(p, "r", encoding="utf-8") as f:
+                        folders[json.load(f).get("card_name", "")] = p.parent.name
+                except Exception:
+                    continue
+        for doc in documents:
+            doc.metadata.setdefault("card_type", category)
+            doc.metadata.setdefault("keyword", folders.get(doc.metadata.get("card_name", ""), ""))
+        logger.info("🏷️ card_type/keyword 메타데이터 보완", extra={"category": category, "cards": len(folders)})
+
     def build_category_embeddings(self, force_rebuild: bool = False):
         for category in ["credit", "check"]:
             print("\n" + "=" * 50)
@@ -355,6 +561,8 @@ class FAISSRAGRetriever:
             print(f"   - 카드 수: {len(cards)}")
             print(f"   - 샘플: {', '.join(cards[:5])}{'...' if len(cards) > 5 else ''}")
 
+            from langchain_community.vectorstores import FAISS
+
             print(f"🔍 {category.upper()} 카드 FAISS 인덱스 생성 중...")
             faiss_index = FAISS.from_documents(documents, self.embedding_model)
             print("✅ 생성 완료")
@@ -367,23 +575,71 @@ class FAISSRAGRetriever:
         print(f"📁 저장 위치: {self.embeddings_dir}")
 
     # ----------------- 검색/생성 -----------------
-    def reciprocal_rank_fusion(self, faiss_results: list, bm25_results: list, k: int = 60) -> list[str]:
-        scores = defaultdict(float)
-
-        def update_scores(results, weight):
-            for rank, item in enumerate(results):
-                key = item.page_content.strip()
-                scores[key] += weight / (k + rank + 1)
-
-        update_scores(faiss_results, weight=0.6)
-        update_scores(bm25_results, weight=0.4)
-
-        sorted_chunks = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        return [chunk for chunk, _ in sorted_chunks[:k]]
-
-    def build_generator_prompt(self, card_name: str, user_question: str, context_chunks: list[str]) -> str:
+    def reciprocal_rank_fusion(self, faiss_ids: list[int], bm25_ids: list[int], k: int = 60,
+                               limit: Optional[int] = None) -> list[int]:
+        """문서 ID 기준 RRF (텍스트 해싱 없이 정수 키만 사용). k는 RRF 상수, limit은 반환 개수 (None이면 전체)"""
+        scores: dict[int, float] = defaultdict(float)
+
+        def update_scores(ids, weight):
+            for rank, doc_id in enumerate(ids):
+                scores[doc_id] += weight / (k + rank + 1)
+
+        with stage("original_rag", "rrf"):
+            update_scores(faiss_ids, weight=0.6)
+            update_scores(bm25_ids, weight=0.4)
+            sorted_ids = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return [doc_id for doc_id, _ in sorted_ids[:limit]]
+
+    def _dense_search(self, bundle: CardBundle, query_vector: np.ndarray, k: int = 60) -> list[int]:
+        """카테고리 FAISS 인덱스에서 카드 문서 ID로 제한해 검색 (재임베딩 없음)"""
+        import faiss as faiss_lib
+
+        k = min(k, len(bundle["doc_ids"]))
+        if k <= 0:
+            return []
+        with stage("original_rag", "faiss"):
+            if bundle["selector"] is None:
+                _, ids = bundle["index"].search(query_vector, k)
+            else:
+                params = faiss_lib.SearchParameters(sel=bundle["selector"])
+                _, ids = bundle["index"].search(query_vector, k, params=params)
+        return [int(i) for i in ids[0] if i >= 0]
+
+    def _lexical_search(self, bundle: CardBundle, question: str, k: int = 60) -> list[int]:
+        with stage("original_rag", "bm25"):
+            hits = bundle["bm25"].search(question, k=k, doc_ids=bundle["doc_ids"])
+        return [doc_id for doc_id, _ in hits]
+
+    def _rerank(self, bundle: CardBundle, question: str, candidate_ids: list[int], top_k: int) -> list[tuple[int, float]]:
+        """Cross-Encoder 재랭킹 → (doc_id, score) 상위 top_k"""
+        if not candidate_ids:
+            return []
+        documents = bundle["documents"]
+        with stage("original_rag", "rerank"):
+            scores = self.reranker.predict([(question, documents[i].page_content) for i in candidate_ids])
+        ranked = sorted(zip(candidate_ids, (float(s) for s in scores)), key=lambda x: x[1], reverse=True)
+        return ranked[:top_k]
+
+    @staticmethod
+    def _sources(documents: list[Document], ranked: list[tuple[int, float]]) -> list[dict]:
+        """답변 근거(출처) 목록: 문서 ID + 제목/필드 메타데이터"""
+        sources = []
+        for doc_id, score in ranked:
+            meta = documents[doc_id].metadata
+            sources.append({
+                "doc_id": doc_id,
+                "card_name": meta.get("card_name", ""),
+                "heading": meta.get("heading", ""),
+                "subheading": meta.get("subheading", ""),
+                "field": meta.get("field", ""),
+                "score": round(score, 4),
+            })
+        return sources
+
+    def build_generator_prompt(self, card_name: str, user_question: str, context_chunks: list[str],
+                               explain_easy: bool = False) -> str:
         context_text = "\n".join(context_chunks)
-        return f"""
+        prompt = f"""
 당신은 신용카드 및 체크카드 정보를 바탕으로 사용자 질문에 대해 **문서 기반으로 구체적이고 정확한 답변을 제공하는 AI 전문가**입니다.
 
 카드 이름: {card_name}
@@ -405,68 +661,216 @@ class FAISSRAGRetriever:
 4. 사용자의 질문이 여러 항목을 포함할 경우, 각 항목별로 **체계적으로 구성하여 답변**하세요.
 5. 문서에 명시되지 않은 내용은 "문서에 명시된 정보가 없습니다."라고 답변하고, **절대 거짓 정보를 지어내서는 안됩니다.**
 """.strip()
+        if explain_easy:
+            # 단일 생성 모드: 재작성 단계 없이 처음부터 쉬운 설명으로 답변
+            prompt += f"""
+
+[쉬운 설명 조건]
+위 조건을 모두 지키면서, 사용자가 **정확하고 쉽게 이해할 수 있도록** 아래 기준에 따라 작성하세요:
+{EASY_STYLE_RULES}
+""".rstrip()
+        return prompt
 
     def _build_prompt_node(self, state: GeneratorState) -> GeneratorState:
+        # 텍스트는 프롬프트 생성 시점에만 문서 ID로부터 꺼낸다
+        # (제목별 그룹핑 + 문장 중복 제거 + 토큰 예산 안에서 재랭킹 순서대로 채움)
+        with stage("original_rag", "pack_context"):
+            packed = pack_context(state["documents"], state["context_ids"], budget_tokens=self.context_token_budget)
+        logger.debug("🧩 컨텍스트 패킹", extra={
+            "tokens": packed["tokens_used"], "budget": packed["budget"], "docs": len(packed["doc_ids"]),
+            "candidates": len(state["context_ids"]), "duplicate_sentences": packed["duplicate_sentences"]})
+        state["context_tokens"] = packed["tokens_used"]
         state["prompt"] = self.build_generator_prompt(
             card_name=state["card_name"],
             user_question=state["user_question"],
-            context_chunks=state["context_chunks"],
+            context_chunks=[packed["text"]],
+            explain_easy=state["explain_easy"] and state["easy_mode"] == "single_pass",
         )
         return state
 
-    def _generate_answer_node(self, state: GeneratorState) -> GeneratorState:
-        messages = [
+    def _invoke_llm(self, llm, messages: list, caller: str) -> str:
+        """LangChain LLM 호출 1회 (LLM 디스패처 입장 제어) + 지연시간/토큰 사용량 기록"""
+        with get_dispatcher().slot(llm.model_name, estimate_tokens(messages, llm.max_tokens), caller) as ticket:
+            try:
+                with stage("original_rag", caller):
+                    message = llm.invoke(messages)
+            except Exception:
+                record_llm(caller, llm.model_name, status="error")
+                raise
+            ticket.record(getattr(message, "usage_metadata", None))
+        record_llm(caller, llm.model_name, getattr(message, "usage_metadata", None))
+        return message.content
+
+    async def _ainvoke_llm(self, llm, messages: list, caller: str) -> str:
+        """_invoke_llm의 비동기 버전 (이벤트 루프에서 ainvoke, 스레드를 점유하지 않음)"""
+        async with get_dispatcher().aslot(llm.model_name, estimate_tokens(messages, llm.max_tokens), caller) as ticket:
+            try:
+                with stage("original_rag", caller):
+                    message = await llm.ainvoke(messages)
+            except Exception:
+                record_llm(caller, llm.model_name, status="error")
+                raise
+            ticket.record(getattr(message, "usage_metadata", None))
+        record_llm(caller, llm.model_name, getattr(message, "usage_metadata", None))
+        return message.content
+
+    @staticmethod
+    def _answer_messages(state: GeneratorState) -> list:
+        from langchain.schema import SystemMessage, HumanMessage
+
+        return [
             SystemMessage(content="당신은 카드별 정보 기반 응답을 정확하게 생성하는 전문가입니다."),
             HumanMessage(content=state["prompt"]),
         ]
-        state["answer"] = self.llm(messages).content
+
+    def _generate_answer_node(self, state: GeneratorState) -> GeneratorState:
+        # graph.stream(stream_mode="messages")로 실행되면 토큰이 그대로 스트리밍된다
+        state["answer"] = self._invoke_llm(self.llm, self._answer_messages(state), "llm_answer")
         return state
 
-    def _rewrite_answer_node(self, state: GeneratorState) -> GeneratorState:
-        if not state.get("explain_easy", False):
-            state["simplified_answer"] = ""
-            return state
+    async def _agenerate_answer_node(self, state: GeneratorState) -> GeneratorState:
+        state["answer"] = await self._ainvoke_llm(self.llm, self._answer_messages(state), "llm_answer")
+        return state
+
+    async def _abuild_prompt_node(self, state: GeneratorState) -> GeneratorState:
+        # 컨텍스트 패킹은 가벼운 CPU 작업이라 스레드로 넘기지 않고 바로 실행
+        return self._build_prompt_node(state)
+
+    @staticmethod
+    def _rewrite_messages(answer: str) -> list:
+        from langchain.schema import SystemMessage, HumanMessage
 
         prompt = f"""
 당신은 신용카드나 체크카드 정보를 사용자가 **정확하고 쉽게 이해할 수 있도록 재작성**해주는 AI입니다.
 
 아래 문장을 다음 기준에 따라 **친절하게 다시 설명**해주세요:
 
-1. **전문 용어**(예: 리볼빙, 위법계약해지권 등)는 간단한 예시나 쉬운 말로 풀어서 설명하세요.
-2. **문장이 길고 복잡한 경우**, **핵심을 유지**하면서 문장을 분리해 **명확하게 정리**하세요.
-3. **필수 정보**(예: 금액, 조건, 책임, 유의사항 등)는 **절대 빠뜨리지 말고 반영**하세요.
-4. 요약하지 말고, 말을 지어내지 말고, 법적 표현을 삭제하지 말고 **문맥 그대로 쉽게 풀어** 쓰세요.
-5. 전체적으로 **고객 상담원이 친절하게 설명해주는 말투**로 바꾸세요.
+{EASY_STYLE_RULES}
 
 [원문]
-{state['answer']}
+{answer}
 
 [쉬운 설명]
 """
-        messages = [
+        return [
             SystemMessage(content="당신은 금융 정보를 쉽게 설명해주는 AI입니다."),
             HumanMessage(content=prompt),
         ]
-        
-        gpt4_llm = ChatOpenAI(model="gpt-4", temperature=0.3)
-        state["simplified_answer"] = gpt4_llm(messages).content
+
+    def _rewrite_answer_node(self, state: GeneratorState) -> GeneratorState:
+        if not state.get("explain_easy", False) or state.get("easy_mode") != "rewrite":
+            state["simplified_answer"] = ""
+            return state
+
+        state["simplified_answer"] = self._invoke_llm(self.rewrite_llm, self._rewrite_messages(state["answer"]), "llm_rewrite")
+        return state
+
+    async def _arewrite_answer_node(self, state: GeneratorState) -> GeneratorState:
+        if not state.get("explain_easy", False) or state.get("easy_mode") != "rewrite":
+            state["simplified_answer"] = ""
+            return state
+
+        state["simplified_answer"] = await self._ainvoke_llm(self.rewrite_llm, self._rewrite_messages(state["answer"]),
+                                                             "llm_rewrite")
         return state
 
-    def _build_langgraph(self) -> StateGraph:
+    @staticmethod
+    def _route_after_answer(state: GeneratorState) -> str:
+        from langgraph.graph import END
+
+        if state.get("explain_easy") and state.get("easy_mode") == "rewrite":
+            return "RewriteAnswer"
+        return END
+
+    def _build_langgraph(self, asynchronous: bool = False) -> StateGraph:
+        """asynchronous=True면 같은 구조의 그래프를 async 노드로 만든다 (astream 전용)"""
+        from langgraph.graph import StateGraph, END
+
         builder = StateGraph(GeneratorState)
-        builder.add_node("BuildPrompt", self._build_prompt_node)
-        builder.add_node("GenerateAnswer", self._generate_answer_node)
-        builder.add_node("RewriteAnswer", self._rewrite_answer_node)
+        if asynchronous:
+            builder.add_node("BuildPrompt", self._abuild_prompt_node)
+            builder.add_node("GenerateAnswer", self._agenerate_answer_node)
+            builder.add_node("RewriteAnswer", self._arewrite_answer_node)
+        else:
+            builder.add_node("BuildPrompt", self._build_prompt_node)
+            builder.add_node("GenerateAnswer", self._generate_answer_node)
+            builder.add_node("RewriteAnswer", self._rewrite_answer_node)
         builder.set_entry_point("BuildPrompt")
         builder.add_edge("BuildPrompt", "GenerateAnswer")
-        builder.add_edge("GenerateAnswer", "RewriteAnswer")
+        # single_pass 모드(또는 상세 답변)는 재작성 없이 바로 종료
+        builder.add_conditional_edges("GenerateAnswer", self._route_after_answer, ["RewriteAnswer", END])
         builder.add_edge("RewriteAnswer", END)
         return builder.compile()
 
+    # -------- 답변 캐시 / 백그라운드 재작성 --------
+    def _card_version(self, bundle: CardBundle) -> str:
+        """카드 원본 JSON과 인덱스 파일의 (mtime, size) + BM25 버전. 바뀌면 캐시 항목이 무효화된다."""
+        parts = []
+        for path in bundle["version_paths"]:
+            try:
+                st = os.stat(path)
+                parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append("missing")
+        parts.append(f"bm25v{KoreanBM25Index.VERSION}")
+        return "|".join(parts)
+
+    def _current_card_version(self, card_name: str) -> str:
+        """답변 해시로 찾은 캐시 항목 검사용 현재 버전. 번들이 로드되어 있지 않으면 확인할 수 없으므로 불일치로 본다."""
+        bundle = self._bundle_cache.get(card_name)
+        return self._card_version(bundle) if bundle is not None else "unloaded"
+
+    def _embed_query(self, question: str) -> np.ndarray:
+        with stage("original_rag", "embed_query"):
+            vector = self.embedding_model.embed_query(question)
+        return np.asarray(vector, dtype="float32").reshape(1, -1)
+
+    def _lookup_answer(self, card_name: str, modes: tuple[str, ...], question: str,
+                       version: str) -> tuple[Optional[str], Optional[dict], Optional[np.ndarray]]:
+        """(적중 모드, 캐시 항목, 질문 벡터). 정확 일치가 없을 때만 질문을 임베딩한다."""
+        for mode in modes:
+            hit = self.answer_cache.get(card_name, mode, question, version=version)
+            if hit is not None:
+                record_cache("answer_exact", True)
+                return mode, hit, None
+        record_cache("answer_exact", False)
+        query_vector = self._embed_query(question)
+        for mode in modes:
+            hit = self.answer_cache.get(card_name, mode, question, query_vector=query_vector, version=version)
+            if hit is not None:
+                record_cache("answer_semantic", True)
+                return mode, hit, query_vector
+        record_cache("answer_semantic", False)
+        return None, None, query_vector
+
+    def _schedule_easy_rewrite(self, card_name: str, question: str, detailed: dict, version: str) -> Future:
+        """캐시된 상세 답변을 백그라운드에서 쉬운 설명으로 재작성 (진행 중인 작업은 재사용).
+        완료되면 결과를 simple 모드 캐시에 저장한다."""
+        key = detailed["cache_key"]
+        with self._rewrite_lock:
+            future = self._easy_rewrites.get(key)
+            if future is not None:
+                return future
+            future = self._rewrite_executor.submit(
+                lambda answer: self._invoke_llm(self.rewrite_llm, self._rewrite_messages(answer), "llm_rewrite"),
+                detailed["answer"],
+            )
+            self._easy_rewrites[key] = future
+
+        def store(f: Future):
+            with self._rewrite_lock:
+                self._easy_rewrites.pop(key, None)
+            if f.exception() is None:
+                value = {"card_name": card_name, "answer": f.result(), "sources": detailed["sources"]}
+                self.answer_cache.put(card_name, "simple", question, value, detailed.get("question_vector"), version)
+
+        future.add_done_callback(store)
+        return future
+
     # -------- 카드 파일 찾기 --------
     def _find_card_json_path(self, card_name: str) -> Optional[str]:
         """카드 이름으로 JSON 파일 경로 찾기 (하위 폴더 재귀 + 부분 매칭)."""
-        print(f"🔍 '{card_name}' 카드의 JSON 파일 검색 중...")
+        logger.debug("🔍 카드 JSON 파일 검색", extra={"card": card_name})
         needle = _normalize_name(card_name)
 
         # 후보 (score, path)로 모아 가장 점수 높은 파일 선택
@@ -521,15 +925,15 @@ class FAISSRAGRetriever:
                             score += 5
                         candidates.append((score, full))
 
-        print(f"   🔎 검사한 JSON 파일 수: {total_checked}")
         if not candidates:
-            print("   ❌ 매칭 후보가 없습니다.")
+            logger.warning("❌ 매칭되는 카드 JSON이 없습니다", extra={"card": card_name, "checked": total_checked})
             self._show_available_cards_sample()
             return None
 
         candidates.sort(key=lambda x: x[0], reverse=True)
         best_score, best_path = candidates[0]
-        print(f"✅ 최적 매칭({best_score}): {best_path}")
+        logger.info("✅ 카드 JSON 매칭", extra={"card": card_name, "score": best_score, "path": best_path,
+                                                "checked": total_checked})
         return best_path
 
 
@@ -561,102 +965,593 @@ class FAISSRAGRetriever:
             print(f"   💡 총 {len(found_cards)}개 샘플 표시 (실제로는 더 많을 수 있음)")
 
     # -------- 카드별 준비/검색 --------
-    def _prepare_individual_card_data(self, card_name: str, json_path: str):
+    def _make_bundle(self, card_name: str, documents: list[Document], index, bm25: KoreanBM25Index,
+                     version_paths: list[str], doc_ids: Optional[list[int]] = None) -> CardBundle:
+        import faiss as faiss_lib
+
+        if doc_ids is None or len(doc_ids) == index.ntotal:
+            ids = np.arange(len(documents), dtype=np.int64)
+            selector = None
+        else:
+            ids = np.asarray(doc_ids, dtype=np.int64)
+            selector = faiss_lib.IDSelectorBatch(ids)
+        fields = np.array([documents[i].metadata.get("field", "etc") for i in ids], dtype=object)
+        field_ids = {f: ids[fields == f] for f in dict.fromkeys(fields)}
+        return {
+            "card_name": card_name,
+            "documents": documents,
+            "doc_ids": ids,
+            "index": index,
+            "selector": selector,
+            "field_ids": field_ids,
+            "bm25": bm25,
+            "version_paths": version_paths,
+        }
+
+    def _prepare_individual_card_data(self, card_name: str, json_path: str) -> CardBundle:
         documents = self.load_documents_field_level([json_path])
         if not documents:
             raise ValueError(f"'{card_name}' 카드의 문서가 비어 있습니다.")
 
+        from langchain_community.vectorstores import FAISS
+
         faiss_index = FAISS.from_documents(documents, self.embedding_model)
-        bm25 = BM25Retriever.from_documents(documents)
-        bm25.k = 60
-        return documents, faiss_index, bm25
-
-    def _prepare_card_data(self, card_name: str):
-        print(f"🔧 '{card_name}' 카드 데이터 준비 중...")
-
-        if card_name in self._document_cache:
-            print("💾 개별 카드 캐시 사용 중...")
-            return (
-                self._document_cache[card_name],
-                self._faiss_cache[card_name],
-                self._bm25_cache[card_name],
-            )
+        bm25 = KoreanBM25Index.build([d.page_content for d in documents])
+        return self._make_bundle(card_name, documents, faiss_index.index, bm25, [json_path])
+
+    def _prepare_card_data(self, card_name: str) -> CardBundle:
+        if card_name in self._bundle_cache:
+            record_cache("card_bundle", True)
+            return self._bundle_cache[card_name]
+        record_cache("card_bundle", False)
+        logger.info("🔧 카드 데이터 준비", extra={"card": card_name})
 
         json_path = self._find_card_json_path(card_name)
         if not json_path:
             raise ValueError(f"'{card_name}' 카드의 데이터를 찾을 수 없습니다.")
 
         category = self._get_card_category_from_path(json_path)
-        cat_docs, cat_faiss, cat_bm25 = self._load_category_embeddings(category)
+        with self._category_locks.setdefault(category, threading.Lock()):
+            cat_docs, cat_faiss, cat_bm25 = self._load_category_embeddings(category)
 
         if cat_docs is None:
-            print(f"⚠️ {category.upper()} 카테고리 임베딩이 없어 개별 처리합니다...")
-            docs, fidx, bidx = self._prepare_individual_card_data(card_name, json_path)
+            logger.warning("⚠️ 카테고리 임베딩이 없어 개별 처리합니다", extra={"card": card_name, "category": category})
+            bundle = self._prepare_individual_card_data(card_name, json_path)
         else:
             needle = _normalize_name(card_name)
-            card_docs = [d for d in cat_docs if _normalize_name(d.metadata.get("card_name","")) == needle]
-            if not card_docs:
+            names = self._catalog_arrays(category, cat_docs)["card_name"]
+            card_ids = [i for i, name in enumerate(names) if _normalize_name(name) == needle]
+            if not card_ids:
                 raise ValueError(f"카테고리 임베딩에 '{card_name}' 카드가 없습니다.")
-            fidx = FAISS.from_documents(card_docs, self.embedding_model)
-            bidx = BM25Retriever.from_documents(card_docs); bidx.k = 60
-            docs = card_docs
+            # 카테고리 FAISS/BM25 인덱스를 카드 문서 ID로만 제한 (재임베딩/재빌드 없음)
+            version_paths = [json_path, *self._category_version_paths(category)]
+            bundle = self._make_bundle(card_name, cat_docs, cat_faiss.index, cat_bm25, version_paths, card_ids)
 
-        self._document_cache[card_name] = docs
-        self._faiss_cache[card_name] = fidx
-        self._bm25_cache[card_name] = bidx
-        return docs, fidx, bidx
+        self._bundle_cache[card_name] = bundle
+        return bundle
 
     # -------- 질의 --------
-    def query(self, card_name: str, card_text: str, question: str, explain_easy: bool = False, top_k: int = 20) -> str:
-        print("\n" + "=" * 60)
-        print("🚀 질의응답 시작")
-        print(f"   - 카드명: {card_name}")
-        print(f"   - 질문: {question}")
-        print(f"   - 쉬운 설명: {explain_easy}")
-        print(f"   - Top-K: {top_k}")
-        print("=" * 60)
+    def _route_bundle(self, bundle: CardBundle, question: str) -> tuple[CardBundle, FieldRoute]:
+        """질문 필드 라우팅: 예측된 field 문서로만 제한한 번들 (확신도/문서 수가 부족하면 원래 번들)"""
+        import faiss as faiss_lib
+
+        route = route_question(question, min_confidence=self.route_min_confidence)
+        if not self.route_fields or route["fields"] is None:
+            return bundle, {**route, "fields": None}
+
+        parts = [bundle["field_ids"][f] for f in route["fields"] if f in bundle["field_ids"]]
+        ids = np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+        if len(ids) < self.route_min_docs or len(ids) == len(bundle["doc_ids"]):
+            return bundle, {**route, "fields": None}
+
+        logger.debug("🧭 필드 라우팅", extra={"routes": route["routes"], "fields": route["fields"],
+                                             "confidence": route["confidence"],
+                                             "docs": f"{len(ids)}/{len(bundle['doc_ids'])}"})
+        routed: CardBundle = {
+            **bundle,
+            "doc_ids": ids,
+            "selector": faiss_lib.IDSelectorBatch(ids),
+            "field_ids": {f: bundle["field_ids"][f] for f in route["fields"] if f in bundle["field_ids"]},
+        }
+        return routed, route
+
+    def _retrieve(self, bundle: CardBundle, question: str, top_k: int = 20,
+                  query_vector: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """FAISS + BM25 → RRF → Cross-Encoder 재랭킹. [(doc_id, score)] 반환"""
+        if query_vector is None:
+            query_vector = self._embed_query(question)
+        faiss_ids = self._dense_search(bundle, query_vector, k=60)
+        bm25_ids = self._lexical_search(bundle, question, k=60)
+
+        rrf_candidates = self.reciprocal_rank_fusion(faiss_ids, bm25_ids, limit=60)
+        ranked = self._rerank(bundle, question, rrf_candidates, top_k)
+        logger.debug("✅ 검색/재랭킹 완료", extra={"dense": len(faiss_ids), "bm25": len(bm25_ids),
+                                               "candidates": len(rrf_candidates), "selected": len(ranked)})
+        return ranked
+
+    def _initial_state(self, card_name: str, question: str, bundle: CardBundle,
+                       ranked: list[tuple[int, float]], explain_easy: bool,
+                       easy_mode: Optional[str] = None) -> GeneratorState:
+        return {
+            "card_name": card_name,
+            "user_question": question,
+            "documents": bundle["documents"],
+            "context_ids": [doc_id for doc_id, _ in ranked],
+            "context_tokens": 0,
+            "prompt": "",
+            "answer": "",
+            "simplified_answer": "",
+            "explain_easy": explain_easy,
+            "easy_mode": easy_mode or self.easy_mode,
+        }
+
+    def query(self, card_name: str, card_text: str, question: str, explain_easy: bool = False, top_k: int = 20,
+              easy_mode: Optional[str] = None) -> Union[dict, str]:
+        result: Union[dict, str] = f"❌ '{card_name}' 카드 질의응답 결과가 없습니다."
+        for ev in self.query_stream(card_name, card_text, question, explain_easy, top_k, easy_mode):
+            if ev["event"] in ("done", "error"):
+                result = ev["data"]
+        return result
+
+    async def aquery(self, card_name: str, card_text: str, question: str, explain_easy: bool = False,
+                     top_k: int = 20, easy_mode: Optional[str] = None,
+                     offload: Optional[Callable[..., Awaitable]] = None) -> Union[dict, str]:
+        result: Union[dict, str] = f"❌ '{card_name}' 카드 질의응답 결과가 없습니다."
+        async for ev in self.aquery_stream(card_name, card_text, question, explain_easy, top_k, easy_mode, offload):
+            if ev["event"] in ("done", "error"):
+                result = ev["data"]
+        return result
+
+    def _prepare_query(self, card_name: str, question: str, explain_easy: bool, top_k: int,
+                       easy_mode: Optional[str]) -> dict:
+        """생성 전 단계 (블로킹/CPU): 번들 준비 → 답변 캐시 조회 → 필드 라우팅 → FAISS/BM25/RRF/재랭킹.
+
+        캐시 적중이면 "hit"과 "answer"(또는 재작성 중인 Future "rewrite"), 아니면 그래프 입력 "state"를 담는다.
+        """
+        bundle = self._prepare_card_data(card_name)
+        version = self._card_version(bundle)
+        mode = "simple" if explain_easy else "detailed"
+        modes = ("simple", "detailed") if explain_easy else ("detailed",)
+        prepared = {"card_name": card_name, "question": question, "explain_easy": explain_easy,
+                    "mode": mode, "version": version}
+
+        hit_mode, hit, query_vector = self._lookup_answer(card_name, modes, question, version)
+        if hit is not None:
+            if hit_mode == mode:
+                logger.info("⚡ 답변 캐시 적중", extra={"card": card_name, "cache": hit["cache"],
+                                                    "similarity": hit["similarity"]})
+                prepared["answer"] = hit["answer"]
+            else:
+                # 같은 카드/질문의 상세 답변이 있으면 검색/생성 없이 재작성만 수행
+                logger.info("💾 캐시된 상세 답변으로 쉬운 설명 재작성", extra={"card": card_name})
+                prepared["rewrite"] = self._schedule_easy_rewrite(card_name, question, hit, version)
+            return {**prepared, "hit": hit, "sources": hit["sources"]}
+
+        routed, route = self._route_bundle(bundle, question)
+        ranked = self._retrieve(routed, question, top_k, query_vector)
+        # 재작성 모드의 쉬운 설명이면 재작성 노드의 출력이 최종 답변
+        state = self._initial_state(card_name, question, bundle, ranked, explain_easy, easy_mode)
+        answer_node = "RewriteAnswer" if (explain_easy and state["easy_mode"] == "rewrite") else "GenerateAnswer"
+        return {**prepared, "hit": None, "sources": self._sources(bundle["documents"], ranked),
+                "fields": route["fields"], "query_vector": query_vector, "state": state, "answer_node": answer_node}
+
+    @staticmethod
+    def _cached_events(prepared: dict, answer: str) -> list[dict]:
+        return [
+            {"event": "sources", "data": prepared["sources"]},
+            {"event": "token", "data": answer},
+            {"event": "done", "data": {"card_name": prepared["card_name"], "answer": answer,
+                                       "sources": prepared["sources"], "cached": True}},
+        ]
 
+    def _finish_query(self, prepared: dict, result: GeneratorState) -> dict:
+        """생성 결과를 답변 캐시에 저장하고 (필요하면 쉬운 설명 미리 생성) done 이벤트를 만든다"""
+        card_name, question, version = prepared["card_name"], prepared["question"], prepared["version"]
+        explain_easy = prepared["explain_easy"]
+        final_answer = result["simplified_answer"] if (explain_easy and result["simplified_answer"]) else result["answer"]
+        value = {"card_name": card_name, "answer": final_answer, "sources": prepared["sources"]}
+        key = self.answer_cache.put(card_name, prepared["mode"], question, value, prepared["query_vector"], version)
+        if not explain_easy and self.prefetch_easy:
+            self._schedule_easy_rewrite(card_name, question,
+                                        {**value, "cache_key": key, "question_vector": prepared["query_vector"]}, version)
+        logger.info("🎉 질의응답 완료", extra={"card": card_name, "answer_chars": len(final_answer),
+                                             "context_tokens": result["context_tokens"]})
+        return {"event": "done", "data": {**value, "cached": False, "context_tokens": result["context_tokens"],
+                                          "fields": prepared["fields"]}}
+
+    def query_stream(self, card_name: str, card_text: str, question: str, explain_easy: bool = False,
+                     top_k: int = 20, easy_mode: Optional[str] = None) -> Iterator[dict]:
+        """질의응답 이벤트 dict를 순서대로 yield 한다 (query()도 이 함수를 사용).
+
+        - {"event": "sources", "data": [...]}  : 검색/재랭킹 직후 (LLM 호출 전)
+        - {"event": "token", "data": "..."}    : 최종 답변을 만드는 노드의 토큰
+        - {"event": "done", "data": {...}}     : {"card_name", "answer", "sources", "cached", "fields"(검색한 field, None=전체)}
+        - {"event": "error", "data": "..."}
+        LLM 디스패처가 거절하면(LLMOverloaded) error 이벤트 대신 예외를 그대로 올린다.
+        """
+        logger.info("🚀 질의응답 시작", extra={"card": card_name, "question": question,
+                                             "explain_easy": explain_easy, "top_k": top_k})
         try:
-            documents, faiss_index, bm25 = self._prepare_card_data(card_name)
-
-            print("📊 문서 검색 및 랭킹 중...")
-            faiss_results = faiss_index.similarity_search(question, k=60)
-            bm25_results = bm25.get_relevant_documents(question)
-
-            rrf_candidates = self.reciprocal_rank_fusion(faiss_results, bm25_results)
-            print(f"🔄 Cross-Encoder 재랭킹 실행... (총 {len(rrf_candidates)}개 후보)")
-            inputs = [(question, chunk) for chunk in rrf_candidates]
-            scores = self.reranker.predict(inputs)
-            reranked_chunks = [x for _, x in sorted(zip(scores, rrf_candidates), reverse=True)]
-            top_chunks = reranked_chunks[:top_k]
-            print(f"✅ 재랭킹 완료 - 최종 {len(top_chunks)}개 청크 선택")
-
-            initial_state: GeneratorState = {
-                "card_name": card_name,
-                "user_question": question,
-                "context_chunks": top_chunks,
-                "prompt": "",
-                "answer": "",
-                "simplified_answer": "",
-                "explain_easy": explain_easy,
-            }
-            result = self.graph.invoke(initial_state)
-
-            final_answer = result["simplified_answer"] if (explain_easy and result["simplified_answer"]) else result["answer"]
-            print(f"🎉 질의응답 완료! (최종 답변 길이: {len(final_answer)}자)")
-            return final_answer
+            prepared = self._prepare_query(card_name, question, explain_easy, top_k, easy_mode)
+            if prepared["hit"] is not None:
+                answer = prepared["rewrite"].result() if "rewrite" in prepared else prepared["answer"]
+                yield from self._cached_events(prepared, answer)
+                return
+
+            yield {"event": "sources", "data": prepared["sources"]}
+            result = prepared["state"]
+            for stream_mode, payload in self.graph.stream(prepared["state"], stream_mode=["messages", "values"]):
+                if stream_mode == "messages":
+                    chunk, meta = payload
+                    if meta.get("langgraph_node") == prepared["answer_node"] and chunk.content:
+                        yield {"event": "token", "data": chunk.content}
+                else:
+                    result = payload
+            yield self._finish_query(prepared, result)
+        except LLMOverloaded:
+            raise  # 입장 제어 거절은 호출자(웹 앱)가 429/503 + Retry-After로 응답
         except Exception as e:
             msg = f"❌ '{card_name}' 카드 질의응답 중 오류가 발생했습니다: {e}"
-            print(msg)
-            return msg
+            logger.exception(msg)
+            yield {"event": "error", "data": msg}
+
+    async def aquery_stream(self, card_name: str, card_text: str, question: str, explain_easy: bool = False,
+                            top_k: int = 20, easy_mode: Optional[str] = None,
+                            offload: Optional[Callable[..., Awaitable]] = None) -> AsyncIterator[dict]:
+        """query_stream의 비동기 버전 (웹 앱용, 이벤트 형식 동일).
+
+        검색/재랭킹만 offload(fn, *args)로 스레드에서 실행하고(기본 asyncio.to_thread, 웹 앱은 작업 스레드 풀),
+        LLM 생성은 async 그래프(ainvoke)로 이벤트 루프에서 스트리밍한다 → 생성 중에는 작업 스레드를 점유하지 않는다.
+        """
+        offload = offload or asyncio.to_thread
+        logger.info("🚀 질의응답 시작", extra={"card": card_name, "question": question,
+                                             "explain_easy": explain_easy, "top_k": top_k})
+        try:
+            prepared = await offload(self._prepare_query, card_name, question, explain_easy, top_k, easy_mode)
+            if prepared["hit"] is not None:
+                if "rewrite" in prepared:
+                    # shield: 연결이 끊겨도 다른 요청과 공유하는 재작성 작업은 취소하지 않음
+                    answer = await asyncio.shield(asyncio.wrap_future(prepared["rewrite"]))
+                else:
+                    answer = prepared["answer"]
+                for ev in self._cached_events(prepared, answer):
+                    yield ev
+                return
+
+            yield {"event": "sources", "data": prepared["sources"]}
+            result = prepared["state"]
+            async for stream_mode, payload in self.agraph.astream(prepared["state"], stream_mode=["messages", "values"]):
+                if stream_mode == "messages":
+                    chunk, meta = payload
+                    if meta.get("langgraph_node") == prepared["answer_node"] and chunk.content:
+                        yield {"event": "token", "data": chunk.content}
+                else:
+                    result = payload
+            yield self._finish_query(prepared, result)
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            msg = f"❌ '{card_name}' 카드 질의응답 중 오류가 발생했습니다: {e}"
+            logger.exception(msg)
+            yield {"event": "error", "data": msg}
+
+    # -------- 여러 카드 비교 질의 --------
+    def build_comparison_prompt(self, card_contexts: list[tuple[str, str]], user_question: str,
+                                explain_easy: bool = False) -> str:
+        blocks = "\n\n".join(f"### [{name}]\n{context or '(검색된 문서 없음)'}" for name, context in card_contexts)
+        names = ", ".join(name for name, _ in card_contexts)
+        prompt = f"""
+당신은 여러 신용카드/체크카드의 약관 및 상품설명서를 근거로 **카드별 차이를 정확하게 비교**하는 AI 전문가입니다.
+
+비교 대상 카드: {names}
+
+아래는 각 카드의 문서에서 질문과 관련해 추출된 내용입니다 (카드별로 구분되어 있습니다):
+
+[카드별 문서 내용]
+{blocks}
+
+[사용자 질문]
+{user_question}
+
+[응답 조건]
+1. 반드시 **각 카드의 문서 내용에만 근거**하여 답변하고, 한 카드의 내용을 다른 카드에 섞지 마세요.
+2. 질문 항목별로 카드들을 나란히 비교하고(가능하면 표 사용), **정확한 수치, 조건, 문구**를 반영하세요.
+3. 비교 후 어떤 사용자에게 어떤 카드가 유리한지 짧게 정리하세요.
+4. 특정 카드의 문서에 정보가 없으면 해당 칸에 "문서에 명시된 정보가 없습니다."라고 쓰고, **절대 거짓 정보를 지어내서는 안됩니다.**
+""".strip()
+        if explain_easy:
+            prompt += f"""
+
+[쉬운 설명 조건]
+위 조건을 모두 지키면서, 아래 기준에 따라 작성하세요:
+{EASY_STYLE_RULES}
+""".rstrip()
+        return prompt
+
+    def _retrieve_card_context(self, card_name: str, question: str, query_vector: np.ndarray,
+                               top_k: int, budget_tokens: int) -> dict:
+        """카드 1장: 번들 준비 → 필드 라우팅 → 검색/재랭킹 → 컨텍스트 패킹 (스레드 풀에서 실행)"""
+        bundle = self._prepare_card_data(card_name)
+        routed, route = self._route_bundle(bundle, question)
+        ranked = self._retrieve(routed, question, top_k, query_vector)
+        packed = pack_context(bundle["documents"], [doc_id for doc_id, _ in ranked], budget_tokens=budget_tokens)
+        return {
+            "card_name": card_name,
+            "sources": self._sources(bundle["documents"], ranked),
+            "context": packed["text"],
+            "context_tokens": packed["tokens_used"],
+            "fields": route["fields"],
+        }
+
+    def query_multi(self, card_names: list[str], question: str, explain_easy: bool = False,
+                    top_k: int = 8) -> Union[dict, str]:
+        result: Union[dict, str] = "❌ 카드 비교 질의응답 결과가 없습니다."
+        for ev in self.query_multi_stream(card_names, question, explain_easy, top_k):
+            if ev["event"] in ("done", "error"):
+                result = ev["data"]
+        return result
+
+    async def aquery_multi(self, card_names: list[str], question: str, explain_easy: bool = False,
+                           top_k: int = 8, offload: Optional[Callable[..., Awaitable]] = None) -> Union[dict, str]:
+        result: Union[dict, str] = "❌ 카드 비교 질의응답 결과가 없습니다."
+        async for ev in self.aquery_multi_stream(card_names, question, explain_easy, top_k, offload):
+            if ev["event"] in ("done", "error"):
+                result = ev["data"]
+        return result
+
+    def _prepare_multi(self, card_names: list[str], question: str, explain_easy: bool, top_k: int) -> dict:
+        """생성 전 단계 (블로킹/CPU): 질문 임베딩 1회 → 카드별 검색/재랭킹 병렬 → 비교 프롬프트 메시지"""
+        from langchain.schema import SystemMessage, HumanMessage
+
+        # 질문 임베딩은 한 번만 (모든 카드가 같은 bge-m3 공간을 사용)
+        query_vector = self._embed_query(question)
+        budget = max(600, self.context_token_budget // len(card_names))
+        futures = {
+            name: self._multi_executor.submit(self._retrieve_card_context, name, question, query_vector, top_k, budget)
+            for name in card_names
+        }
+
+        contexts, errors = [], {}
+        for name, future in futures.items():
+            try:
+                contexts.append(future.result())
+            except Exception as e:
+                logger.warning("⚠️ 카드 검색 실패", extra={"card": name, "error": str(e)})
+                errors[name] = str(e)
+        if not contexts:
+            return {"contexts": [], "errors": errors}
+
+        prompt = self.build_comparison_prompt([(c["card_name"], c["context"]) for c in contexts],
+                                              question, explain_easy)
+        messages = [
+            SystemMessage(content="당신은 여러 카드의 문서 기반 비교 응답을 정확하게 생성하는 전문가입니다."),
+            HumanMessage(content=prompt),
+        ]
+        return {"contexts": contexts, "errors": errors, "messages": messages,
+                "sources": {c["card_name"]: c["sources"] for c in contexts}}
+
+    @staticmethod
+    def _multi_done(prepared: dict, parts: list[str]) -> dict:
+        contexts = prepared["contexts"]
+        return {"event": "done", "data": {
+            "card_names": [c["card_name"] for c in contexts],
+            "answer": "".join(parts).strip(),
+            "sources": prepared["sources"],
+            "errors": prepared["errors"],
+            "context_tokens": sum(c["context_tokens"] for c in contexts),
+        }}
+
+    def query_multi_stream(self, card_names: list[str], question: str, explain_easy: bool = False,
+                           top_k: int = 8) -> Iterator[dict]:
+        """여러 카드 비교 질의. 카드별 검색은 병렬로, 생성은 비교 프롬프트 1회.
+
+        - {"event": "sources", "data": {카드명: [...]}}
+        - {"event": "token", "data": "..."}
+        - {"event": "done", "data": {"card_names", "answer", "sources", "errors", "context_tokens"}}
+        - {"event": "error", "data": "..."}
+        """
+        card_names = list(dict.fromkeys(n.strip() for n in card_names if n and n.strip()))
+        if len(card_names) < 2:
+            yield {"event": "error", "data": "❌ 비교할 카드를 2개 이상 지정해 주세요."}
+            return
+
+        logger.info("🚀 카드 비교 질의응답 시작", extra={"cards": card_names, "question": question})
+        try:
+            prepared = self._prepare_multi(card_names, question, explain_easy, top_k)
+            if not prepared["contexts"]:
+                yield {"event": "error", "data": f"❌ 비교할 카드의 문서를 찾지 못했습니다: {prepared['errors']}"}
+                return
+            yield {"event": "sources", "data": prepared["sources"]}
+
+            messages = prepared["messages"]
+            parts, usage = [], None
+            tokens = estimate_tokens(messages, self.llm.max_tokens)
+            with get_dispatcher().slot(self.llm.model_name, tokens, "llm_compare") as ticket:
+                # 토큰 전달(yield) 중 소비자 쪽 시간은 빼고 LLM 스트림을 기다린 시간만 기록
+                for chunk in timed_stream(self.llm.stream(messages), "original_rag", "llm_compare"):
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield {"event": "token", "data": chunk.content}
+                ticket.record(usage)
+            record_llm("llm_compare", self.llm.model_name, usage)
+            yield self._multi_done(prepared, parts)
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            msg = f"❌ 카드 비교 질의응답 중 오류가 발생했습니다: {e}"
+            logger.exception(msg)
+            yield {"event": "error", "data": msg}
+
+    async def aquery_multi_stream(self, card_names: list[str], question: str, explain_easy: bool = False,
+                                  top_k: int = 8, offload: Optional[Callable[..., Awaitable]] = None) -> AsyncIterator[dict]:
+        """query_multi_stream의 비동기 버전: 검색은 offload로 스레드에서, 비교 답변 생성은 astream으로 이벤트 루프에서"""
+        offload = offload or asyncio.to_thread
+        card_names = list(dict.fromkeys(n.strip() for n in card_names if n and n.strip()))
+        if len(card_names) < 2:
+            yield {"event": "error", "data": "❌ 비교할 카드를 2개 이상 지정해 주세요."}
+            return
+
+        logger.info("🚀 카드 비교 질의응답 시작", extra={"cards": card_names, "question": question})
+        try:
+            prepared = await offload(self._prepare_multi, card_names, question, explain_easy, top_k)
+            if not prepared["contexts"]:
+                yield {"event": "error", "data": f"❌ 비교할 카드의 문서를 찾지 못했습니다: {prepared['errors']}"}
+                return
+            yield {"event": "sources", "data": prepared["sources"]}
+
+            messages = prepared["messages"]
+            parts, usage = [], None
+            tokens = estimate_tokens(messages, self.llm.max_tokens)
+            async with get_dispatcher().aslot(self.llm.model_name, tokens, "llm_compare") as ticket:
+                async for chunk in atimed_stream(self.llm.astream(messages), "original_rag", "llm_compare"):
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield {"event": "token", "data": chunk.content}
+                ticket.record(usage)
+            record_llm("llm_compare", self.llm.model_name, usage)
+            yield self._multi_done(prepared, parts)
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            msg = f"❌ 카드 비교 질의응답 중 오류가 발생했습니다: {e}"
+            logger.exception(msg)
+            yield {"event": "error", "data": msg}
+
+    # -------- 카탈로그 전체 약관 검색 --------
+    def _catalog_arrays(self, category: str, documents: list[Document]) -> dict[str, np.ndarray]:
+        if category not in self._catalog_meta:
+            # 공유 아티팩트(SharedDocumentStore)는 저장된 메타데이터 열을 쓰고 Document를 만들지 않는다
+            column = getattr(documents, "column", None)
+            self._catalog_meta[category] = {
+                key: np.array(column(key) if column else [d.metadata.get(key, "") for d in documents], dtype=object)
+                for key in ("card_name", "field", "keyword")
+            }
+        return self._catalog_meta[category]
+
+    def search_catalog(self, question: str, card_type: str = "all", fields: Optional[list[str]] = None,
+                       card_names: Optional[list[str]] = None, keywords: Optional[list[str]] = None,
+                       top_n_per_card: int = 3, max_cards: int = 10, candidates: int = 200,
+                       rerank_top: int = 100) -> dict:
+        """카테고리 전체 FAISS + BM25 인덱스에서 여러 카드의 약관 청크를 검색해 카드별로 묶는다.
+
+        fields/card_names/keywords: 메타데이터 필터 (fields가 없으면 질문 필드 라우팅 결과 사용)
+        반환: {"fields", "cards": [{"card_name", "card_type", "keyword", "score", "chunks": [...]}]}
+        """
+        import faiss as faiss_lib
+
+        categories = ["credit", "check"] if card_type == "all" else [card_type]
+        if fields is None and self.route_fields:
+            fields = route_question(question, min_confidence=self.route_min_confidence)["fields"]
+        wanted_cards = {_normalize_name(n) for n in card_names} if card_names else None
+
+        query_vector = self._embed_query(question)
+        pool: list[tuple[str, int, float]] = []  # (category, doc_id, rrf score)
+        corpora: dict[str, list[Document]] = {}
+        for category in categories:
+            with self._category_locks.setdefault(category, threading.Lock()):
+                documents, faiss_index, bm25 = self._load_category_embeddings(category)
+            if documents is None:
+                continue
+            corpora[category] = documents
+
+            # 메타데이터 필터 → 허용 문서 ID (필터가 없으면 전체)
+            arrays = self._catalog_arrays(category, documents)
+            mask = np.ones(len(documents), dtype=bool)
+            if fields:
+                mask &= np.isin(arrays["field"], fields)
+            if keywords:
+                mask &= np.isin(arrays["keyword"], keywords)
+            if wanted_cards is not None:
+                mask &= np.array([_normalize_name(n) in wanted_cards for n in arrays["card_name"]], dtype=bool)
+            if not mask.any():
+                continue
+
+            if mask.all():
+                allowed, params = None, None
+            else:
+                allowed = np.flatnonzero(mask).astype(np.int64)
+                params = faiss_lib.SearchParameters(sel=faiss_lib.IDSelectorBatch(allowed))
+            k = min(candidates, int(mask.sum()))
+            with stage("catalog", "faiss"):
+                _, ids = faiss_index.index.search(query_vector, k, params=params)
+            dense_ids = [int(i) for i in ids[0] if i >= 0]
+            with stage("catalog", "bm25"):
+                bm25_ids = [doc_id for doc_id, _ in bm25.search(question, k=k, doc_ids=allowed)]
+
+            fused = self.reciprocal_rank_fusion(dense_ids, bm25_ids, limit=rerank_top)
+            pool.extend((category, doc_id, 1.0 / (rank + 1)) for rank, doc_id in enumerate(fused))
+
+        # 카테고리를 합친 상위 후보만 Cross-Encoder로 재채점 (카테고리 간 점수 비교 가능)
+        pool.sort(key=lambda x: x[2], reverse=True)
+        pool = pool[:rerank_top]
+        if pool:
+            with stage("catalog", "rerank"):
+                scores = self.reranker.predict([(question, corpora[c][i].page_content) for c, i, _ in pool])
+            pool = sorted(((c, i, float(s)) for (c, i, _), s in zip(pool, scores)), key=lambda x: x[2], reverse=True)
+
+        grouped: dict[str, dict] = {}
+        for category, doc_id, score in pool:
+            doc = corpora[category][doc_id]
+            meta = doc.metadata
+            name = meta.get("card_name", "")
+            if name not in grouped:
+                if len(grouped) >= max_cards:
+                    continue
+                grouped[name] = {"card_name": name, "card_type": meta.get("card_type", category),
+                                 "keyword": meta.get("keyword", ""), "score": round(score, 4), "chunks": []}
+            chunks = grouped[name]["chunks"]
+            if len(chunks) < top_n_per_card:
+                chunks.append({
+                    "doc_id": doc_id,
+                    "heading": meta.get("heading", ""),
+                    "subheading": meta.get("subheading", ""),
+                    "field": meta.get("field", ""),
+                    "score": round(score, 4),
+                    "text": chunk_body(doc.page_content),
+                })
+        logger.info("🗂️ 카탈로그 검색", extra={"candidates": len(pool), "cards": len(grouped), "fields": fields})
+        return {"fields": fields, "cards": list(grouped.values())}
+
+    # -------- 워밍업 --------
+    def warm_up(self, question: str = "연회비와 해외 이용 수수료", categories: tuple[str, ...] = ("credit", "check")) -> dict:
+        """배포 직후 첫 요청의 지연을 없애기 위해 카테고리 인덱스(FAISS/BM25/메타데이터)를 미리 로드하고
+        합성 질의로 임베딩 → FAISS → BM25 → RRF → 재랭킹을 한 번씩 실행한다 (LLM 호출 없음).
+        반환: {"documents": {카테고리: 문서 수}, "missing": [로드하지 못한 카테고리], "seconds": {단계: 초}}
+        카테고리 인덱스를 하나도 로드하지 못하면 RuntimeError (readiness가 실제로 미리 로드한 것을 반영하도록)."""
+        seconds: dict[str, float] = {}
+        documents: dict[str, int] = {}
+        for category in categories:
+            start = time.perf_counter()
+            with self._category_locks.setdefault(category, threading.Lock()):
+                docs, _, _ = self._load_category_embeddings(category)
+            if docs is not None:
+                self._catalog_arrays(category, docs)
+            documents[category] = len(docs) if docs else 0
+            seconds[f"index_{category}"] = round(time.perf_counter() - start, 3)
+
+        missing = [category for category, count in documents.items() if not count]
+        if len(missing) == len(documents):
+            raise RuntimeError(f"카테고리 인덱스를 하나도 로드하지 못했습니다 ({', '.join(missing)}): "
+                               f"{self.embeddings_dir} 또는 SHARED_ARTIFACTS_DIR를 확인하세요")
+        if missing:
+            logger.warning("⚠️ 일부 카테고리 인덱스 없이 워밍업", extra={"missing": missing})
+
+        # 첫 추론은 모델 그래프/스레드 풀 초기화 비용이 크므로 합성 질의로 미리 치른다
+        start = time.perf_counter()
+        self.search_catalog(question, card_type="all", max_cards=1, candidates=20, rerank_top=8)
+        seconds["synthetic_query"] = round(time.perf_counter() - start, 3)
+        logger.info("🔥 Original RAG 워밍업 완료", extra={"documents": documents, "seconds": seconds})
+        return {"documents": documents, "missing": missing, "seconds": seconds}
 
     # -------- 기타 --------
     def clear_cache(self):
-        print("🗑️ 캐시 클리어 중...")
-        self._document_cache.clear()
-        self._faiss_cache.clear()
-        self._bm25_cache.clear()
-        print("✅ 캐시가 클리어되었습니다.")
+        self._bundle_cache.clear()
+        self._category_cache.clear()
+        self._catalog_meta.clear()
+        self.answer_cache.clear()
+        logger.info("🗑️ 캐시가 클리어되었습니다")
 
     def list_available_embeddings(self):
         print(f"📁 임베딩 디렉토리: {self.embeddings_dir}")
@@ -692,9 +1587,14 @@ if __name__ == "__main__":
     q = "이 카드의 연회비는 얼마인가요?"
     try:
         print("\n🔍 기본 답변 테스트")
-        print(rag.query(card_name=test_card, card_text="", question=q))
+        resp = rag.query(card_name=test_card, card_text="", question=q)
+        print(resp["answer"] if isinstance(resp, dict) else resp)
+        if isinstance(resp, dict):
+            for src in resp["sources"][:5]:
+                print(f"   📎 [{src['field']}] {src['heading']} - {src['subheading']}")
 
         print("\n🔍 쉬운 설명 테스트")
-        print(rag.query(card_name=test_card, card_text="", question=q, explain_easy=True))
+        resp = rag.query(card_name=test_card, card_text="", question=q, explain_easy=True)
+        print(resp["answer"] if isinstance(resp, dict) else resp)
     except Exception as e:
         print(f"❌ 테스트 실행 중 오류: {e}")
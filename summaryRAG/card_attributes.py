@@ -0,0 +1,188 @@
+# card_attributes.py
+"""Summary RAG 카드 속성 추출 (인덱스 빌드 시 1회 실행).
+
+card_text("카드명: ... | 혜택: a, b | 조건: ... | 연회비: ...")에서
+연회비/혜택/할인/조건을 뽑아 숫자를 정규화한다.
+- 금액은 원 단위 정수 (1,500원 → 1500, 1.5만 원 → 15000, 2천 원 → 2000, 1만 4천 원 → 14000)
+- 연회비는 카드 종류별 금액(annual_fee_tiers)을 따로 두고, annual_fee_won은 기본(국내전용/일반) 카드 금액
+- 비율은 float (%)
+- 월 한도, 전월 실적 기준은 원 단위 정수
+결과는 임베딩 메타데이터 사이드카(*_card_metadata.json / pkl)의 'attributes'로 저장되고,
+요청 처리 시에는 조회만 한다.
+"""
+import re
+from typing import Optional
+
+
+# card_text 파싱
+FIELD_SEPARATOR = re.compile(r'\s*\|\s*')
+# 괄호 안의 콤마와 천 단위 구분 콤마(1,500원)는 분리하지 않음
+ITEM_SEPARATOR = re.compile(r',(?!\d{3}(?!\d))\s*(?![^()\[\]]*[)\]])')
+
+# 금액/비율
+AMOUNT = r'(?:\d[\d,]*\s*만\s*)?\d[\d,]*(?:\.\d+)?\s*(?:만|천)?\s*원'  # 다른 패턴에 끼워 쓰는 금액 (그룹 없음)
+WON = re.compile(r'(?:(\d[\d,]*)\s*만\s*)?(\d[\d,]*(?:\.\d+)?)\s*(만|천)?\s*원')
+PERCENT = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+# 할인/캐시백 (기존 extract_benefits_from_text 패턴)
+DISCOUNT_PERCENT_PATTERNS = [
+    re.compile(r'(\d+(?:\.\d+)?)%\s*할인'),
+    re.compile(r'할인\s*(\d+(?:\.\d+)?)%'),
+    re.compile(r'(\d+(?:\.\d+)?)%\s*캐시백'),
+    re.compile(r'캐시백\s*(\d+(?:\.\d+)?)%'),
+]
+DISCOUNT_WON_PATTERNS = [
+    re.compile(r'(\d+(?:,\d+)?)원\s*할인'),
+    re.compile(r'할인\s*(\d+(?:,\d+)?)원'),
+    re.compile(r'(\d+(?:,\d+)?)원\s*캐시백'),
+    re.compile(r'캐시백\s*(\d+(?:,\d+)?)원'),
+]
+ANNUAL_FEE = re.compile(r'연회비[:\s]*([0-9,]+)원?')
+
+# 월 한도 / 전월 실적
+# '월 최대/한도/할인 한도 N원' 또는 '월 N만 원까지' (까지가 금액 바로 뒤에 와야 함 → 절 경계를 넘지 않음)
+MONTHLY_CAP = re.compile(
+    rf'(?<!전)월\s*(?:합산\s*)?(?:(?:최대|할인\s*한도|한도)\s*(?P<limit>{AMOUNT})|(?P<until>{AMOUNT})\s*까지)'
+)
+PREV_MONTH_SPEND = re.compile(rf'전월\s*(?:이용\s*)?(?:실적\s*)?({AMOUNT})\s*이상')
+AT_LEAST = re.compile(r'\s*이상')
+BENEFIT_VERB = re.compile(r'\s*(?:할인|캐시백|환급|적립|청구할인|결제일할인)')
+NO_FEE = re.compile(r'연회비\s*(?:없음|무료|면제)|^\s*(?:없음|무료)')
+
+# 연회비 종류 (금액 앞 라벨로 구분)
+PARENS = re.compile(r'\([^()]*\)')
+FEE_LABEL_NOISE = re.compile(r'연회비|이며|이고')
+TOTAL_FEE_LABEL = re.compile(r'총|합계')
+BASE_FEE_LABEL = re.compile(r'국내\s*전용|국내용|국내(?!\s*외)|local', re.I)
+SECONDARY_FEE_LABEL = re.compile(r'가족|모바일|제휴')
+
+_UNITS = {'만': 10000, '천': 1000}
+
+
+def _won_value(m: re.Match) -> int:
+    man = float(m.group(1).replace(',', '')) * 10000 if m.group(1) else 0
+    return int(round(man + float(m.group(2).replace(',', '')) * _UNITS.get(m.group(3), 1)))
+
+
+def parse_won(text: str) -> Optional[int]:
+    """'1,500원' / '1.5만 원' / '2천 원' / '1만 4천 원' → 원 단위 정수 (없으면 None)"""
+    m = WON.search(text or '')
+    return _won_value(m) if m else None
+
+
+def won_amounts(text: str) -> list[int]:
+    return [_won_value(m) for m in WON.finditer(text or '')]
+
+
+def parse_card_text(card_text: str) -> dict[str, str]:
+    """'라벨: 값 | 라벨: 값' 형식의 card_text를 dict로 변환"""
+    fields = {}
+    for part in FIELD_SEPARATOR.split(card_text or ''):
+        label, sep, value = part.partition(':')
+        if sep:
+            fields[label.strip()] = value.strip()
+    return fields
+
+
+def split_items(value: str) -> list[str]:
+    return [item.strip() for item in ITEM_SEPARATOR.split(value or '') if item.strip()]
+
+
+def discount_labels(card_text: str) -> list[str]:
+    """기존 표기('10% 할인/캐시백', '1,500원 할인/캐시백') 목록"""
+    labels = []
+    for pattern in DISCOUNT_PERCENT_PATTERNS:
+        labels.extend(f"{m}% 할인/캐시백" for m in pattern.findall(card_text))
+    for pattern in DISCOUNT_WON_PATTERNS:
+        labels.extend(f"{m}원 할인/캐시백" for m in pattern.findall(card_text))
+    return labels
+
+
+def annual_fee_text(card_text: str) -> str:
+    m = ANNUAL_FEE.search(card_text or '')
+    return m.group(1) + "원" if m else "연회비 정보 없음"
+
+
+def fee_tiers(fee_text: str) -> list[dict]:
+    """연회비 문구 → [{'label', 'won'}] (카드 종류별 금액).
+    괄호 안 세부 금액(기본+제휴 내역)과 'N원 이상 사용 시 면제' 같은 조건 금액은 제외한다."""
+    tiers, start = [], 0
+    for m in WON.finditer(fee_text or ''):
+        inside_parens = fee_text.count('(', 0, m.start()) > fee_text.count(')', 0, m.start())
+        if inside_parens or AT_LEAST.match(fee_text, m.end()):
+            continue
+        label = fee_text[start:m.start()]
+        while PARENS.search(label):  # 중첩 괄호까지 제거
+            label = PARENS.sub(' ', label)
+        label = ' '.join(FEE_LABEL_NOISE.sub(' ', label).split()).strip(' ,.;:·()')
+        tiers.append({'label': label, 'won': _won_value(m)})
+        start = m.end()
+    return tiers
+
+
+def base_annual_fee(tiers: list[dict]) -> Optional[int]:
+    """기본 카드 연회비: 가족/모바일 단독/제휴 금액을 뺀 뒤 총액(기본+제휴 합계) → 국내전용 → 처음 나온 금액"""
+    primary = [t for t in tiers if not SECONDARY_FEE_LABEL.search(t['label'])] or tiers
+    for tier in primary:
+        if TOTAL_FEE_LABEL.search(tier['label']):
+            return tier['won']
+    for tier in primary:
+        if BASE_FEE_LABEL.search(tier['label']):
+            return tier['won']
+    return primary[0]['won'] if primary else None
+
+
+def _cap_group(cap: re.Match) -> str:
+    return 'limit' if cap.group('limit') else 'until'
+
+
+def monthly_caps(text: str) -> list[int]:
+    return [parse_won(m.group(_cap_group(m))) for m in MONTHLY_CAP.finditer(text or '')]
+
+
+def _benefit(text: str) -> dict:
+    percents = [float(p) for p in PERCENT.findall(text)]
+    cap = MONTHLY_CAP.search(text)
+    cap_start, cap_end = cap.span(_cap_group(cap)) if cap else (0, 0)
+    # 월 한도·'N원 이상' 결제 기준 금액을 제외하고, 할인/환급 동사가 붙은 금액을 우선한다
+    amounts = [m for m in WON.finditer(text)
+               if (not cap or m.end() <= cap_start or m.start() >= cap_end) and not AT_LEAST.match(text, m.end())]
+    amounts.sort(key=lambda m: not BENEFIT_VERB.match(text, m.end()))
+    return {
+        'text': text,
+        'percent': max(percents) if percents else None,
+        'won': parse_won(amounts[0].group(0)) if amounts else None,
+        'monthly_cap_won': parse_won(cap.group(_cap_group(cap))) if cap else None,
+    }
+
+
+def extract_card_attributes(card_text: str) -> dict:
+    """card_text 1건 → 정규화된 비교용 속성 (JSON 직렬화 가능)"""
+    fields = parse_card_text(card_text)
+    fee_text = fields.get('연회비', '')
+    if not fee_text or '정보 없음' in fee_text:
+        fee_text = annual_fee_text(card_text)
+    tiers = fee_tiers(fee_text)
+    no_fee = bool(NO_FEE.search(fee_text))
+
+    benefits = [_benefit(b) for b in split_items(fields.get('혜택', ''))]
+    conditions = split_items(fields.get('조건', ''))
+
+    percents = [b['percent'] for b in benefits if b['percent'] is not None]
+    caps = [b['monthly_cap_won'] for b in benefits if b['monthly_cap_won'] is not None]
+    caps += monthly_caps(fields.get('조건', ''))
+    spends = [parse_won(m) for m in PREV_MONTH_SPEND.findall(card_text or '')]
+
+    return {
+        'brand': fields.get('브랜드', ''),
+        'target_user': fields.get('발급대상', ''),
+        'annual_fee': fee_text,
+        'annual_fee_won': 0 if no_fee and not tiers else base_annual_fee(tiers),
+        'annual_fee_tiers': tiers,
+        'benefits': benefits,
+        'conditions': conditions,
+        'discounts': list(dict.fromkeys(discount_labels(card_text or ''))),
+        'max_discount_percent': max(percents) if percents else None,
+        'max_monthly_cap_won': max(caps) if caps else None,
+        'min_prev_month_spend_won': min(spends) if spends else None,
+    }
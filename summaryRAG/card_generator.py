@@ -1,14 +1,53 @@
 import json
-from openai import OpenAI
+import time
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 import os
 from datetime import datetime
-import re # 정규 표현식 모듈 추가
+
+from card_attributes import annual_fee_text, discount_labels, extract_card_attributes
+from response_cache import ResponseCache, make_key
+from selection_store import SelectionStore
+from llm_dispatcher import estimate_tokens, get_dispatcher
+from telemetry import get_logger, record_llm, stage
+
+logger = get_logger('card_generator')
+
+# 프롬프트(build_*_messages)를 바꾸면 버전을 올려 이전 캐시 응답을 무효화
+RESPONSE_PROMPT_VERSION = "response-v1"
+COMPARISON_PROMPT_VERSION = "comparison-v1"
+
+COMPARISON_COLUMNS = [
+    ('card_name', '카드'),
+    ('card_type', '유형'),
+    ('annual_fee', '연회비'),
+    ('key_benefits', '주요 혜택'),
+    ('discounts', '할인/캐시백'),
+    ('conditions', '조건'),
+]
 
 class CardGenerator:
-    def __init__(self):
-        """카드 답변 생성기 초기화"""
+    def __init__(self, model="gpt-4o", cache_ttl_seconds=6 * 3600, cache_max_entries=2048, cache_path=None):
+        """카드 답변 생성기 초기화
+
+        cache_path: LLM 응답 캐시 JSONL 경로 (None이면 환경변수 CARD_RESPONSE_CACHE_PATH, 없으면 메모리만 사용)
+        """
+        self.model = model
+        self.response_cache = ResponseCache(
+            ttl_seconds=cache_ttl_seconds,
+            max_entries=cache_max_entries,
+            path=cache_path or os.getenv('CARD_RESPONSE_CACHE_PATH') or None,
+            name='card_generator',
+        )
         self.client = None
+        self.async_client = None  # 비동기 오케스트레이션용 (처음 사용할 때 생성)
         self.selected_cards = []  # 선택된 카드들을 저장할 리스트
+        # 선택 기록: SQLite(WAL) append-only 저장소 (기존 selected_cards.json은 처음 열 때 이전)
+        self.selection_store = SelectionStore(
+            os.getenv('SELECTED_CARDS_DB') or 'selected_cards.db',
+            legacy_json='selected_cards.json',
+        )
+        self._attribute_cache = {}  # 사이드카에 attributes가 없는 이전 인덱스용: (카드명, card_text) -> 속성
         self.init_openai_client()
     
     def init_openai_client(self):
@@ -21,8 +60,14 @@ class CardGenerator:
         
         self.client = OpenAI(api_key=api_key)
     
-    def generate_response(self, question, search_results, card_type="all"):
-        """검색 결과를 바탕으로 답변 생성"""
+    def init_async_client(self):
+        """AsyncOpenAI 클라이언트 (같은 이벤트 루프에서 재사용)"""
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        return self.async_client
+    
+    def build_response_messages(self, question, search_results, card_type="all"):
+        """추천 답변 생성용 메시지 구성"""
         
         # 검색 결과를 텍스트로 정리
         context = self.format_search_results(search_results)
@@ -63,20 +108,253 @@ class CardGenerator:
 
 답변:
 """
+        return [
+            {"role": "system", "content": "당신은 KB 카드 상품 전문 상담사입니다. 친절하고 정확한 답변을 제공해주세요."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    # ----------------- 응답 캐시 키 -----------------
+    def response_cache_key(self, question, search_results, card_type="all"):
+        return make_key("response", self.model, RESPONSE_PROMPT_VERSION, search_results,
+                        question=question, card_type=card_type)
+    
+    def comparison_cache_key(self, search_results):
+        """비교 분석은 후보 카드 집합(순서 포함)에만 의존 → 질문/card_type과 무관하게 재사용"""
+        return make_key("comparison", self.model, COMPARISON_PROMPT_VERSION, search_results)
+    
+    def _cached_stream(self, key, tokens):
+        """캐시 적중이면 저장된 답변을 한 번에, 아니면 스트리밍하면서 모아 저장"""
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        for token in tokens():
+            parts.append(token)
+            yield token
+        text = "".join(parts).strip()
+        if text:
+            self.response_cache.put(key, text)
+    
+    def generate_response(self, question, search_results, card_type="all"):
+        """검색 결과를 바탕으로 답변 생성"""
+        key = self.response_cache_key(question, search_results, card_type)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
         
         # GPT-4o로 답변 생성
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 KB 카드 상품 전문 상담사입니다. 친절하고 정확한 답변을 제공해주세요."},
-                {"role": "user", "content": prompt}
-            ],
+        text = self.complete(
+            self.build_response_messages(question, search_results, card_type),
             temperature=0.7,
-            max_tokens=1500
+            max_tokens=1500,
+            caller='response'
         )
-        
+        self.response_cache.put(key, text)
+        return text
+    
+    def generate_response_stream(self, question, search_results, card_type="all"):
+        """generate_response의 스트리밍 버전 (토큰 조각을 yield)"""
+        yield from self._cached_stream(
+            self.response_cache_key(question, search_results, card_type),
+            lambda: self.stream_completion(
+                self.build_response_messages(question, search_results, card_type),
+                temperature=0.7,
+                max_tokens=1500,
+                caller='response'
+            )
+        )
+    
+    def complete(self, messages, temperature=0.7, max_tokens=1500, model=None, caller='card_generator'):
+        """chat completion 1회 (LLM 디스패처 입장 제어 + 지연시간/토큰 사용량 기록)"""
+        model = model or self.model
+        with get_dispatcher().slot(model, estimate_tokens(messages, max_tokens), caller) as ticket:
+            try:
+                with stage('card_generator', caller):
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+            except Exception:
+                record_llm(caller, model, status='error')
+                raise
+            ticket.record(response.usage)
+        record_llm(caller, model, response.usage)
         return response.choices[0].message.content.strip()
     
+    def stream_completion(self, messages, temperature=0.7, max_tokens=1500, model=None, caller='card_generator'):
+        """OpenAI 스트리밍 응답에서 텍스트 조각만 꺼내서 yield (마지막 청크의 usage는 메트릭으로 기록)"""
+        model = model or self.model
+        usage = None
+        with get_dispatcher().slot(model, estimate_tokens(messages, max_tokens), caller) as ticket:
+            with stage('card_generator', caller):
+                stream = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={'include_usage': True}
+                )
+                for chunk in stream:
+                    usage = chunk.usage or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            ticket.record(usage)
+        record_llm(caller, model, usage)
+    
+    # ----------------- 비동기 오케스트레이션 -----------------
+    async def acomplete(self, messages, temperature=0.7, max_tokens=1500, model=None, client=None,
+                        caller='card_generator'):
+        """비동기 chat completion 1회"""
+        client = client or self.init_async_client()
+        model = model or self.model
+        async with get_dispatcher().aslot(model, estimate_tokens(messages, max_tokens), caller) as ticket:
+            try:
+                with stage('card_generator', caller):
+                    response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+            except Exception:
+                record_llm(caller, model, status='error')
+                raise
+            ticket.record(response.usage)
+        record_llm(caller, model, response.usage)
+        return response.choices[0].message.content.strip()
+    
+    async def astream_completion(self, messages, temperature=0.7, max_tokens=1500, model=None, client=None,
+                                 caller='card_generator'):
+        """stream_completion의 비동기 버전 (텍스트 조각을 async yield)"""
+        client = client or self.init_async_client()
+        model = model or self.model
+        usage = None
+        async with get_dispatcher().aslot(model, estimate_tokens(messages, max_tokens), caller) as ticket:
+            with stage('card_generator', caller):
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={'include_usage': True}
+                )
+                async for chunk in stream:
+                    usage = chunk.usage or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            ticket.record(usage)
+        record_llm(caller, model, usage)
+    
+    async def _acached_stream(self, key, tokens):
+        """_cached_stream의 비동기 버전"""
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        async for token in tokens():
+            parts.append(token)
+            yield token
+        text = "".join(parts).strip()
+        if text:
+            self.response_cache.put(key, text)
+    
+    async def agenerate_response(self, question, search_results, card_type="all", client=None):
+        """generate_response의 비동기 버전"""
+        key = self.response_cache_key(question, search_results, card_type)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
+        text = await self.acomplete(
+            self.build_response_messages(question, search_results, card_type),
+            temperature=0.7, max_tokens=1500, client=client, caller='response'
+        )
+        self.response_cache.put(key, text)
+        return text
+    
+    async def agenerate_comparison(self, search_results, top_k=None, client=None):
+        """generate_comparison의 비동기 버전"""
+        if top_k:
+            search_results = search_results[:top_k]
+        if len(search_results) < 2:
+            return "비교할 카드가 충분하지 않습니다."
+        key = self.comparison_cache_key(search_results)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
+        text = await self.acomplete(
+            self.build_comparison_messages(search_results),
+            temperature=0.5, max_tokens=1500, client=client, caller='comparison'
+        )
+        self.response_cache.put(key, text)
+        return text
+    
+    async def agenerate_comparison_stream(self, search_results, top_k=None, client=None):
+        """generate_comparison_stream의 비동기 버전"""
+        if top_k:
+            search_results = search_results[:top_k]
+        if len(search_results) < 2:
+            yield "비교할 카드가 충분하지 않습니다."
+            return
+        async for token in self._acached_stream(
+            self.comparison_cache_key(search_results),
+            lambda: self.astream_completion(
+                self.build_comparison_messages(search_results),
+                temperature=0.5, max_tokens=1500, client=client, caller='comparison'
+            )
+        ):
+            yield token
+    
+    async def aiter_generation_parts(self, question, search_results, card_type="all", top_k=None,
+                                     timeout=30.0, parts=("response", "comparison"), client=None):
+        """추천 답변과 비교 분석을 동시에 실행하고, 끝나는 순서대로
+        {'part', 'text', 'error', 'elapsed'}를 yield (각 호출마다 timeout초 제한)"""
+        calls = {
+            'response': lambda: self.agenerate_response(question, search_results, card_type, client=client),
+            'comparison': lambda: self.agenerate_comparison(search_results, top_k=top_k, client=client),
+        }
+        
+        async def run(part):
+            start = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(calls[part](), timeout)
+                return {'part': part, 'text': text, 'error': None, 'elapsed': time.perf_counter() - start}
+            except asyncio.TimeoutError:
+                error = f"{timeout}초 안에 응답하지 않았습니다."
+            except Exception as e:
+                error = str(e)
+            return {'part': part, 'text': None, 'error': error, 'elapsed': time.perf_counter() - start}
+        
+        for next_done in asyncio.as_completed([run(part) for part in parts]):
+            yield await next_done
+    
+    async def agenerate_all(self, question, search_results, card_type="all", top_k=None, timeout=30.0,
+                            parts=("response", "comparison"), client=None):
+        """추천 답변 + 비교 분석을 동시에 생성해 하나의 결과로 조립"""
+        start = time.perf_counter()
+        result = {'response': None, 'comparison': None, 'errors': {}, 'elapsed': {}}
+        async for item in self.aiter_generation_parts(question, search_results, card_type, top_k, timeout, parts, client):
+            result[item['part']] = item['text']
+            result['elapsed'][item['part']] = round(item['elapsed'], 3)
+            if item['error']:
+                logger.warning(f"⚠️ {item['part']} 생성 실패", extra={'error': item['error']})
+                result['errors'][item['part']] = item['error']
+        result['elapsed']['total'] = round(time.perf_counter() - start, 3)
+        return result
+    
+    def generate_all(self, question, search_results, card_type="all", top_k=None, timeout=30.0,
+                     parts=("response", "comparison")):
+        """동기 코드(콘솔, 워커 스레드)용 래퍼: 호출마다 새 이벤트 루프와 클라이언트를 사용"""
+        async def run():
+            async with AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY')) as client:
+                return await self.agenerate_all(question, search_results, card_type, top_k, timeout, parts, client)
+        return asyncio.run(run())
+    
     def format_search_results(self, search_results):
         """검색 결과를 읽기 쉬운 형태로 포맷팅"""
         formatted_results = []
@@ -92,31 +370,29 @@ class CardGenerator:
         
         return "\n".join(formatted_results)
     
-    def generate_comparison(self, search_results):
-        """여러 카드를 비교하는 답변 생성"""
-        
-        if len(search_results) < 2:
-            return "비교할 카드가 충분하지 않습니다."
+    def build_comparison_messages(self, search_results):
+        """비교 분석 생성용 메시지 구성"""
         
         # 카드 정보를 구조화된 형태로 정리
         cards_info = []
         for result in search_results:
+            attributes = self.get_card_attributes(result)
             card_info = {
                 'name': result['card_name'],
                 'type': result['card_type'],
                 'keyword': result['keyword'],
                 'similarity': float(result['similarity_score']),  # float32를 float로 변환
                 'details': result['card_text'],
-                'benefits': self.extract_benefits_from_text(result['card_text']),
-                'annual_fee': self.extract_annual_fee(result['card_text'])
+                'benefits': attributes['discounts'] or ["혜택 정보 없음"],
+                'annual_fee': attributes['annual_fee']
             }
             cards_info.append(card_info)
         
-        # 비교 프롬프트 생성
+        # 비교 프롬프트 생성 (들여쓰기 없는 JSON으로 토큰/직렬화 비용 절감)
         comparison_prompt = f"""
 다음 {len(cards_info)}개 카드를 체계적으로 비교 분석하여 사용자에게 추천해주세요:
 
-{json.dumps(cards_info, ensure_ascii=False, indent=2)}
+{json.dumps(cards_info, ensure_ascii=False, separators=(',', ':'))}
 
 분석 기준:
 1. 혜택의 다양성과 실용성
@@ -155,61 +431,112 @@ class CardGenerator:
 
 답변:
 """
+        return [
+            {"role": "system", "content": "당신은 카드 상품 비교 분석 전문가입니다. 객관적이고 체계적인 비교 분석을 제공해주세요."},
+            {"role": "user", "content": comparison_prompt}
+        ]
+    
+    def generate_comparison(self, search_results, top_k=None):
+        """여러 카드를 비교하는 답변 생성"""
+        
+        if top_k:
+            search_results = search_results[:top_k]
+        if len(search_results) < 2:
+            return "비교할 카드가 충분하지 않습니다."
+        key = self.comparison_cache_key(search_results)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
         
         # GPT-4o로 비교 분석 생성
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 카드 상품 비교 분석 전문가입니다. 객관적이고 체계적인 비교 분석을 제공해주세요."},
-                {"role": "user", "content": comparison_prompt}
-            ],
+        text = self.complete(
+            self.build_comparison_messages(search_results),
             temperature=0.5,
-            max_tokens=1500
+            max_tokens=1500,
+            caller='comparison'
         )
-        
-        return response.choices[0].message.content.strip()
+        self.response_cache.put(key, text)
+        return text
     
-    def extract_benefits_from_text(self, card_text):
-        """카드 텍스트에서 혜택 정보 추출"""
-        benefits = []
+    def generate_comparison_stream(self, search_results, top_k=None):
+        """generate_comparison의 스트리밍 버전 (토큰 조각을 yield)"""
         
-        # 할인율 패턴 매칭
-        discount_patterns = [
-            r'(\d+(?:\.\d+)?)%\s*할인',
-            r'할인\s*(\d+(?:\.\d+)?)%',
-            r'(\d+(?:\.\d+)?)%\s*캐시백',
-            r'캐시백\s*(\d+(?:\.\d+)?)%'
-        ]
+        if top_k:
+            search_results = search_results[:top_k]
+        if len(search_results) < 2:
+            yield "비교할 카드가 충분하지 않습니다."
+            return
         
-        for pattern in discount_patterns:
-            matches = re.findall(pattern, card_text)
-            for match in matches:
-                benefits.append(f"{match}% 할인/캐시백")
+        yield from self._cached_stream(
+            self.comparison_cache_key(search_results),
+            lambda: self.stream_completion(
+                self.build_comparison_messages(search_results),
+                temperature=0.5,
+                max_tokens=1500,
+                caller='comparison'
+            )
+        )
+    
+    def get_card_attributes(self, result):
+        """카드 속성 조회: 인덱스 빌드 때 사이드카에 저장된 attributes를 그대로 사용 (없으면 1회 추출 후 캐시)"""
+        attributes = result.get('attributes')
+        if attributes:
+            return attributes
+        key = (result['card_name'], result.get('card_text', ''))
+        if key not in self._attribute_cache:
+            self._attribute_cache[key] = extract_card_attributes(result.get('card_text', ''))
+        return self._attribute_cache[key]
+    
+    def build_comparison_table(self, search_results, top_k=None, max_items=3):
+        """LLM 호출 없이 카드 속성으로 비교표 구성 (columns/rows + 마크다운)"""
+        if top_k:
+            search_results = search_results[:top_k]
         
-        # 특정 혜택 패턴 매칭
-        specific_benefits = [
-            r'(\d+(?:,\d+)?)원\s*할인',
-            r'할인\s*(\d+(?:,\d+)?)원',
-            r'(\d+(?:,\d+)?)원\s*캐시백',
-            r'캐시백\s*(\d+(?:,\d+)?)원'
-        ]
+        rows = []
+        for result in search_results:
+            attributes = self.get_card_attributes(result)
+            rows.append({
+                'card_name': result['card_name'],
+                'card_type': result.get('card_type', ''),
+                'keyword': result.get('keyword', ''),
+                'similarity': float(result.get('similarity_score', 0.0)),
+                'annual_fee': attributes['annual_fee'],
+                'annual_fee_won': attributes['annual_fee_won'],
+                'key_benefits': [b['text'] for b in attributes['benefits'][:max_items]],
+                'discounts': attributes['discounts'][:max_items],
+                'conditions': attributes['conditions'][:max_items],
+                'max_discount_percent': attributes['max_discount_percent'],
+                'max_monthly_cap_won': attributes['max_monthly_cap_won'],
+                'min_prev_month_spend_won': attributes['min_prev_month_spend_won'],
+            })
+        
+        def cell(value):
+            text = "<br>".join(value) if isinstance(value, list) else str(value or '')
+            return (text or '-').replace('|', '/')
         
-        for pattern in specific_benefits:
-            matches = re.findall(pattern, card_text)
-            for match in matches:
-                benefits.append(f"{match}원 할인/캐시백")
+        header = "| " + " | ".join(label for _, label in COMPARISON_COLUMNS) + " |"
+        divider = "|" + "---|" * len(COMPARISON_COLUMNS)
+        lines = [header, divider]
+        for row in rows:
+            lines.append("| " + " | ".join(cell(row[key]) for key, _ in COMPARISON_COLUMNS) + " |")
         
+        return {
+            'columns': [{'key': key, 'label': label} for key, label in COMPARISON_COLUMNS],
+            'rows': rows,
+            'markdown': "📊 카드 비교표\n\n" + "\n".join(lines) if rows else "",
+        }
+    
+    def extract_benefits_from_text(self, card_text):
+        """카드 텍스트에서 혜택 정보 추출 (미리 컴파일된 패턴 사용)"""
+        benefits = discount_labels(card_text)
         return benefits if benefits else ["혜택 정보 없음"]
     
     def extract_annual_fee(self, card_text):
         """카드 텍스트에서 연회비 추출"""
-        annual_fee_match = re.search(r'연회비[:\s]*([0-9,]+)원?', card_text)
-        if annual_fee_match:
-            return annual_fee_match.group(1) + "원"
-        return "연회비 정보 없음"
+        return annual_fee_text(card_text)
 
     def save_selected_card(self, card_info, question, card_type):
-        """선택된 카드 정보를 JSON 파일에 저장"""
+        """선택된 카드 정보를 선택 기록 저장소에 추가"""
         try:
             # 저장할 데이터 구성 (필요한 정보만)
             card_data = {
@@ -223,26 +550,10 @@ class CardGenerator:
             # 기존 선택된 카드 목록에 추가
             self.selected_cards.append(card_data)
             
-            # JSON 파일에 저장
-            filename = 'selected_cards.json'
+            # 파일 전체를 다시 쓰지 않고 1건만 INSERT
+            self.selection_store.append(card_data)
             
-            # 기존 파일이 있으면 읽어서 업데이트
-            existing_cards = []
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        existing_cards = json.load(f)
-                except json.JSONDecodeError:
-                    existing_cards = []
-            
-            # 새로운 카드 추가
-            existing_cards.append(card_data)
-            
-            # 파일에 저장
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(existing_cards, f, ensure_ascii=False, indent=2)
-            
-            print(f"✅ 선택하신 카드가 {filename}에 저장되었습니다.")
+            print(f"✅ 선택하신 카드가 {self.selection_store.path}에 저장되었습니다.")
             return True
             
         except Exception as e:
@@ -251,33 +562,20 @@ class CardGenerator:
     
     def get_selected_cards(self):
         """저장된 선택 카드 목록 반환"""
-        filename = 'selected_cards.json'
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
+        return self.selection_store.all()
     
     def get_card_by_name(self, card_name):
-        """카드명으로 저장된 카드 정보 찾기"""
-        saved_cards = self.get_selected_cards()
-        for saved_card in saved_cards:
-            if saved_card['card_name'] == card_name:
-                return saved_card
-        return None
+        """카드명으로 저장된 카드 정보 찾기 (가장 먼저 선택한 기록)"""
+        return self.selection_store.by_card_name(card_name, latest=False)
     
     def get_recent_cards(self, limit=5):
         """최근 선택된 카드들 반환"""
-        saved_cards = self.get_selected_cards()
-        return saved_cards[-limit:] if saved_cards else []
+        return self.selection_store.recent(limit)
     
     def clear_selected_cards(self):
         """저장된 카드 목록 삭제"""
-        filename = 'selected_cards.json'
-        if os.path.exists(filename):
-            os.remove(filename)
+        if self.selection_store.count():
+            self.selection_store.clear()
             self.selected_cards = []
             print("✅ 저장된 카드 목록이 삭제되었습니다.")
         else:
@@ -416,9 +714,10 @@ def main():
                 
                 print(f"✅ {len(search_results)}개 카드를 찾았습니다.")
                 
-                # 2단계: Generator로 답변 생성
-                print("💬 추천 카드와 이유를 생성 중...")
-                answer = generator.generate_response(question, search_results, card_type)
+                # 2단계: Generator로 추천 답변과 비교 분석을 동시에 생성
+                print("💬 추천 카드와 이유, 비교분석을 생성 중...")
+                generated = generator.generate_all(question, search_results, card_type)
+                answer = generated['response'] or f"❌ 추천 답변 생성 실패: {generated['errors'].get('response')}"
                 
                 # 3단계: 결과 출력
                 print("\n" + "="*80)
@@ -434,8 +733,11 @@ def main():
                     compare_choice = input("비교분석을 원하시면 'y', 카드 선택으로 넘어가시려면 'n'을 입력하세요: ").strip().lower()
                     
                     if compare_choice in ['y', 'yes', '예', '네']:
-                        print("\n🔄 카드 비교분석을 생성 중...")
-                        comparison = generator.generate_comparison(search_results)
+                        # 추천 답변과 함께 이미 생성됨 (실패한 경우에만 다시 호출)
+                        comparison = generated['comparison']
+                        if comparison is None:
+                            print("\n🔄 카드 비교분석을 생성 중...")
+                            comparison = generator.generate_comparison(search_results)
                         print("\n" + "="*80)
                         print("📊 카드 비교분석:")
                         print("="*80)
@@ -5,6 +5,11 @@ import os
 import faiss
 import time
 
+from shared_artifacts import SharedDocumentStore, has_corpus, read_index, shared_dir
+from telemetry import get_logger, record_llm, stage
+
+logger = get_logger('summary_rag')
+
 class FAISSCardRetriever:
     def __init__(self, credit_embedding_file="../embeddings/sep_embeddings/신용카드_cards_embedding_data.pkl", 
                  check_embedding_file="../embeddings/sep_embeddings/체크카드_cards_embedding_data.pkl"):
@@ -20,14 +25,40 @@ class FAISSCardRetriever:
         self.check_metadata = None
         self.check_faiss_index = None
         
+        # 카드 유형별 카드명 → 위치 (get_card 상세 조회용, 처음 조회할 때 생성)
+        self._card_positions = {}
+        
         # 임베딩 데이터 로드
         self.load_embeddings(credit_embedding_file, check_embedding_file)
         
         # OpenAI 클라이언트 초기화
         self.init_openai_client()
     
+    def load_shared_embeddings(self, directory):
+        """공유 아티팩트(SHARED_ARTIFACTS_DIR)에서 mmap으로 로드 → 여러 워커가 인덱스/문서 메모리를 공유"""
+        if not (has_corpus(directory, 'summary_credit') or has_corpus(directory, 'summary_check')):
+            return False
+        
+        if has_corpus(directory, 'summary_credit'):
+            store = SharedDocumentStore(directory, 'summary_credit')
+            self.credit_texts = store.texts
+            self.credit_metadata = store.metadatas
+            self.credit_faiss_index = read_index(os.path.join(directory, 'summary_credit.faiss'))
+        
+        if has_corpus(directory, 'summary_check'):
+            store = SharedDocumentStore(directory, 'summary_check')
+            self.check_texts = store.texts
+            self.check_metadata = store.metadatas
+            self.check_faiss_index = read_index(os.path.join(directory, 'summary_check.faiss'))
+        
+        logger.info('📦 공유 아티팩트에서 Summary 인덱스 로드 (mmap)', extra={'directory': directory})
+        return True
+    
     def load_embeddings(self, credit_file_path, check_file_path):
         """신용카드와 체크카드 임베딩 데이터 로드"""
+        if self.load_shared_embeddings(shared_dir()):
+            return
+        
         credit_file_path = "C://Users//USER//Desktop//대학교//동아리//BITAmin//25-NLP//bitamin-nlp-kb//embeddings//embeddings//credit_card_embedding_data.pkl"
         check_file_path = "C://Users//USER//Desktop//대학교//동아리//BITAmin//25-NLP//bitamin-nlp-kb//embeddings//embeddings//check_card_embedding_data.pkl"
 
@@ -73,10 +104,12 @@ class FAISSCardRetriever:
     
     def get_question_embedding(self, question):
         """질문을 벡터로 변환"""
-        response = self.client.embeddings.create(
-            model="text-embedding-3-small",
-            input=question
-        )
+        with stage('summary_rag', 'embed_query'):
+            response = self.client.embeddings.create(
+                model="text-embedding-3-small",
+                input=question
+            )
+        record_llm('summary_embed', 'text-embedding-3-small', response.usage)
         return response.data[0].embedding
     
     def find_similar_cards(self, question, card_type="all", top_k=5):
@@ -101,25 +134,25 @@ class FAISSCardRetriever:
             try:
                 # 인덱스가 유효한지 먼저 확인
                 if not hasattr(self.credit_faiss_index, 'search'):
-                    print("❌ 신용카드 FAISS 인덱스에 search 메서드가 없습니다.")
+                    logger.error("❌ 신용카드 FAISS 인덱스에 search 메서드가 없습니다.")
                     raise AttributeError("Invalid FAISS index")
                 
                 # 인덱스의 데이터 개수 확인 (안전한 방법)
                 try:
                     index_size = self.credit_faiss_index.ntotal
                     if index_size == 0:
-                        print("❌ 신용카드 FAISS 인덱스가 비어있습니다.")
+                        logger.error("❌ 신용카드 FAISS 인덱스가 비어있습니다.")
                         raise ValueError("Empty FAISS index")
                 except:
-                    print("❌ 신용카드 FAISS 인덱스 상태를 확인할 수 없습니다. 인덱스가 손상되었을 가능성이 있습니다.")
+                    logger.error("❌ 신용카드 FAISS 인덱스 상태를 확인할 수 없습니다. 인덱스가 손상되었을 가능성이 있습니다.")
                     raise ValueError("Corrupted FAISS index")
                 
                 # 검색 실행
-                distances, indices = self.credit_faiss_index.search(question_vector, top_k)
+                with stage('summary_rag', 'faiss'):
+                    distances, indices = self.credit_faiss_index.search(question_vector, top_k)
                 
             except Exception as e:
-                print(f"❌ 신용카드 FAISS 검색 오류: {e}")
-                print("💡 해결방법: embed_cards.py를 다시 실행하여 FAISS 인덱스를 재생성해주세요.")
+                logger.error(f"❌ 신용카드 FAISS 검색 오류: {e} (embed_cards.py를 다시 실행하여 FAISS 인덱스를 재생성해주세요)")
                 # 신용카드 검색을 건너뛰고 계속 진행
                 if card_type.lower() == "credit":
                     return [], 0  # 신용카드만 검색하는 경우 빈 결과 반환
@@ -144,6 +177,7 @@ class FAISSCardRetriever:
                         'similarity_score': round(cosine_similarity, 4),
                         'distance': round(1 - cosine_similarity, 4),  # 코사인 거리로 변환
                         'card_text': card_text,
+                        'attributes': card_meta.get('attributes'),  # 인덱스 빌드 시 추출한 비교용 속성
                         'search_type': '신용카드'
                     })
         
@@ -152,25 +186,25 @@ class FAISSCardRetriever:
             try:
                 # 인덱스가 유효한지 먼저 확인
                 if not hasattr(self.check_faiss_index, 'search'):
-                    print("❌ 체크카드 FAISS 인덱스에 search 메서드가 없습니다.")
+                    logger.error("❌ 체크카드 FAISS 인덱스에 search 메서드가 없습니다.")
                     raise AttributeError("Invalid FAISS index")
                 
                 # 인덱스의 데이터 개수 확인 (안전한 방법)
                 try:
                     index_size = self.check_faiss_index.ntotal
                     if index_size == 0:
-                        print("❌ 체크카드 FAISS 인덱스가 비어있습니다.")
+                        logger.error("❌ 체크카드 FAISS 인덱스가 비어있습니다.")
                         raise ValueError("Empty FAISS index")
                 except:
-                    print("❌ 체크카드 FAISS 인덱스 상태를 확인할 수 없습니다. 인덱스가 손상되었을 가능성이 있습니다.")
+                    logger.error("❌ 체크카드 FAISS 인덱스 상태를 확인할 수 없습니다. 인덱스가 손상되었을 가능성이 있습니다.")
                     raise ValueError("Corrupted FAISS index")
                 
                 # 검색 실행
-                distances, indices = self.check_faiss_index.search(question_vector, top_k)
+                with stage('summary_rag', 'faiss'):
+                    distances, indices = self.check_faiss_index.search(question_vector, top_k)
                 
             except Exception as e:
-                print(f"❌ 체크카드 FAISS 검색 오류: {e}")
-                print("💡 해결방법: embed_cards.py를 다시 실행하여 FAISS 인덱스를 재생성해주세요.")
+                logger.error(f"❌ 체크카드 FAISS 검색 오류: {e} (embed_cards.py를 다시 실행하여 FAISS 인덱스를 재생성해주세요)")
                 # 체크카드 검색을 건너뛰고 계속 진행
                 if card_type.lower() == "check":
                     return [], 0  # 체크카드만 검색하는 경우 빈 결과 반환
@@ -192,6 +226,7 @@ class FAISSCardRetriever:
                         'similarity_score': round(cosine_similarity, 4),
                         'distance': round(1 - cosine_similarity, 4),  # 코사인 거리로 변환
                         'card_text': card_text,
+                        'attributes': card_meta.get('attributes'),  # 인덱스 빌드 시 추출한 비교용 속성
                         'search_type': '체크카드'
                     })
         
@@ -206,6 +241,35 @@ class FAISSCardRetriever:
         
         return all_results[:top_k], search_time
       
+    def get_card(self, card_type, card_name):
+        """카드 유형(신용카드/체크카드 또는 credit/check) + 카드명으로 상세 정보 조회 (검색 없이, 점수 제외)"""
+        if card_type.lower() in ['credit', '신용카드']:
+            search_type, texts, metadata = '신용카드', self.credit_texts, self.credit_metadata
+        elif card_type.lower() in ['check', '체크카드']:
+            search_type, texts, metadata = '체크카드', self.check_texts, self.check_metadata
+        else:
+            return None
+        if metadata is None:
+            return None
+        
+        positions = self._card_positions.get(search_type)
+        if positions is None:
+            positions = {metadata[i]['card_name']: i for i in range(len(metadata))}
+            self._card_positions[search_type] = positions
+        idx = positions.get(card_name)
+        if idx is None:
+            return None
+        
+        card_meta = metadata[idx]
+        return {
+            'card_name': card_meta['card_name'],
+            'card_type': card_meta['card_type'],
+            'keyword': card_meta['keyword'],
+            'card_text': texts[idx],
+            'attributes': card_meta.get('attributes'),
+            'search_type': search_type
+        }
+      
     def search_cards(self, question, card_type="all", top_k=5):
         """카드 검색 실행"""
         card_type_display = "전체" if card_type.lower() == "all" else card_type
@@ -0,0 +1,307 @@
+# llm_dispatcher.py
+"""LLM 호출 입장 제어(admission control) + 배압.
+
+CardGenerator, FAISSRAGRetriever, 웹 앱의 /simplify는 OpenAI를 부르기 전에 모두 이 디스패처에서 자리를 받는다.
+- 모델별 동시 호출 수 제한 (concurrency)
+- 크기가 정해진 우선순위 대기열 (priority가 작을수록 먼저: 사용자가 기다리는 답변 > 재작성 > 백그라운드 생성)
+- 분당 토큰 예산 (tpm): 최근 60초에 예약한 토큰(호출 후 실제 사용량으로 보정)이 넘으면 대기
+- 대기열이 가득 차거나 대기 시간이 LLM_QUEUE_TIMEOUT을 넘으면 503, 토큰 예산을 그 안에 받을 수 없으면 429를
+  retry_after(초)와 함께 LLMOverloaded로 바로 알린다 → 모두가 함께 느려지는 대신 넘치는 요청만 빨리 거절된다.
+스레드(동기 OpenAI/LangChain 호출)와 asyncio(AsyncOpenAI) 양쪽에서 쓴다: slot() / aslot().
+
+설정 (프로세스=워커별 한도): LLM_MAX_CONCURRENCY(기본 8), LLM_MAX_QUEUE(기본 32), LLM_QUEUE_TIMEOUT(초, 기본 20),
+LLM_TPM(0이면 무제한), LLM_LIMITS='{"gpt-4o": {"concurrency": 4, "max_queue": 16, "tpm": 30000}}'(모델별 덮어쓰기)
+"""
+import os
+import json
+import math
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from telemetry import REGISTRY, usage_tokens
+
+
+LLM_QUEUE = REGISTRY.gauge("kbcard_llm_dispatch", "LLM 디스패처 상태 (running/queued)", ("model", "state"))
+LLM_REJECTED = REGISTRY.counter("kbcard_llm_rejected_total", "입장 제어로 거절한 LLM 호출 수", ("model", "reason"))
+
+# caller별 기본 우선순위 (작을수록 먼저)
+CALLER_PRIORITY = {
+    "llm_answer": 0, "llm_compare": 0, "simplify": 0,
+    "llm_rewrite": 1,
+    "response": 2, "comparison": 2,
+}
+DEFAULT_PRIORITY = 2
+COMPLETION_TOKENS = 800  # max_tokens를 모를 때(LangChain) 응답 토큰 추정치
+
+
+def estimate_tokens(messages: list, max_tokens: Optional[int] = None) -> int:
+    """예약할 토큰 수 추정: 한국어 위주라 약 2글자 = 1토큰으로 보고 응답 상한(max_tokens)을 더한다"""
+    chars = 0
+    for m in messages:
+        content = m.get("content") if isinstance(m, dict) else getattr(m, "content", "")
+        chars += len(content or "")
+    return chars // 2 + (max_tokens or COMPLETION_TOKENS)
+
+
+class LLMOverloaded(Exception):
+    """입장 거절. status: 503(대기열 가득/대기 시간 초과) 또는 429(분당 토큰 예산 초과)"""
+
+    def __init__(self, model: str, reason: str, retry_after: float, status: int):
+        self.model = model
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.status = status
+        super().__init__(f"요청이 많아 잠시 처리할 수 없습니다 ({model}, {reason}). {self.retry_after}초 후 다시 시도해 주세요.")
+
+
+class _Waiter:
+    """대기열 항목. 동기 호출은 threading.Event, 비동기 호출은 이벤트 루프의 Future로 깨운다."""
+
+    def __init__(self, priority: int, seq: int, tokens: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.granted = False
+        self.cancelled = False
+        self.reservation: Optional[list] = None  # [예약 시각, 토큰] (lane.window 항목)
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def grant(self):  # lock 안에서 호출
+        self.granted = True
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
+
+
+class _Ticket:
+    """호출 1회의 자리. record(usage)로 예약 토큰을 실제 사용량으로 보정한다."""
+
+    def __init__(self, reservation: list):
+        self._reservation = reservation
+
+    def record(self, usage):
+        prompt, completion = usage_tokens(usage)
+        if prompt or completion:
+            self._reservation[1] = prompt + completion
+
+
+class _Lane:
+    """모델 1개의 동시 실행/대기열/토큰 예산 상태 (LLMDispatcher의 lock 안에서만 접근)"""
+
+    def __init__(self, concurrency: int, max_queue: int, tpm: int):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.tpm = max(0, tpm)
+        self.running = 0
+        self.waiting = 0
+        self.queue: list[_Waiter] = []
+        self.window: deque = deque()      # [예약 시각, 토큰]
+        self.avg_seconds = 5.0            # 호출 시간 이동 평균 (Retry-After 추정)
+
+    def used_tokens(self, now: float) -> int:
+        while self.window and now - self.window[0][0] >= 60:
+            self.window.popleft()
+        return sum(t for _, t in self.window)
+
+    def budget_wait(self, tokens: int, now: float) -> float:
+        """tokens를 예약하려면 기다려야 하는 초 (0이면 지금 가능)"""
+        if not self.tpm:
+            return 0.0
+        tokens = min(tokens, self.tpm)  # 예산보다 큰 요청도 창이 비면 통과
+        excess = self.used_tokens(now) + tokens - self.tpm
+        if excess <= 0:
+            return 0.0
+        for ts, t in self.window:  # 오래된 예약부터 만료되며 자리가 난다
+            excess -= t
+            if excess <= 0:
+                return ts + 60 - now
+        return 60.0
+
+    def queue_wait(self) -> float:
+        """지금 대기열 뒤에 서면 자리를 받기까지 걸릴 시간 추정"""
+        return self.avg_seconds * (self.waiting + 1) / self.concurrency
+
+
+class LLMDispatcher:
+    def __init__(self, concurrency: int = 8, max_queue: int = 32, max_wait: float = 20.0, tpm: int = 0,
+                 limits: Optional[dict] = None):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.tpm = tpm
+        self.limits = limits or {}
+        self._lanes: dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> "LLMDispatcher":
+        return cls(
+            concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+            max_wait=float(os.getenv("LLM_QUEUE_TIMEOUT", "20")),
+            tpm=int(os.getenv("LLM_TPM", "0")),
+            limits=json.loads(os.getenv("LLM_LIMITS") or "{}"),
+        )
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            limit = self.limits.get(model, {})
+            lane = self._lanes[model] = _Lane(
+                limit.get("concurrency", self.concurrency),
+                limit.get("max_queue", self.max_queue),
+                limit.get("tpm", self.tpm),
+            )
+        return lane
+
+    def _reject(self, model: str, reason: str, retry_after: float, status: int) -> LLMOverloaded:
+        LLM_REJECTED.inc(model=model, reason=reason)
+        return LLMOverloaded(model, reason, retry_after, status)
+
+    def _dispatch(self, lane: _Lane, now: float):
+        """빈 자리와 토큰 예산이 허락하는 만큼 우선순위 순서로 깨운다 (lock 안에서 호출)"""
+        while lane.queue and lane.running < lane.concurrency:
+            head = lane.queue[0]
+            if head.cancelled:
+                heapq.heappop(lane.queue)
+                continue
+            if lane.budget_wait(head.tokens, now) > 0:
+                break  # 예산이 풀리면 대기자가 주기적으로 다시 _dispatch한다
+            heapq.heappop(lane.queue)
+            lane.waiting -= 1
+            lane.running += 1
+            head.reservation = [now, head.tokens]
+            lane.window.append(head.reservation)
+            head.grant()
+
+    def _enqueue(self, model: str, tokens: int, priority: int,
+                 loop: Optional[asyncio.AbstractEventLoop]) -> tuple[_Lane, _Waiter]:
+        with self._lock:
+            lane = self._lane(model)
+            now = time.time()
+            budget_wait = lane.budget_wait(tokens, now)
+            # 바로 자리를 받을 수 없으면(앞선 대기자/동시 실행 한도/토큰 예산) 대기열 크기 한도를 적용
+            immediate = not lane.waiting and lane.running < lane.concurrency and budget_wait <= 0
+            if not immediate and lane.waiting >= lane.max_queue:
+                raise self._reject(model, "queue_full", max(lane.queue_wait(), budget_wait), 503)
+            if budget_wait > self.max_wait:
+                raise self._reject(model, "tpm_budget", budget_wait, 429)
+            waiter = _Waiter(priority, next(self._seq), tokens, loop)
+            heapq.heappush(lane.queue, waiter)
+            lane.waiting += 1
+            self._dispatch(lane, now)
+            return lane, waiter
+
+    def _poll(self, model: str, lane: _Lane, waiter: _Waiter, deadline: float) -> bool:
+        """대기 중 주기 확인: 자리를 받았으면 True, 대기 시간이 지나면 대기열에서 빠지고 거절"""
+        with self._lock:
+            if not waiter.granted:
+                self._dispatch(lane, time.time())
+            if waiter.granted:
+                return True
+            if time.monotonic() >= deadline:
+                waiter.cancelled = True
+                lane.waiting -= 1
+                raise self._reject(model, "queue_timeout", lane.queue_wait(), 503)
+            return False
+
+    def _abandon(self, lane: _Lane, waiter: _Waiter):
+        """비동기 대기자가 취소됐을 때: 받은 자리는 반납하고, 아직이면 대기열에서 뺀다"""
+        with self._lock:
+            if waiter.granted:
+                lane.running -= 1
+                self._dispatch(lane, time.time())
+            elif not waiter.cancelled:
+                waiter.cancelled = True
+                lane.waiting -= 1
+
+    def _release(self, lane: _Lane, seconds: float):
+        with self._lock:
+            lane.running -= 1
+            lane.avg_seconds = 0.8 * lane.avg_seconds + 0.2 * seconds
+            self._dispatch(lane, time.time())
+
+    @contextmanager
+    def slot(self, model: str, tokens: int = 0, caller: str = "", priority: Optional[int] = None):
+        """동기 호출용: with dispatcher.slot(model, tokens, caller) as ticket: ... ticket.record(usage)"""
+        priority = CALLER_PRIORITY.get(caller, DEFAULT_PRIORITY) if priority is None else priority
+        lane, waiter = self._enqueue(model, tokens, priority, None)
+        deadline = time.monotonic() + self.max_wait
+        while not (waiter.wait(0.25) or self._poll(model, lane, waiter, deadline)):
+            pass
+        start = time.perf_counter()
+        try:
+            yield _Ticket(waiter.reservation)
+        finally:
+            self._release(lane, time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, tokens: int = 0, caller: str = "", priority: Optional[int] = None):
+        """비동기 호출용: async with dispatcher.aslot(model, tokens, caller) as ticket: ..."""
+        priority = CALLER_PRIORITY.get(caller, DEFAULT_PRIORITY) if priority is None else priority
+        lane, waiter = self._enqueue(model, tokens, priority, asyncio.get_running_loop())
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), 0.25)
+                    break
+                except asyncio.TimeoutError:
+                    if self._poll(model, lane, waiter, deadline):
+                        break
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+        start = time.perf_counter()
+        try:
+            yield _Ticket(waiter.reservation)
+        finally:
+            self._release(lane, time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        """모델별 {running, queued, concurrency, max_queue, tpm, tokens_last_minute} (+ /metrics 게이지 갱신)"""
+        with self._lock:
+            now = time.time()
+            result = {
+                model: {"running": lane.running, "queued": lane.waiting, "concurrency": lane.concurrency,
+                        "max_queue": lane.max_queue, "tpm": lane.tpm, "tokens_last_minute": lane.used_tokens(now)}
+                for model, lane in self._lanes.items()
+            }
+        for model, s in result.items():
+            LLM_QUEUE.set(s["running"], model=model, state="running")
+            LLM_QUEUE.set(s["queued"], model=model, state="queued")
+        return result
+
+
+_dispatcher: Optional[LLMDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> LLMDispatcher:
+    """프로세스 공유 디스패처 (.env 로드 이후 처음 호출할 때 환경 변수로 생성)"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = LLMDispatcher.from_env()
+    return _dispatcher
@@ -0,0 +1,145 @@
+# response_cache.py
+"""CardGenerator LLM 응답 캐시.
+
+키 = (종류, 모델, 프롬프트 버전, card_type, 후보 카드 ID 순서, 정규화한 질문)
+- 비교 분석은 후보 카드 집합에만 의존하므로 질문/card_type 없이 키를 만든다.
+- TTL + LRU로 제거하고, path를 주면 JSONL(append-only)로 디스크에 저장해 재시작 후에도 재사용한다.
+  (로드할 때 만료/중복 항목을 정리해 파일을 다시 씀)
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from telemetry import record_cache
+
+
+_QUESTION_PUNCT = re.compile(r"[\s?!.,~·…\"'()\[\]]+")
+
+
+def normalize_question(question: str) -> str:
+    """공백/문장부호 제거 + 소문자 (같은 뜻의 표기 차이를 하나의 키로)"""
+    return _QUESTION_PUNCT.sub("", (question or "").strip()).lower()
+
+
+def candidate_ids(search_results: list) -> list[str]:
+    """순서를 유지한 후보 카드 ID (카드 유형 + 카드명)"""
+    return [f"{r.get('search_type') or r.get('card_type', '')}:{r['card_name']}" for r in search_results]
+
+
+def make_key(kind: str, model: str, prompt_version: str, search_results: list,
+             question: Optional[str] = None, card_type: Optional[str] = None) -> str:
+    payload = {
+        "kind": kind,
+        "model": model,
+        "prompt_version": prompt_version,
+        "card_type": card_type,
+        "cards": candidate_ids(search_results),
+        "question": normalize_question(question) if question is not None else None,
+    }
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def content_key(kind: str, model: str, prompt_version: str, text: str) -> str:
+    """본문 내용 기반 키 (공백 차이만 무시, 대소문자/문장부호는 유지) — /simplify 간단화 캐시"""
+    body = " ".join((text or "").split())
+    return hashlib.sha1(f"{kind}\x00{model}\x00{prompt_version}\x00{body}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """스레드 안전 TTL/LRU 캐시 (+ 선택적 JSONL 디스크 저장)"""
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_entries: int = 2048, path: Optional[str] = None,
+                 name: str = "response"):
+        self.name = name  # /metrics의 cache 라벨
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._appended = 0  # 마지막 정리 이후 파일에 추가한 줄 수
+        if path:
+            self._load()
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry["created_at"] > self.ttl_seconds
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # ----------------- 디스크 -----------------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 기록 중 종료된 마지막 줄 등
+                if not self._expired(entry, now):
+                    self._entries.pop(entry["key"], None)
+                    self._entries[entry["key"]] = entry
+        self._evict()
+        self._compact()
+        print(f"💾 응답 캐시 로드: {len(self._entries)}개 ({self.path})")
+
+    def _compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._appended = 0
+
+    def _append(self, entry: dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    # ----------------- 조회/저장 -----------------
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, time.time()):
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                record_cache(self.name, False)
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            record_cache(self.name, True)
+            return entry["value"]
+
+    def put(self, key: str, value: str):
+        entry = {"key": key, "value": value, "created_at": time.time()}
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self._evict()
+            if self.path:
+                self._append(entry)
+                self._appended += 1
+                # 덮어쓴/제거된 항목이 쌓이면 파일 정리
+                if self._appended > self.max_entries:
+                    self._compact()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
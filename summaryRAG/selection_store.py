@@ -0,0 +1,145 @@
+# selection_store.py
+"""선택한 카드 기록 저장소 (SQLite WAL).
+
+selected_cards.json을 통째로 읽고 다시 쓰던 방식 대신
+- 선택 1건 = INSERT 1회 (O(1) append, 트랜잭션이라 중간에 죽어도 파일이 깨지지 않음)
+- WAL 모드 + busy_timeout으로 여러 워커/스레드가 동시에 기록 가능
+- 최근 선택 / 최근 N개 / 카드명별 조회는 인덱스로 처리
+처음 열 때 DB가 비어 있고 legacy_json이 있으면 기존 selected_cards.json 내용을 옮겨온다.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS selections (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL    NOT NULL,
+    card_name  TEXT    NOT NULL,
+    card_type  TEXT,
+    keyword    TEXT,
+    question   TEXT,
+    source     TEXT,
+    timestamp  TEXT,
+    extra      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_selections_card_name ON selections (card_name, id);
+"""
+
+_COLUMNS = ("card_name", "card_type", "keyword", "question", "timestamp")
+
+
+class SelectionStore:
+    """선택 카드 로그 (스레드별 커넥션, 프로세스 간 동시 기록 안전)"""
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+        if legacy_json:
+            self.migrate_json(legacy_json)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> dict:
+        entry = json.loads(row["extra"]) if row["extra"] else {}
+        entry.update({k: row[k] for k in _COLUMNS if row[k] is not None})
+        if row["source"] is not None:
+            entry["from"] = row["source"]
+        # 숫자 타임스탬프(UI)는 숫자로 되돌림
+        ts = entry.get("timestamp")
+        if isinstance(ts, str) and ts.isdigit():
+            entry["timestamp"] = int(ts)
+        return entry
+
+    @staticmethod
+    def _params(entry: dict) -> tuple:
+        extra = {k: v for k, v in entry.items() if k not in _COLUMNS and k != "from"}
+        timestamp = entry.get("timestamp")
+        return (
+            time.time(),
+            str(entry.get("card_name", "")),
+            entry.get("card_type"),
+            entry.get("keyword"),
+            entry.get("question"),
+            entry.get("from"),
+            str(timestamp) if timestamp is not None else None,
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    # ----------------- 기록 -----------------
+    def append(self, entry: dict) -> int:
+        """선택 1건 추가 → 행 id"""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO selections (created_at, card_name, card_type, keyword, question, source, timestamp, extra)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._params(entry),
+            )
+        return cur.lastrowid
+
+    def migrate_json(self, json_path: str) -> int:
+        """DB가 비어 있을 때만 기존 selected_cards.json을 옮겨온다. 옮긴 건수 반환."""
+        if not os.path.exists(json_path) or self.count() > 0:
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return 0
+        rows = [self._params(e) for e in data if isinstance(e, dict) and e.get("card_name")]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO selections (created_at, card_name, card_type, keyword, question, source, timestamp, extra)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        print(f"📦 selected_cards.json → {self.path}: {len(rows)}건 이전")
+        return len(rows)
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM selections")
+
+    # ----------------- 조회 -----------------
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM selections").fetchone()[0]
+
+    def latest(self) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM selections ORDER BY id DESC LIMIT 1").fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def recent(self, limit: int = 5) -> list[dict]:
+        """최근 limit개 (오래된 것 → 최신 순)"""
+        rows = self._conn().execute("SELECT * FROM selections ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_entry(r) for r in reversed(rows)]
+
+    def by_card_name(self, card_name: str, latest: bool = True) -> Optional[dict]:
+        order = "DESC" if latest else "ASC"
+        row = self._conn().execute(
+            f"SELECT * FROM selections WHERE card_name = ? ORDER BY id {order} LIMIT 1", (card_name,)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def all(self) -> list[dict]:
+        return [self._row_to_entry(r) for r in self._conn().execute("SELECT * FROM selections ORDER BY id")]
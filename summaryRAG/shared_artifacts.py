@@ -0,0 +1,232 @@
+# shared_artifacts.py
+"""여러 워커 프로세스가 인덱스 메모리를 나눠 쓰기 위한 읽기 전용 공유 아티팩트.
+
+pickle로 로드하면 워커마다 FAISS 인덱스, 벡터, Document 리스트를 각자 힙에 복사한다.
+export로 만든 공유 아티팩트 디렉터리(SHARED_ARTIFACTS_DIR)에는 코퍼스(<name>)마다
+- <name>.faiss              : FAISS 인덱스 → IO_FLAG_MMAP_IFC로 mmap (Flat 인덱스는 벡터 행렬이 곧 인덱스 코드)
+- <name>_docs.bin/.idx.npy  : 문서 본문(UTF-8)을 이어 붙인 blob + 오프셋
+- <name>_meta.bin/.idx.npy  : 문서별 메타데이터(JSON)를 이어 붙인 blob + 오프셋
+- <name>_columns.json       : 필터/카드 조회에 쓰는 메타데이터 열 (card_name/field/keyword/card_type)
+- <name>_bm25_*             : Original RAG BM25 인덱스 (있을 때만, 원래도 mmap 로드)
+가 저장된다. 모두 읽기 전용 mmap이라 같은 파일을 연 N개 워커는 OS 페이지 캐시의 한 복사본을 공유하고,
+Document/메타데이터 dict는 접근할 때만 만든다.
+파일은 임시 파일에 쓴 뒤 os.replace로 교체하므로 실행 중인 워커의 기존 매핑은 깨지지 않는다.
+
+내보내기 (summaryRAG 폴더에서):
+    python shared_artifacts.py --out ../shared_artifacts \\
+        --summary-dir ../embeddings/sep_embeddings --original-dir ../originalRAG/original_embeddings
+"""
+import os
+import glob
+import json
+import shutil
+import pickle
+import argparse
+from typing import Optional
+
+import numpy as np
+
+
+COLUMNS = ("card_name", "field", "keyword", "card_type")
+SUMMARY_FILES = {"credit": "신용카드_cards_embedding_data.pkl", "check": "체크카드_cards_embedding_data.pkl"}
+CATEGORIES = ("credit", "check")
+
+
+def shared_dir() -> Optional[str]:
+    """SHARED_ARTIFACTS_DIR (없으면 None → 기존 pickle 로드)"""
+    return os.getenv("SHARED_ARTIFACTS_DIR") or None
+
+
+def _prefix(directory: str, name: str) -> str:
+    return os.path.join(directory, name)
+
+
+def has_corpus(directory: Optional[str], name: str) -> bool:
+    if not directory:
+        return False
+    prefix = _prefix(directory, name)
+    return all(os.path.exists(prefix + suffix) for suffix in
+               (".faiss", "_docs.bin", "_docs.idx.npy", "_meta.bin", "_meta.idx.npy", "_columns.json"))
+
+
+def read_index(path: str):
+    """FAISS 인덱스를 읽기 전용 mmap으로 로드 (mmap을 지원하지 않는 faiss 버전이면 일반 로드)"""
+    import faiss
+
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if flags is None:
+        return faiss.read_index(path)
+    return faiss.read_index(path, flags | getattr(faiss, "IO_FLAG_READ_ONLY", 0))
+
+
+# -------- 압축 문서 저장소 (blob + 오프셋) --------
+class _Blob:
+    """UTF-8 항목을 이어 붙인 파일을 mmap하고 i번째 항목만 디코딩"""
+
+    def __init__(self, path: str):
+        self.offsets = np.load(path[: -len(".bin")] + ".idx.npy", mmap_mode="r")
+        # 빈 파일은 mmap할 수 없으므로 빈 bytes로 대신
+        self.data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.data[start:end]).decode("utf-8")
+
+
+class _View:
+    """store.texts / store.metadatas: 리스트처럼 인덱싱만 되는 지연 뷰"""
+
+    def __init__(self, size: int, getter):
+        self._size = size
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i):
+        i = int(i)
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return self._getter(i)
+
+
+class SharedDocumentStore(_View):
+    """공유 아티팩트의 문서 저장소. store[i]는 Document(LangChain)를 그 자리에서 만들어 반환한다.
+
+    Original RAG의 documents 리스트 자리에, Summary RAG는 texts/metadatas 뷰로 사용한다.
+    """
+
+    def __init__(self, directory: str, name: str):
+        prefix = _prefix(directory, name)
+        self.name = name
+        self._docs = _Blob(prefix + "_docs.bin")
+        self._meta = _Blob(prefix + "_meta.bin")
+        with open(prefix + "_columns.json", "r", encoding="utf-8") as f:
+            self._columns: dict[str, list] = json.load(f)
+        self.texts = _View(len(self._docs), self._docs.get)
+        self.metadatas = _View(len(self._meta), self.metadata)
+        super().__init__(len(self._docs), self._document)
+
+    def text(self, i: int) -> str:
+        return self._docs.get(int(i))
+
+    def metadata(self, i: int) -> dict:
+        return json.loads(self._meta.get(int(i)))
+
+    def column(self, key: str) -> list:
+        """메타데이터 한 열 (Document를 만들지 않고 필터/카드 조회)"""
+        return self._columns.get(key) or [""] * len(self)
+
+    def _document(self, i: int):
+        from langchain.docstore.document import Document
+
+        return Document(page_content=self._docs.get(i), metadata=self.metadata(i))
+
+
+# -------- 내보내기 --------
+def _replace(path: str, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_blob(path: str, items: list[str]):
+    encoded = [s.encode("utf-8") for s in items]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    def write_data(tmp_path):
+        with open(tmp_path, "wb") as f:
+            for b in encoded:
+                f.write(b)
+
+    def write_offsets(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.save(f, offsets)
+
+    _replace(path, write_data)
+    _replace(path[: -len(".bin")] + ".idx.npy", write_offsets)
+
+
+def write_corpus(directory: str, name: str, index, texts: list[str], metadatas: list[dict]) -> str:
+    """FAISS 인덱스 + 문서 본문/메타데이터를 공유 아티팩트로 저장"""
+    import faiss
+
+    if index.ntotal != len(texts) or len(texts) != len(metadatas):
+        raise ValueError(f"{name}: 인덱스({index.ntotal})/본문({len(texts)})/메타데이터({len(metadatas)}) 개수가 다릅니다.")
+    os.makedirs(directory, exist_ok=True)
+    prefix = _prefix(directory, name)
+    _replace(prefix + ".faiss", lambda tmp_path: faiss.write_index(index, tmp_path))
+    _write_blob(prefix + "_docs.bin", texts)
+    _write_blob(prefix + "_meta.bin", [json.dumps(m, ensure_ascii=False, default=str) for m in metadatas])
+    columns = {key: [str(m.get(key, "")) for m in metadatas] for key in COLUMNS}
+
+    def write_columns(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(columns, f, ensure_ascii=False)
+
+    _replace(prefix + "_columns.json", write_columns)
+    return prefix
+
+
+def export_summary(summary_dir: str, out_dir: str) -> list[str]:
+    """Summary RAG pickle({texts, metadata, faiss_index}) → summary_<category>"""
+    exported = []
+    for category, filename in SUMMARY_FILES.items():
+        path = os.path.join(summary_dir, filename)
+        if not os.path.exists(path):
+            print(f"⚠️  Summary 임베딩 파일이 없습니다: {path}")
+            continue
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        write_corpus(out_dir, f"summary_{category}", data["faiss_index"], data["texts"], data["metadata"])
+        exported.append(f"summary_{category}")
+    return exported
+
+
+def export_original(embeddings_dir: str, out_dir: str) -> list[str]:
+    """Original RAG 카테고리 임베딩(.faiss + pickle Document 목록 + BM25) → original_<category>"""
+    import faiss
+
+    exported = []
+    for category in CATEGORIES:
+        base = os.path.join(embeddings_dir, f"{category}_card")
+        if not (os.path.exists(f"{base}_embedding_data.pkl") and os.path.exists(f"{base}_embeddings.faiss")):
+            print(f"⚠️  Original 카테고리 임베딩이 없습니다: {base}_*")
+            continue
+        with open(f"{base}_embedding_data.pkl", "rb") as f:
+            documents = pickle.load(f)["documents"]
+        metadatas = [doc.metadata for doc in documents]
+        if documents and "keyword" not in metadatas[0]:
+            print(f"⚠️  {category}: keyword 메타데이터가 없습니다. build_category_embeddings(force_rebuild=True) 후 다시 내보내세요.")
+        name = f"original_{category}"
+        write_corpus(out_dir, name, faiss.read_index(f"{base}_embeddings.faiss"),
+                     [doc.page_content for doc in documents], metadatas)
+        # BM25는 이미 mmap 형식이므로 파일만 복사 (prefix를 코퍼스 이름으로)
+        for src in glob.glob(f"{base}_bm25_*"):
+            suffix = os.path.basename(src)[len(f"{category}_card"):]
+            _replace(_prefix(out_dir, name) + suffix, lambda tmp_path: shutil.copyfile(src, tmp_path))
+        exported.append(name)
+    return exported
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="워커 간 공유용 읽기 전용 인덱스 아티팩트 내보내기")
+    parser.add_argument("--out", default=shared_dir() or os.path.join(here, "..", "shared_artifacts"))
+    parser.add_argument("--summary-dir", default=os.path.join(here, "..", "embeddings", "sep_embeddings"))
+    parser.add_argument("--original-dir", default=os.path.join(here, "..", "originalRAG", "original_embeddings"))
+    args = parser.parse_args()
+
+    exported = export_summary(args.summary_dir, args.out) + export_original(args.original_dir, args.out)
+    print(f"📦 공유 아티팩트 {len(exported)}개 → {os.path.abspath(args.out)}: {', '.join(exported)}")
+    print("   서버 실행 시 SHARED_ARTIFACTS_DIR로 이 경로를 지정하세요.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# telemetry.py
+"""파이프라인 계측 (표준 라이브러리만 사용).
+
+- 메트릭: 단계별 지연시간 히스토그램, LLM 호출/토큰 카운터, 캐시 적중 카운터
+  → render_prometheus()가 Prometheus 텍스트 형식으로 내보낸다 (UI/app.py의 /metrics)
+- 로그: get_logger()가 LOG_LEVEL로 레벨을 정하는 구조화 로거를 돌려준다.
+  레코드는 QueueHandler로 넘기고 별도 스레드(QueueListener)가 stdout에 쓰므로
+  요청 처리 스레드가 터미널 출력에 막히지 않는다. LOG_FORMAT=json이면 한 줄 JSON.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from contextlib import contextmanager
+from typing import Optional
+
+
+# -------- 메트릭 --------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_text(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, {**v, "counts": list(v["counts"])}) for k, v in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["counts"]):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {state['count']}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "kbcard_stage_seconds", "파이프라인 단계별 소요 시간(초)", ("pipeline", "stage"))
+LLM_CALLS = REGISTRY.counter(
+    "kbcard_llm_calls_total", "LLM/임베딩 API 호출 수", ("caller", "model", "status"))
+LLM_TOKENS = REGISTRY.counter(
+    "kbcard_llm_tokens_total", "LLM/임베딩 API 토큰 수", ("caller", "model", "kind"))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "kbcard_cache_lookups_total", "캐시 조회 수", ("cache", "result"))
+
+
+def stage(pipeline: str, name: str):
+    """with stage("original_rag", "rerank"): ... → kbcard_stage_seconds에 기록"""
+    return STAGE_SECONDS.time(pipeline=pipeline, stage=name)
+
+
+def timed_stream(iterable, pipeline: str, name: str):
+    """스트림을 그대로 흘려보내면서 next()에 걸린 시간만 합산해 stage로 기록.
+    소비자가 yield 사이에 쓰는 시간(클라이언트 전송 등)은 포함하지 않는다."""
+    elapsed = 0.0
+    it = iter(iterable)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=name)
+
+
+async def atimed_stream(aiterable, pipeline: str, name: str):
+    """timed_stream의 비동기 버전 (__anext__ 대기 시간만 합산)"""
+    elapsed = 0.0
+    it = aiterable.__aiter__()
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await it.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        STAGE_SECONDS.observe(elapsed, pipeline=pipeline, stage=name)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def usage_tokens(usage) -> tuple[int, int]:
+    """(prompt, completion) 토큰 수. usage는 OpenAI usage 객체/dict 또는 LangChain usage_metadata"""
+    if usage is None:
+        return 0, 0
+    get = usage.get if isinstance(usage, dict) else (lambda k: getattr(usage, k, None))
+    return (get("prompt_tokens") or get("input_tokens") or 0), (get("completion_tokens") or get("output_tokens") or 0)
+
+
+def record_llm(caller: str, model: str, usage=None, status: str = "ok"):
+    """LLM 호출 1회 기록 (usage가 있으면 토큰 수도)"""
+    LLM_CALLS.inc(caller=caller, model=model, status=status)
+    prompt, completion = usage_tokens(usage)
+    if prompt:
+        LLM_TOKENS.inc(prompt, caller=caller, model=model, kind="prompt")
+    if completion:
+        LLM_TOKENS.inc(completion, caller=caller, model=model, kind="completion")
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# -------- 로그 --------
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class _StructuredFormatter(logging.Formatter):
+    """extra로 넘긴 필드를 text(key=value) 또는 json으로 함께 출력"""
+
+    def __init__(self, as_json: bool):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS}
+        message = record.getMessage()
+        if self.as_json:
+            payload = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                       "msg": message, **fields}
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+        ts = time.strftime("%H:%M:%S", time.localtime(record.created))
+        text = f"{ts} {record.levelname:<7} [{record.name}] {message}"
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def _setup_logging():
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_StructuredFormatter(os.getenv("LOG_FORMAT", "text").lower() == "json"))
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger("kbcard")
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+        atexit.register(_listener.stop)  # 종료 시 남은 로그를 모두 출력
+
+
+def get_logger(name: str) -> logging.Logger:
+    """kbcard.<name> 로거. logger.info("메시지", extra={"card": ...})처럼 필드를 붙인다."""
+    _setup_logging()
+    return logging.getLogger(f"kbcard.{name}")
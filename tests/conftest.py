@@ -0,0 +1,8 @@
+# conftest.py
+"""모듈들이 패키지가 아니라 폴더 단위(flat import)로 되어 있어 각 폴더를 import 경로에 추가한다."""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("summaryRAG", "originalRAG", "UI"):
+    sys.path.insert(0, os.path.join(ROOT, folder))
@@ -0,0 +1,76 @@
+# test_answer_cache.py
+import time
+
+from answer_cache import SemanticAnswerCache
+
+ANSWER = "연회비는 국내전용 1만원입니다"
+
+
+def test_variant_lookup_rejects_stale_version():
+    """재색인/프롬프트 변경으로 카드 버전이 바뀌면 답변 해시 경로로도 예전 답변/변형을 돌려주지 않는다"""
+    versions = {"카드A": "v1"}
+    cache = SemanticAnswerCache(version_of=versions.get)
+    cache.put("카드A", "detailed", "연회비 알려줘", {"answer": ANSWER}, version="v1")
+    assert cache.put_variant(ANSWER, "simplified", "쉬운 설명")
+    assert cache.get_variant(ANSWER, "simplified") == "쉬운 설명"
+
+    versions["카드A"] = "v2"
+    assert cache.get_variant(ANSWER, "simplified") is None
+    assert not cache.put_variant(ANSWER, "simplified", "쉬운 설명")
+    assert len(cache) == 0
+
+
+def test_variant_lookup_uses_explicit_version():
+    cache = SemanticAnswerCache()
+    cache.put("카드A", "detailed", "연회비 알려줘", {"answer": ANSWER}, version="v1")
+    cache.put_variant(ANSWER, "simplified", "쉬운 설명")
+    assert cache.get_variant(ANSWER, "simplified", version="v1") == "쉬운 설명"
+    assert cache.get_variant(ANSWER, "simplified", version="v2") is None
+    assert cache.get("카드A", "detailed", "연회비 알려줘") is None
+
+
+def test_exact_and_semantic_hits_and_miss():
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    cache.put("카드A", "detailed", "연회비 알려줘", {"answer": ANSWER}, query_vector=[1.0, 0.0], version="v1")
+
+    hit = cache.get("카드A", "detailed", "연회비  알려줘?", version="v1")  # 공백/문장부호 차이는 같은 질문
+    assert hit["cache"] == "exact" and hit["answer"] == ANSWER
+
+    hit = cache.get("카드A", "detailed", "연회비가 얼마야", query_vector=[0.95, 0.1], version="v1")
+    assert hit["cache"] == "semantic" and hit["similarity"] >= 0.9
+
+    assert cache.get("카드A", "detailed", "해외 수수료는", query_vector=[0.0, 1.0], version="v1") is None
+    assert cache.get("카드A", "simple", "연회비 알려줘", version="v1") is None  # 모드가 다르면 별도 범위
+    assert cache.get("카드B", "detailed", "연회비 알려줘", query_vector=[1.0, 0.0], version="v1") is None
+    assert cache.stats == {"exact_hits": 1, "semantic_hits": 1, "misses": 2, "evictions": 0, "variant_hits": 0}
+
+
+def test_version_change_invalidates_entry():
+    cache = SemanticAnswerCache()
+    cache.put("카드A", "detailed", "연회비 알려줘", {"answer": ANSWER}, query_vector=[1.0, 0.0], version="v1")
+    assert cache.get("카드A", "detailed", "연회비가 얼마야", query_vector=[1.0, 0.0], version="v2") is None
+    assert len(cache) == 0
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = SemanticAnswerCache(ttl_seconds=60)
+    cache.put("카드A", "detailed", "연회비 알려줘", {"answer": ANSWER})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("카드A", "detailed", "연회비 알려줘") is None
+    assert cache.get_variant(ANSWER, "simplified") is None
+
+
+def test_lru_eviction_and_invalidate():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.put("카드A", "detailed", "질문1", {"answer": "답1"})
+    cache.put("카드A", "detailed", "질문2", {"answer": "답2"})
+    assert cache.get("카드A", "detailed", "질문1") is not None  # 질문1을 최근 사용으로
+    cache.put("카드B", "detailed", "질문3", {"answer": "답3"})
+    assert cache.get("카드A", "detailed", "질문2") is None
+    assert cache.stats["evictions"] == 1
+    assert not cache.put_variant("답2", "simplified", "쉬운 답2")  # 제거된 답변에는 변형을 붙이지 않는다
+
+    assert cache.invalidate("카드A") == 1
+    assert cache.get("카드A", "detailed", "질문1") is None
+    assert cache.get("카드B", "detailed", "질문3") is not None
@@ -0,0 +1,104 @@
+# test_card_attributes.py
+import os
+import glob
+import json
+import pickle
+
+import pytest
+
+from card_attributes import extract_card_attributes, parse_card_text, parse_won
+
+SIDECAR_DIR = os.path.join(os.path.dirname(__file__), '..', 'embeddings', 'sep_embeddings')
+
+
+def test_parse_won_units():
+    assert parse_won('1,500원') == 1500
+    assert parse_won('1.5만 원') == 15000
+    assert parse_won('2천 원') == 2000
+    assert parse_won('1만 4천 원') == 14000
+    assert parse_won('30%') is None
+
+
+def test_full_card_text():
+    card_text = ("카드명: 테스트카드 | 브랜드: Mastercard | 발급대상: 개인 | 연회비: 국내전용 15,000원, 해외겸용 18,000원 | "
+                 "혜택: 스타벅스 50% 할인 (월 최대 1만 원), 대중교통 10% 청구할인 | 조건: 전월 실적 40만 원 이상")
+    assert parse_card_text(card_text)['발급대상'] == '개인'
+    attributes = extract_card_attributes(card_text)
+    assert (attributes['brand'], attributes['target_user']) == ('Mastercard', '개인')
+    assert attributes['annual_fee_won'] == 15000
+    assert [b['percent'] for b in attributes['benefits']] == [50.0, 10.0]
+    assert attributes['conditions'] == ['전월 실적 40만 원 이상']
+    assert attributes['discounts'] == ['50% 할인/캐시백']
+    assert attributes['max_discount_percent'] == 50.0
+    assert attributes['max_monthly_cap_won'] == 10000
+    assert attributes['min_prev_month_spend_won'] == 400000
+    json.dumps(attributes, ensure_ascii=False)  # 사이드카 json에 그대로 저장된다
+
+
+def test_missing_fields():
+    attributes = extract_card_attributes("카드명: 테스트 | 연회비: 정보 없음 | 기타: 연회비 5,000원")
+    assert attributes['annual_fee'] == '5,000원' and attributes['annual_fee_won'] == 5000
+    empty = extract_card_attributes("")
+    assert empty['benefits'] == [] and empty['annual_fee_won'] is None and empty['max_monthly_cap_won'] is None
+
+
+@pytest.mark.parametrize('pkl_path', sorted(glob.glob(os.path.join(SIDECAR_DIR, '*_cards_embedding_data.pkl'))))
+def test_sidecar_attributes_are_current(pkl_path):
+    """저장된 사이드카 속성이 현재 추출 규칙과 같다 (다르면 --attributes-only로 다시 생성)"""
+    with open(pkl_path, 'rb') as f:
+        data = pickle.load(f)
+    for metadata, text in zip(data['metadata'], data['texts']):
+        assert metadata['attributes'] == extract_card_attributes(text), metadata['card_name']
+
+
+def test_monthly_cap_until_phrasing():
+    """'월 N만 원까지'는 혜택 금액이 아니라 월 한도"""
+    attributes = extract_card_attributes("카드명: 테스트 | 혜택: 전월 실적 30만 원 이상 시 월 20만 원까지 | 연회비: 없음")
+    benefit = attributes['benefits'][0]
+    assert benefit['monthly_cap_won'] == 200000
+    assert benefit['won'] is None
+    assert attributes['max_monthly_cap_won'] == 200000
+    assert attributes['min_prev_month_spend_won'] == 300000
+
+
+def test_monthly_cap_keyword_phrasing():
+    attributes = extract_card_attributes("카드명: 테스트 | 혜택: 커피 10% 할인 (월 최대 5천 원), 교통 500원 할인 | 조건: 월 할인 한도 1만 원")
+    first, second = attributes['benefits']
+    assert (first['percent'], first['monthly_cap_won']) == (10.0, 5000)
+    assert (second['won'], second['monthly_cap_won']) == (500, None)
+    assert attributes['max_monthly_cap_won'] == 10000
+
+
+def test_prev_month_spend_is_not_a_cap():
+    """'전월 30만 원까지' 같은 실적 구간은 월 한도로 읽지 않는다"""
+    benefit = extract_card_attributes("카드명: 테스트 | 혜택: 전월 30만 원까지 5천 원 할인")['benefits'][0]
+    assert benefit['monthly_cap_won'] is None
+    assert benefit['won'] == 5000
+
+
+def test_thousands_separator_does_not_split_benefits():
+    attributes = extract_card_attributes("카드명: 테스트 | 혜택: 교통 1,500원 할인, 커피 10% 할인, 영화 3,000원 환급할인")
+    assert [b['text'] for b in attributes['benefits']] == ['교통 1,500원 할인', '커피 10% 할인', '영화 3,000원 환급할인']
+    assert [b['won'] for b in attributes['benefits']] == [1500, None, 3000]
+
+
+def test_annual_fee_uses_base_domestic_tier():
+    attributes = extract_card_attributes("카드명: 테스트 | 연회비: VISA 12,000원, 국내 10,000원, 가족카드 2,000원")
+    assert attributes['annual_fee_won'] == 10000
+    assert attributes['annual_fee_tiers'] == [
+        {'label': 'VISA', 'won': 12000}, {'label': '국내', 'won': 10000}, {'label': '가족카드', 'won': 2000},
+    ]
+
+
+def test_annual_fee_ignores_mobile_only_and_breakdown_amounts():
+    fee = "일반(실물)카드 20,000원 (기본연회비 7,000원 + 제휴연회비 13,000원), 모바일 단독카드 1만 4천 원"
+    attributes = extract_card_attributes(f"카드명: 테스트 | 연회비: {fee}")
+    assert attributes['annual_fee_won'] == 20000
+    assert [t['won'] for t in attributes['annual_fee_tiers']] == [20000, 14000]
+
+
+def test_annual_fee_prefers_total_and_free_cards():
+    total = extract_card_attributes("카드명: 테스트 | 연회비: 국내전용 기본연회비 7,000원, 제휴연회비 38,000원, 총합 45,000원")
+    assert total['annual_fee_won'] == 45000
+    free = extract_card_attributes("카드명: 테스트 | 연회비: 연회비 없음 (연간 10만원 이상 사용 시 면제)")
+    assert (free['annual_fee_won'], free['annual_fee_tiers']) == (0, [])
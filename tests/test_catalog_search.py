@@ -0,0 +1,43 @@
+# test_catalog_search.py
+import types
+
+import faiss
+import numpy as np
+
+from original_rag import FAISSRAGRetriever
+
+
+def test_rrf_limit_is_separate_from_constant():
+    engine = FAISSRAGRetriever.__new__(FAISSRAGRetriever)
+    dense, lexical = list(range(150)), list(range(149, -1, -1))
+    assert len(engine.reciprocal_rank_fusion(dense, lexical)) == 150
+    assert len(engine.reciprocal_rank_fusion(dense, lexical, limit=100)) == 100
+
+
+class FakeBM25:
+    def search(self, question, k, doc_ids=None):
+        return [(doc_id, 1.0) for doc_id in range(k)]
+
+
+def test_search_catalog_reranks_more_than_60_candidates():
+    """candidates/rerank_top이 RRF 상수(60)에 잘리지 않고 재랭킹까지 전달된다"""
+    n, dim = 300, 8
+    vectors = np.random.default_rng(0).random((n, dim), dtype=np.float32)
+    index = faiss.IndexFlatIP(dim)
+    index.add(vectors)
+    documents = [types.SimpleNamespace(page_content=f"[연회비] 문서 {i}",
+                                       metadata={"card_name": f"카드{i % 40}", "field": "annual_fee", "keyword": ""})
+                 for i in range(n)]
+    reranked = []
+
+    engine = FAISSRAGRetriever.__new__(FAISSRAGRetriever)
+    engine.route_fields = False
+    engine._category_locks = {}
+    engine._catalog_meta = {}
+    engine._embed_query = lambda question: vectors[:1]
+    engine._load_category_embeddings = lambda category: (documents, types.SimpleNamespace(index=index), FakeBM25())
+    engine.reranker = types.SimpleNamespace(predict=lambda pairs: reranked.extend(pairs) or [0.5] * len(pairs))
+
+    result = engine.search_catalog("연회비", card_type="credit", candidates=200, rerank_top=100, max_cards=50)
+    assert len(reranked) == 100
+    assert result["cards"]
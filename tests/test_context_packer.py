@@ -0,0 +1,48 @@
+# test_context_packer.py
+import types
+
+from context_packer import chunk_body, pack_context
+
+
+def doc(body: str, heading: str = "연회비", field: str = "fee"):
+    content = f"[카드A]\n{heading}\n<{field}>\n{body}"
+    return types.SimpleNamespace(page_content=content, metadata={"heading": heading, "field": field})
+
+
+DOCS = [
+    doc("국내전용 15,000원. 해외겸용 18,000원."),
+    doc("국내전용 15,000원.\n가족카드는 무료입니다.", field="fees"),
+    doc("스타벅스 50% 할인. 월 최대 1만원.", heading="커피", field="benefit"),
+]
+
+
+def test_chunk_body_strips_header():
+    assert chunk_body(DOCS[0].page_content) == "국내전용 15,000원. 해외겸용 18,000원."
+    assert chunk_body("헤더 없는 본문") == "헤더 없는 본문"
+
+
+def test_headers_once_and_duplicate_sentences_dropped():
+    packed = pack_context(DOCS, [0, 1, 2], budget_tokens=10_000, count=len)
+    assert packed["text"] == (
+        "## 연회비\n<fee>\n국내전용 15,000원.\n해외겸용 18,000원.\n<fees>\n가족카드는 무료입니다.\n\n"
+        "## 커피\n<benefit>\n스타벅스 50% 할인.\n월 최대 1만원."
+    )
+    assert packed["duplicate_sentences"] == 1
+    assert packed["doc_ids"] == [0, 1, 2]
+    assert not packed["truncated"]
+
+
+def test_budget_is_never_exceeded():
+    full = pack_context(DOCS, [0, 1, 2], budget_tokens=10_000, count=len)
+    for budget in range(0, full["tokens_used"] + 5, 3):
+        packed = pack_context(DOCS, [0, 1, 2], budget_tokens=budget, count=len)
+        assert packed["tokens_used"] <= budget
+        assert packed["truncated"] == (packed["text"] != full["text"])
+
+
+def test_fills_in_rerank_order_and_stops_at_budget():
+    """예산이 부족하면 앞 순위 문서부터 채우고 남은 문서는 넣지 않는다"""
+    packed = pack_context(DOCS, [2, 0, 1], budget_tokens=40, count=len)
+    assert packed["text"].startswith("## 커피")
+    assert packed["doc_ids"][0] == 2 and 1 not in packed["doc_ids"]
+    assert packed["truncated"]
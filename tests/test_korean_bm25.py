@@ -0,0 +1,53 @@
+# test_korean_bm25.py
+import numpy as np
+
+from korean_bm25 import KoreanBM25Index, tokenize_korean
+
+DOCS = [
+    "연회비는 국내전용 15,000원, 해외겸용 18,000원입니다",
+    "해외 이용 수수료는 이용금액의 1%가 부과됩니다",
+    "스타벅스 결제 시 50% 할인 (월 최대 1만원)",
+    "VISA 브랜드로 해외 가맹점 결제가 가능합니다",
+]
+
+
+def test_tokenizer_bigrams_hangul_and_keeps_numbers():
+    assert tokenize_korean("연회비는") == ["연회", "회비", "비는"]
+    assert tokenize_korean("연회비 15,000원") == ["연회", "회비", "15000", "원"]
+    assert tokenize_korean("VISA 1%") == ["visa", "1"]
+    assert tokenize_korean("") == []
+
+
+def test_particle_does_not_block_match():
+    """조사가 붙어도 어간 bigram이 겹쳐 검색된다 (연회비 → 연회비는)"""
+    index = KoreanBM25Index.build(DOCS)
+    assert index.search("연회비", k=1)[0][0] == 0
+    assert index.search("visa", k=1)[0][0] == 3
+    assert index.search("존재하지않음zz") == []
+
+
+def test_search_within_doc_ids():
+    index = KoreanBM25Index.build(DOCS)
+    ids = [doc_id for doc_id, _ in index.search("해외", k=10, doc_ids=[1, 2])]
+    assert ids == [1]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = KoreanBM25Index.build(DOCS)
+    index.save(str(tmp_path), "credit")
+    assert KoreanBM25Index.exists(str(tmp_path), "credit")
+    assert not KoreanBM25Index.exists(str(tmp_path), "check")
+
+    loaded = KoreanBM25Index.load(str(tmp_path), "credit")
+    assert isinstance(loaded.weights, np.memmap)
+    assert loaded.vocab == index.vocab and loaded.n_docs == index.n_docs
+    for query in ("연회비", "해외 수수료", "스타벅스 할인"):
+        assert np.allclose(loaded.get_scores(query), index.get_scores(query))
+        assert loaded.search(query, k=3) == index.search(query, k=3)
+
+
+def test_exists_rejects_other_version(tmp_path):
+    index = KoreanBM25Index.build(DOCS)
+    index.meta["version"] = KoreanBM25Index.VERSION + 1
+    index.save(str(tmp_path), "credit")
+    assert not KoreanBM25Index.exists(str(tmp_path), "credit")
@@ -0,0 +1,37 @@
+# test_llm_dispatcher.py
+import time
+import threading
+
+from llm_dispatcher import LLMDispatcher, LLMOverloaded
+
+
+def test_queue_bound_applies_when_tpm_budget_blocks():
+    """동시 실행 자리는 남아도 토큰 예산 때문에 대기열이 막히면 max_queue를 넘는 요청은 바로 503"""
+    dispatcher = LLMDispatcher(concurrency=4, max_queue=2, max_wait=5, tpm=1000)
+    with dispatcher.slot("gpt-4o", 1000, "simplify"):
+        pass
+    # 예산을 다 쓴 예약이 약 1초 뒤에 만료되도록 시각을 당긴다
+    dispatcher._lanes["gpt-4o"].window[0][0] = time.time() - 59
+
+    granted, rejected, queued = [], [], []
+
+    def call():
+        start = time.monotonic()
+        try:
+            with dispatcher.slot("gpt-4o", 500, "simplify"):
+                granted.append(time.monotonic() - start)
+        except LLMOverloaded as e:
+            rejected.append((e.status, e.reason, time.monotonic() - start))
+
+    threads = [threading.Thread(target=call) for _ in range(20)]
+    for t in threads:
+        t.start()
+    time.sleep(0.3)
+    queued.append(dispatcher.stats()["gpt-4o"]["queued"])
+    for t in threads:
+        t.join()
+
+    assert queued == [2]
+    assert len(rejected) == 18
+    assert all(status == 503 and reason == "queue_full" and elapsed < 0.5 for status, reason, elapsed in rejected)
+    assert len(granted) == 2  # 대기열의 2건은 예약이 만료된 뒤 자리를 받는다
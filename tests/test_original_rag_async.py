@@ -0,0 +1,64 @@
+# test_original_rag_async.py
+import asyncio
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_cache import SemanticAnswerCache
+from original_rag import FAISSRAGRetriever
+
+
+class FakeAsyncGraph:
+    """agraph 대역: 답변 노드 토큰을 천천히 내보낸 뒤 최종 state를 돌려준다 (LLM 호출 없음)"""
+
+    async def astream(self, state, stream_mode):
+        for token in ("연회비는 ", "1만원입니다"):
+            await asyncio.sleep(0.1)
+            yield "messages", (types.SimpleNamespace(content=token), {"langgraph_node": "GenerateAnswer"})
+        yield "values", {**state, "answer": "연회비는 1만원입니다", "context_tokens": 42}
+
+
+def make_engine() -> FAISSRAGRetriever:
+    engine = FAISSRAGRetriever.__new__(FAISSRAGRetriever)
+    engine.answer_cache = SemanticAnswerCache()
+    engine.prefetch_easy = False
+    engine.agraph = FakeAsyncGraph()
+
+    def prepare(card_name, question, explain_easy, top_k, easy_mode):
+        time.sleep(0.05)  # 검색/재랭킹
+        state = {"answer": "", "simplified_answer": "", "context_tokens": 0}
+        return {"card_name": card_name, "question": question, "explain_easy": explain_easy, "mode": "detailed",
+                "version": "v", "hit": None, "sources": [], "fields": None, "query_vector": None,
+                "state": state, "answer_node": "GenerateAnswer"}
+
+    engine._prepare_query = prepare
+    return engine
+
+
+def test_generation_does_not_hold_work_threads():
+    """작업 스레드 1개로도 동시 스트리밍 8건의 생성이 겹쳐 진행된다 (스레드는 검색 단계에만 사용)"""
+    engine = make_engine()
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    async def offload(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    async def one(i: int) -> list[dict]:
+        events = []
+        async for ev in engine.aquery_stream(f"카드{i}", "", "연회비 알려줘", offload=offload):
+            events.append(ev)
+        return events
+
+    async def run():
+        return await asyncio.gather(*(one(i) for i in range(8)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    # 스레드에서 생성까지 했다면 8 × (0.05 + 0.2)초 이상 걸린다
+    assert elapsed < 1.2
+    for events in results:
+        assert [ev["event"] for ev in events] == ["sources", "token", "token", "done"]
+        assert events[-1]["data"]["answer"] == "연회비는 1만원입니다"
+    assert engine.answer_cache.get("카드0", "detailed", "연회비 알려줘") is not None
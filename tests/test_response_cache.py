@@ -0,0 +1,53 @@
+# test_response_cache.py
+import time
+
+from response_cache import ResponseCache, make_key, normalize_question
+
+RESULTS = [{"card_name": "카드A", "card_type": "credit"}, {"card_name": "카드B", "card_type": "check"}]
+
+
+def test_key_ignores_spacing_and_punctuation_but_not_candidates():
+    key = make_key("recommend", "gpt-4o", "v1", RESULTS, question="연회비 싼 카드?", card_type="all")
+    assert key == make_key("recommend", "gpt-4o", "v1", RESULTS, question="연회비  싼 카드", card_type="all")
+    assert key != make_key("recommend", "gpt-4o", "v1", RESULTS[::-1], question="연회비 싼 카드", card_type="all")
+    assert key != make_key("recommend", "gpt-4o", "v2", RESULTS, question="연회비 싼 카드", card_type="all")
+    assert key != make_key("recommend", "gpt-4o", "v1", RESULTS, question="해외 수수료 없는 카드", card_type="all")
+    assert normalize_question(" VISA 카드? ") == "visa카드"
+
+
+def test_hit_miss_and_lru():
+    cache = ResponseCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", "답A")
+    cache.put("b", "답B")
+    assert cache.get("a") == "답A"  # a를 최근 사용으로
+    cache.put("c", "답C")
+    assert cache.get("b") is None
+    assert cache.stats == {"hits": 1, "misses": 2, "evictions": 1}
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("a", "답A")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_persisted_entries_survive_restart(tmp_path):
+    path = str(tmp_path / "cache" / "responses.jsonl")
+    cache = ResponseCache(path=path)
+    cache.put("a", "답A")
+    cache.put("a", "답A2")  # 덮어쓴 항목은 다시 로드할 때 하나로 정리
+    cache.put("b", "답B")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "c", "val')  # 기록 중 종료된 마지막 줄
+
+    reloaded = ResponseCache(path=path)
+    assert reloaded.get("a") == "답A2" and reloaded.get("b") == "답B"
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    reloaded.clear()
+    assert ResponseCache(path=path).get("a") is None
@@ -0,0 +1,81 @@
+# test_simplify_singleflight.py
+import asyncio
+import json
+import os
+import types
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+
+import app  # noqa: E402
+
+
+class FakeCompletions:
+    """AsyncOpenAI chat.completions 대역: 호출 수를 세고 토큰 3개를 천천히 스트리밍"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, stream=False, **kwargs):
+        self.calls += 1
+        tokens = ["쉬운 ", "설명", "입니다"]
+        if not stream:
+            await asyncio.sleep(0.1)
+            message = types.SimpleNamespace(content="".join(tokens))
+            return types.SimpleNamespace(usage=None, choices=[types.SimpleNamespace(message=message)])
+
+        async def chunks():
+            for token in tokens:
+                await asyncio.sleep(0.05)
+                delta = types.SimpleNamespace(content=token)
+                yield types.SimpleNamespace(usage=None, choices=[types.SimpleNamespace(delta=delta)])
+
+        return chunks()
+
+
+def fake_client(monkeypatch) -> FakeCompletions:
+    completions = FakeCompletions()
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    monkeypatch.setattr(app, "get_async_client", lambda: client)
+    monkeypatch.setattr(app, "engine", None)
+    app.simplify_cache.clear()
+    return completions
+
+
+async def read_events(text: str) -> list[tuple[str, object]]:
+    response = await app.simplify_stream(text)
+    events = []
+    async for raw in response.body_iterator:
+        event, data = raw.strip().split("\n", 1)
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_concurrent_streams_share_one_llm_call(monkeypatch):
+    completions = fake_client(monkeypatch)
+
+    async def run():
+        first = asyncio.create_task(read_events("어려운 약관 문장"))
+        await asyncio.sleep(0.07)  # 첫 토큰이 나간 뒤 합류해도 처음 토큰부터 받는다
+        return await asyncio.gather(first, read_events("어려운  약관 문장"), app.simplify("어려운 약관 문장"))
+
+    first, second, plain = asyncio.run(run())
+    assert completions.calls == 1
+    for events in (first, second):
+        assert "".join(data for event, data in events if event == "token") == "쉬운 설명입니다"
+        assert events[-1] == ("done", {"simplified": "쉬운 설명입니다"})
+    assert plain == {"simplified": "쉬운 설명입니다"}
+    assert not app.simplify_streams and not app.flights.inflight()
+
+
+def test_stream_joins_inflight_simplify(monkeypatch):
+    completions = fake_client(monkeypatch)
+
+    async def run():
+        plain = asyncio.create_task(app.simplify("다른 문장"))
+        await asyncio.sleep(0)
+        return await asyncio.gather(plain, read_events("다른 문장"))
+
+    plain, events = asyncio.run(run())
+    assert completions.calls == 1
+    assert plain == {"simplified": "쉬운 설명입니다"}
+    assert events == [("token", "쉬운 설명입니다"), ("done", {"simplified": "쉬운 설명입니다"})]
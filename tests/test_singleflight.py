@@ -0,0 +1,98 @@
+# test_singleflight.py
+import asyncio
+
+from singleflight import SingleFlight, TokenBroadcast
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "결과"
+
+    async def run():
+        results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+        assert flights.inflight() == 0  # 끝나면 키를 지운다 (결과는 캐시하지 않음)
+        return results + [await flights.do("key", compute)]
+
+    assert asyncio.run(run()) == ["결과"] * 6
+    assert len(calls) == 2
+    assert flights.stats == {"leaders": 2, "followers": 4, "errors": 0, "timeouts": 0}
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def run():
+        return await asyncio.gather(flights.do("a", lambda: asyncio.sleep(0.01, "A")),
+                                    flights.do("b", lambda: asyncio.sleep(0.01, "B")))
+
+    assert asyncio.run(run()) == ["A", "B"]
+    assert flights.stats["leaders"] == 2
+
+
+def test_error_reaches_every_waiter():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("LLM 오류")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.stats["errors"] == 1 and flights.inflight() == 0
+
+
+def test_waiter_timeout_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "결과"
+
+    async def run():
+        impatient = flights.do("key", slow, timeout=0.01)
+        patient = flights.do("key", slow)
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    impatient, patient = asyncio.run(run())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "결과"
+    assert flights.stats["timeouts"] == 1 and flights.stats["leaders"] == 1
+
+
+def test_late_subscriber_replays_tokens():
+    async def run():
+        broadcast = TokenBroadcast()
+
+        async def read():
+            return [token async for token in broadcast.tokens()]
+
+        early = asyncio.ensure_future(read())
+        broadcast.push("쉬운 ")
+        await asyncio.sleep(0)
+        late = asyncio.ensure_future(read())
+        broadcast.push("설명")
+        broadcast.close()
+        return await early, await late
+
+    early, late = asyncio.run(run())
+    assert early == late == ["쉬운 ", "설명"]
+
+
+def test_start_reuses_inflight_task():
+    flights = SingleFlight()
+
+    async def run():
+        first = flights.start("key", lambda: asyncio.sleep(0.01, 1))
+        second = flights.start("key", lambda: asyncio.sleep(0.01, 2))
+        assert first is second and flights.is_inflight("key")
+        return await first
+
+    assert asyncio.run(run()) == 1
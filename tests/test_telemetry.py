@@ -0,0 +1,44 @@
+# test_telemetry.py
+import asyncio
+import time
+
+from telemetry import STAGE_SECONDS, atimed_stream, timed_stream
+
+
+def stage_sum(name: str) -> float:
+    state = STAGE_SECONDS._values.get(STAGE_SECONDS._key({"pipeline": "test", "stage": name}))
+    return state["sum"] if state else 0.0
+
+
+def slow_tokens():
+    for token in ("a", "b", "c"):
+        time.sleep(0.02)
+        yield token
+
+
+async def aslow_tokens():
+    for token in ("a", "b", "c"):
+        await asyncio.sleep(0.02)
+        yield token
+
+
+def test_timed_stream_excludes_consumer_time():
+    """생산자(LLM 스트림) 대기 시간만 기록되고, yield 뒤 소비자가 쓴 시간은 빠진다"""
+    tokens = []
+    for token in timed_stream(slow_tokens(), "test", "sync"):
+        tokens.append(token)
+        time.sleep(0.1)  # 느린 클라이언트
+    assert tokens == ["a", "b", "c"]
+    assert 0.05 <= stage_sum("sync") < 0.2
+
+
+def test_atimed_stream_excludes_consumer_time():
+    async def run():
+        tokens = []
+        async for token in atimed_stream(aslow_tokens(), "test", "async"):
+            tokens.append(token)
+            await asyncio.sleep(0.1)
+        return tokens
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert 0.05 <= stage_sum("async") < 0.2
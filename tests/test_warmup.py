@@ -0,0 +1,52 @@
+# test_warmup.py
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+
+import app  # noqa: E402
+from original_rag import FAISSRAGRetriever  # noqa: E402
+
+
+def make_engine(loaded: dict) -> FAISSRAGRetriever:
+    """카테고리 인덱스 로드만 흉내 낸 엔진 (loaded: 카테고리 -> 문서 목록, 없으면 로드 실패)"""
+    engine = FAISSRAGRetriever.__new__(FAISSRAGRetriever)
+    engine.embeddings_dir = "original_embeddings"
+    engine._category_locks = {}
+    engine._load_category_embeddings = lambda category: (loaded.get(category), None, None)
+    engine._catalog_arrays = lambda category, docs: {}
+    engine.search_catalog = lambda *args, **kwargs: {}
+    return engine
+
+
+def test_warm_up_fails_without_any_category_index():
+    with pytest.raises(RuntimeError):
+        make_engine({}).warm_up()
+
+
+def test_warm_up_reports_missing_categories():
+    result = make_engine({"credit": ["doc"] * 3}).warm_up()
+    assert result["documents"] == {"credit": 3, "check": 0}
+    assert result["missing"] == ["check"]
+
+
+def test_readyz_not_ready_when_original_indexes_missing(monkeypatch):
+    def no_indexes():
+        return make_engine({}).warm_up()
+
+    steps = (("summary", lambda: {"items": 3}), ("original_indexes", no_indexes))
+    status = {name: {"ready": False, "degraded": False, "seconds": None, "error": None, "detail": None}
+              for name, _ in steps}
+    monkeypatch.setattr(app, "WARMUP_STEPS", steps)
+    monkeypatch.setattr(app, "warmup_status", status)
+    monkeypatch.setattr(app, "WARMUP_RETRY_SECONDS", 0)
+    monkeypatch.setattr(app, "ready_event", threading.Event())
+
+    app.warm_up()
+    assert not app.ready_event.is_set()
+    assert status["original_indexes"]["ready"] is False
+    assert "카테고리 인덱스" in status["original_indexes"]["error"]
+    assert asyncio.run(app.readyz()).status_code == 503